@@ -1,149 +1,512 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
-import nltk
-from nltk.corpus import wordnet as wn
-from nltk.corpus import brown, stopwords
+# Only light modules are imported here. NLTK, numpy and the corpus 
+# statistics are loaded on first use by `IntensityPairMiner`, so importing 
+# this module costs next to nothing. 
 import random, pprint
+import argparse, functools, itertools, os, sys
 
-# === Global Variables === #
-# brown text corpora
-text = brown.words()
-stopwords_en = stopwords.words('english')
-bigrams = nltk.bigrams(text)
-
-# nltk frequency distribution
-freqDist = nltk.FreqDist(text)
-conditionalFreqDist = nltk.ConditionalFreqDist(bigrams)
-oppositeConditionalFreqDist = nltk.ConditionalFreqDist(
-    (back, front) for front, back in bigrams
-)
-# ======================== #
-
-def get_adverbs():
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+# Snapshots of corpus statistics are kept next to this script.
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache')
+# Bump when the way corpus statistics are counted changes.
+STATISTICS_VERSION = 2
+# Settings that change how the corpus is turned into tokens. Any change
+# here invalidates the snapshot.
+TOKENIZATION = {
+    'corpus': 'brown',
+    'lowercase': False,
+}
+# Default thresholds of the pipeline. See `IntensityPairMiner.sweep` to try others. 
+# Values given to `--sweep` are parsed with the type of the default, so the 
+# counts take integers and `diversity` takes decimals too. 
+PARAMETERS = {
+    'hold_count': 2,        # keywords an adverb definition must hold
+    'min_frequency': 10,    # occurrences of an adverb in the corpus
+    'min_length': 7,        # letters of an adverb
+    'min_synonyms': 4,      # lemmas of a synonym synset
+    'diversity': 28.,       # divides the number of synonyms in scores
+}
+# Processes counting the corpus, split by file ids. None uses every core, 
+# 1 counts in this process. The counts are the same either way.
+PROCESSES = None
+# keywords from definition of 'highly' and 'very'
+KEYWORDS = ['extent', 'intensifier', 'intensity', 'quantifier', 'degree', 'comparative']
+
+
+class IntensityPairMiner(object):
     """
-    Process intensity-modifying adverbs, from NLTK wordnet corpus. 
-    Returns list of adverbs. 
+    Finds intensity-modifying pairs of (adverb + word, synonym). 
+    Nothing is loaded on construction. Corpus statistics are loaded by 
+    `load()` (or counted by `build()`), and the other resources (stopwords, 
+    gloss index, word flags) are created the first time they are used. 
+    All of them are persisted as snapshots under `cache_dir`. 
+
+    >>> miner = IntensityPairMiner().load()
+    >>> adverbs = miner.get_adverbs()
+    >>> pairs = miner.get_synsets(miner.get_pairs(adverbs))
+    >>> evaluated = miner.evaluate(adverbs, pairs)
     """
-    # keywords from definition of 'highly' and 'very'
-    keywords = ['extent', 'intensifier', 'intensity', 'quantifier', 'degree', 'comparative']  # decides which adverbs to get. 
-    adverbs = []
-    for synset in list(wn.all_synsets('r')):
-        # for each synset definition, check for intensity modifying keywords
-        hold_count = 0  # number of keywords that this definition is holding. 
-        for keyword in keywords:
-            if keyword in synset.definition():
-                hold_count += 1
-        # add lemmas in synset only if definition holds more than two keywords.
-        if hold_count >= 2: adverbs.extend(synset.lemma_names())
-    
-    # remove more_than_two words adverbs
-    adverbs = [adverb for adverb in adverbs if "_" not in adverb]
-    # remove duplicates, and english stopwords
-    adverbs = list(set(adverbs) - set(stopwords_en))
-    
-    # add additional filter to get most frequent adverbs, and remove short comparatives
-    filtered_adverbs = [adverb for adverb in adverbs if freqDist[adverb] >= 10 and len(adverb) >= 7]
-    return filtered_adverbs
-
-
-def get_pairs(adverbs):
+
+    def __init__(self, cache_dir=CACHE_DIR, tokenization=TOKENIZATION, processes=PROCESSES):
+        self.cache_dir = cache_dir
+        self.tokenization = dict(tokenization)
+        self.processes = processes
+        self.key = None         # key of the loaded corpus statistics snapshot
+        self.name = None        # and its name
+        self._counts = None
+        self._flags = None
+        self._context_vectors = None
+        self._gloss_index = None
+        self._stopwords = None
+        self._synonym_lists = dict()
+
+    # === Corpus statistics === #
+    def corpus_statistics_key(self):
+        """
+        Key of the corpus statistics snapshot. Changes with the corpus files, 
+        and the tokenization settings. 
+        """
+        from nltk.corpus import brown
+        from common.snapshot import corpus_fingerprint, fingerprint
+        return fingerprint(STATISTICS_VERSION, corpus_fingerprint(brown), self.tokenization)
+
+    def build_corpus_statistics(self):
+        """
+        Count unigrams and bigrams of the brown corpus in a single scan, and 
+        encode them as integer-id arrays for `common.snapshot`. 
+        Files are counted in shards across `processes` processes, and merged. 
+        Returns arrays and meta information of the snapshot. 
+        """
+        from nltk.corpus import brown
+        from common.sharding import corpus_words, count_sharded
+        reader = functools.partial(corpus_words, self.tokenization['corpus'], 
+            lowercase=self.tokenization['lowercase'])
+        counts = count_sharded(reader, brown.fileids(), self.processes).bigram_counts()
+        arrays = counts.arrays()
+        arrays['vocabulary'] = counts.vocabulary.words
+        return arrays, {'tokens': int(counts.unigrams.sum())}
+
+    def load(self, rebuild=False):
+        """
+        Load corpus statistics from the on-disk snapshot, rebuilding it when the 
+        corpus files or the tokenization settings have changed, or if `rebuild`. 
+        Forward (w1 -> w2) and reverse (w2 -> w1) bigram tables are 
+        memory-mapped. 
+        Returns self. 
+        """
+        from common.snapshot import cached_snapshot
+        key = self.corpus_statistics_key()
+        snapshot = cached_snapshot(os.path.join(self.cache_dir, 'brown'), key, 
+            self.build_corpus_statistics, rebuild)
+        return self.use(self._from_snapshot(snapshot), key)
+
+    def build(self):
+        """
+        Count corpus statistics, and build the gloss index and word flags 
+        from scratch, replacing their snapshots. 
+        Returns self. 
+        """
+        self.load(rebuild=True)
+        self._gloss_index = self._load_gloss_index(rebuild=True)
+        self._flags = self._load_flags(rebuild=True)
+        return self
+
+    def load_stream(self, paths, approximate=False, **sketch):
+        """
+        Count unigrams and bigrams of plain-text files, reading them in chunks. 
+        With `approximate`, counts are kept in count-min sketches (see 
+        `common.streaming.SketchCounter` for `sketch` settings), so memory 
+        stays flat for any size of input. Results are cached like the brown 
+        corpus snapshot. 
+        Returns self. 
+        """
+        from common.snapshot import cached_snapshot, fingerprint
+        from common.streaming import count_stream
+        sources = [
+            (os.path.abspath(path), os.path.getsize(path), os.path.getmtime(path))
+            for path in paths
+        ]
+        key = fingerprint(STATISTICS_VERSION, sources, self.tokenization, approximate, sketch)
+        def build():
+            counts = count_stream(paths, approximate, 
+                lowercase=self.tokenization['lowercase'], **sketch)
+            arrays = counts.arrays()
+            arrays['vocabulary'] = counts.vocabulary.words
+            return arrays, {'tokens': int(counts.unigrams.sum())}
+        name = 'stream-' + key[:16]
+        snapshot = cached_snapshot(os.path.join(self.cache_dir, name), key, build)
+        return self.use(self._from_snapshot(snapshot), key, name)
+
+    def _from_snapshot(self, snapshot):
+        from common.counts import Vocabulary, BigramCounts
+        return BigramCounts.from_arrays(Vocabulary(snapshot['vocabulary']), snapshot)
+
+    def use(self, counts, key, name='brown'):
+        """
+        Mine `counts` (bigram counts), whose snapshot has `key`. Snapshots 
+        derived from them are named after `name`. 
+        Returns self. 
+        """
+        self._counts = counts
+        self._flags = None
+        self._context_vectors = None
+        self.key = key
+        self.name = name
+        return self
+
+    # === Resources, created on first use === #
+    @property
+    def counts(self):
+        if self._counts is None:
+            self.load()
+        return self._counts
+
+    @property
+    def vocabulary(self):
+        return self.counts.vocabulary
+
+    @property
+    def freqDist(self):
+        return self.counts.freq_dist()
+
+    @property
+    def stopwords(self):
+        if self._stopwords is None:
+            from nltk.corpus import stopwords
+            self._stopwords = stopwords.words('english')
+        return self._stopwords
+
+    @property
+    def gloss_index(self):
+        """Inverted index of wordnet glosses."""
+        if self._gloss_index is None:
+            self._gloss_index = self._load_gloss_index()
+        return self._gloss_index
+
+    def _load_gloss_index(self, rebuild=False):
+        from nltk.corpus import wordnet as wn
+        from common.gloss_index import GlossIndex
+        return GlossIndex.load(wn, self.cache_dir, rebuild)
+
+    @property
+    def flags(self):
+        """Wordnet pos, stopword and alphabetic bits of every vocabulary id."""
+        if self._flags is None:
+            self._flags = self._load_flags()
+        return self._flags
+
+    def _load_flags(self, rebuild=False):
+        from nltk.corpus import wordnet as wn
+        from common import word_flags
+        counts = self.counts
+        return word_flags.load_word_flags(counts.vocabulary, self.key, wn, 
+            self.stopwords, self.cache_dir, self.name + '-word_flags', rebuild)
+
+    @property
+    def context_vectors(self):
+        """PPMI-weighted left and right context vectors of every vocabulary id."""
+        if self._context_vectors is None:
+            from common.distributional import ppmi_vectors
+            self._context_vectors = ppmi_vectors(self.counts)
+        return self._context_vectors
+
+    # === Pipeline === #
+    def get_adverbs(self, hold_count=PARAMETERS['hold_count'], min_frequency=PARAMETERS['min_frequency'],
+            min_length=PARAMETERS['min_length']):
+        """
+        Process intensity-modifying adverbs, from NLTK wordnet corpus. 
+        Returns list of adverbs. 
+        """
+        gloss_index = self.gloss_index
+        adverbs = []
+        # add lemmas in synset only if definition holds more than `hold_count` keywords.
+        for synset_id in gloss_index.match(KEYWORDS, min_count=hold_count, pos='r'):
+            adverbs.extend(gloss_index.lemma_names(synset_id))
+        
+        # remove more_than_two words adverbs
+        adverbs = [adverb for adverb in adverbs if "_" not in adverb]
+        # remove duplicates, and english stopwords
+        adverbs = list(set(adverbs) - set(self.stopwords))
+        
+        # add additional filter to get most frequent adverbs, and remove short comparatives
+        freqDist = self.freqDist
+        filtered_adverbs = [adverb for adverb in adverbs 
+            if freqDist[adverb] >= min_frequency and len(adverb) >= min_length
+        ]
+        return filtered_adverbs
+
+    def get_pairs(self, adverbs):
+        """
+        From the given adverbs, get words that are utilized most often. 
+        Returns list of pairs element. 
+        [
+            ('v', adverb, ( verb, count ) ), 
+            ('a', adverb, ( adjective, count ) ), 
+            ...
+        ]
+        """
+        import numpy as np
+        from common import word_flags
+        counts, vocabulary, flags = self.counts, self.vocabulary, self.flags
+        pairs = []
+        used = np.zeros(len(vocabulary), dtype=bool) # for diversity in result
+        for adverb in adverbs:
+            # collocation words of adverb
+            indices, frequencies = counts.successors(vocabulary.index(adverb))
+            # filter collocations with following criteria
+            # 1. exclude punctuations / 2. exclude stopwords / ( 3. count ) can be used or not. 
+            word_flag = flags[indices]
+            collocated = (word_flag & (word_flags.ALPHA | word_flags.STOPWORD)) == word_flags.ALPHA
+            collocated &= ~used[indices]
+            used[indices[collocated]] = True
+            # only extract verbs, adjectives
+            is_verb = (word_flag & word_flags.VERB) != 0
+            is_adjective = (word_flag & word_flags.ADJ) != 0
+            for index in np.flatnonzero(collocated & (is_verb | is_adjective)):
+                word, count = vocabulary[indices[index]], int(frequencies[index])
+                if is_verb[index]: 
+                    pairs.append(('v', adverb, (word, count)))
+                if is_adjective[index]: 
+                    pairs.append(('a', adverb, (word, count)))
+        return pairs
+
+    def synonym_lists(self, word, pos):
+        """
+        Lemma names of each synset of `word` with part-of-speech `pos`. 
+        Cached, since the same collocations come up for many parameters. 
+        """
+        if (word, pos) not in self._synonym_lists:
+            from nltk.corpus import wordnet as wn
+            self._synonym_lists[(word, pos)] = [synset.lemma_names() 
+                for synset in wn.synsets(word) 
+                if synset.pos() == pos
+            ]
+        return self._synonym_lists[(word, pos)]
+
+    def get_synsets(self, pairs, min_synonyms=PARAMETERS['min_synonyms']):
+        """
+        From the adverb, collocation_word pairs, find and process synsets. 
+        Return pairs element with synonyms attached. 
+        """
+        synseted = []
+        # iterate verbs, adjectives and find their synonyms
+        for pos, adverb, (word, count) in pairs:
+            synonym_list = [lemma_names
+                for lemma_names in self.synonym_lists(word, pos)
+                if len(lemma_names) >= min_synonyms
+            ]
+            synonym = synonym_list[0] if len(synonym_list) != 0 else []
+            if len(synonym) != 0:
+                elem = (pos, adverb, (word, count), synonym)
+                synseted.append(elem)
+        return synseted
+
+    def get_distributional_synonyms(self, pairs, top_k=5, min_frequency=5):
+        """
+        Propose single-word paraphrases for the word of every pair, by cosine 
+        similarity of context vectors. All pairs are answered with batched 
+        sparse matrix products. Candidates have the part-of-speech of the pair, 
+        and occur at least `min_frequency` times. 
+        Returns list of paraphrase lists, one for each pair, most similar first. 
+        """
+        import numpy as np
+        from common import word_flags
+        from common.distributional import top_k_similar
+        vocabulary, flags = self.vocabulary, self.flags
+        proposed = [[] for _ in pairs]
+        usable = ((flags & (word_flags.ALPHA | word_flags.STOPWORD)) == word_flags.ALPHA) \
+            & (self.counts.unigrams >= min_frequency)
+        for pos, pos_flag in [('v', word_flags.VERB), ('a', word_flags.ADJ)]:
+            index = [i for i, pair in enumerate(pairs) if pair[0] == pos]
+            if not index:
+                continue
+            queries = vocabulary.indices([pairs[i][2][0] for i in index])
+            candidates = np.flatnonzero(usable & ((flags & pos_flag) != 0))
+            ids, _ = top_k_similar(self.context_vectors, queries, candidates, top_k)
+            for i, row in zip(index, ids):
+                proposed[i] = [vocabulary[word_id] for word_id in row if word_id >= 0]
+        return proposed
+
+    def get_candidates(self, pairs, min_synonyms=PARAMETERS['min_synonyms'], top_k=5):
+        """
+        Like `get_synsets`, with distributional paraphrases (see 
+        `get_distributional_synonyms`) added after the wordnet synonyms. 
+        Pairs without wordnet synonyms are kept, if they have paraphrases. 
+        Return pairs element with synonyms attached. 
+        """
+        synonyms = dict(
+            ((pos, adverb, word), synonym)
+            for pos, adverb, (word, _), synonym in self.get_synsets(pairs, min_synonyms)
+        )
+        paraphrases = self.get_distributional_synonyms(pairs, top_k)
+        candidates = []
+        for (pos, adverb, (word, count)), paraphrase in zip(pairs, paraphrases):
+            synonym = list(synonyms.get((pos, adverb, word), []))
+            synonym.extend(e for e in paraphrase if e not in synonym)
+            if len(synonym) != 0:
+                candidates.append((pos, adverb, (word, count), synonym))
+        return candidates
+
+    def score_synonyms(self, adverbs, words, synonyms):
+        """
+        Score every (word, synonym) entry at once. 
+        Each entry is scored as in `evaluate`, 
+            1. lower scores for synonyms sharing consonants with the word. 
+            2. lower scores for synonyms collocating with many adverbs. 
+        The diversity of synonyms is left to `evaluate`. 
+        Returns array of scores.
+        """
+        import numpy as np
+        if len(words) == 0:
+            return np.zeros(0)
+        counts, vocabulary = self.counts, self.vocabulary
+        # lower scores for similar words (to exclude difference in tense)
+        letter_counts = consonant_counts(list(words) + list(synonyms))
+        common_length = np.minimum(
+            letter_counts[:len(words)], letter_counts[len(words):]
+        ).sum(axis=1)
+        score = 1 - (common_length / np.char.str_len(np.array(synonyms, dtype=np.str_)))
+        # lower scores for words that collocate with adverb a lot.
+        # : number of distinct adverbs in front of each synonym, as a product of 
+        #   the reverse bigram table with an adverb indicator vector. 
+        is_adverb = np.zeros(len(vocabulary), dtype=np.int64)
+        adverb_ids = vocabulary.indices(adverbs)
+        is_adverb[adverb_ids[adverb_ids >= 0]] = 1
+        synonym_ids = vocabulary.indices(synonyms)
+        known = synonym_ids >= 0
+        collocation_freq = np.zeros(len(synonyms), dtype=np.int64)
+        collocation_freq[known] = counts.reverse[synonym_ids[known]].sign().dot(is_adverb)
+        return np.where(collocation_freq != 0, score * (1 / (1 + collocation_freq)), score)
+
+    def evaluate(self, adverbs, pairs, diversity=PARAMETERS['diversity'], scores=None):
+        """
+        Evaluate each pairs element. 
+        Find the best matching synonyms with self-evaluated scores. 
+        `scores` are results of `score_synonyms` for flattened pairs, if 
+        they are already computed. 
+        Return pairs to save, with score.
+        [
+            (score, 'v', adverb + verb, best_scored_word), 
+            (score, 'a', adverb + adjective, best_scored_word), 
+            ...
+        ]
+        """
+        import numpy as np
+        if len(pairs) == 0:
+            return []
+        # flatten (word, synonym) entries of all pairs, and score them at once.
+        pair_index, words, synonyms, diversities = flatten_pairs(pairs)
+        if scores is None:
+            scores = self.score_synonyms(adverbs, words, synonyms)
+        # give extra score to diversity of synonym, 
+        # because if is likely to have varied meanings. 
+        scores = scores * (np.asarray(diversities) / diversity)
+
+        # get the best score and scored word of each pair
+        # : ties are broken by the greater synonym, as sorting (score, syn) would.
+        _, synonym_rank = np.unique(np.array(synonyms, dtype=np.str_), return_inverse=True)
+        order = np.lexsort((synonym_rank, scores, pair_index))
+        last = np.flatnonzero(np.diff(np.asarray(pair_index)[order], append=len(pairs)))
+        evaluated = []
+        for entry in order[last]:
+            pos, adverb, (word, _), _ = pairs[pair_index[entry]]
+            elem = (float(scores[entry]), pos, adverb + " " + word, synonyms[entry])
+            evaluated.append(elem)
+
+        # sort the evaluated pairs
+        evaluated = sorted(evaluated)[::-1]
+        return evaluated
+
+    def sweep(self, grid):
+        """
+        Run the pipeline for every combination of parameters in `grid`. 
+        Corpus statistics, word flags and the gloss index are shared by all runs, 
+        and each stage is computed once per distinct value of the parameters it 
+        depends on: 
+            adverbs   <- hold_count, min_frequency, min_length
+            pairs     <- adverbs
+            synseted  <- pairs, min_synonyms
+            scores    <- synseted (diversity only rescales them)
+        `grid` maps names of `PARAMETERS` to lists of values, others are default. 
+        Returns list of (parameters, evaluated pairs), one for each combination.
+        """
+        unknown = set(grid) - set(PARAMETERS)
+        if unknown:
+            raise KeyError("unknown parameters: %s" % ", ".join(sorted(unknown)))
+        names = list(PARAMETERS)
+        values = [grid.get(name, [PARAMETERS[name]]) for name in names]
+        adverbs_cache, pairs_cache, synseted_cache, scores_cache = {}, {}, {}, {}
+        results = []
+        for combination in itertools.product(*values):
+            parameters = dict(zip(names, combination))
+            adverbs_key = (parameters['hold_count'], parameters['min_frequency'], parameters['min_length'])
+            if adverbs_key not in adverbs_cache:
+                adverbs_cache[adverbs_key] = sorted(self.get_adverbs(*adverbs_key))
+            adverbs = adverbs_cache[adverbs_key]
+            pairs_key = tuple(adverbs)
+            if pairs_key not in pairs_cache:
+                pairs_cache[pairs_key] = self.get_pairs(adverbs)
+            synseted_key = (pairs_key, parameters['min_synonyms'])
+            if synseted_key not in synseted_cache:
+                synseted = self.get_synsets(pairs_cache[pairs_key], parameters['min_synonyms'])
+                _, words, synonyms, _ = flatten_pairs(synseted)
+                synseted_cache[synseted_key] = synseted
+                scores_cache[synseted_key] = self.score_synonyms(adverbs, words, synonyms)
+            evaluated = self.evaluate(adverbs, synseted_cache[synseted_key], 
+                parameters['diversity'], scores_cache[synseted_key])
+            results.append((parameters, evaluated))
+        return results
+
+
+def consonant_counts(strings):
     """
-    From the given adverbs, get words that are utilized most often. 
-    Returns list of pairs element. 
-    [
-        ('v', adverb, ( verb, count ) ), 
-        ('a', adverb, ( adjective, count ) ), 
-        ...
-    ]
+    Count letters of each string, except vowels. 
+    Returns matrix of counts, with one row for each string. 
     """
-    pairs = []
-    used_words = [] # for diversity in result
-    for adverb in adverbs:
-        # collocation words of adverb
-        collocations = list(conditionalFreqDist[adverb].items())
-        # filter collocations with following criteria
-        # 1. exclude punctuations / 2. exclude stopwords / ( 3. count ) can be used or not. 
-        collocations = [(word, count) 
-            for word, count in collocations
-            if word.isalpha()
-            if word not in set(stopwords_en)
-        ]
-        # only extract verbs, adjectives
-        for word, count in collocations:
-            if word in used_words: continue
-            part_of_speeches = [synset.pos() for synset in wn.synsets(word)]
-            if 'v' in part_of_speeches: 
-                pairs.append(('v', adverb, (word, count)))
-            if 'a' in part_of_speeches: 
-                pairs.append(('a', adverb, (word, count)))
-            used_words.append(word)
-    return pairs
-
-
-def get_synsets(pairs):
+    import numpy as np
+    strings = np.array(strings, dtype=np.str_)
+    # code points of each string, padded with zeros.
+    codes = strings.view(np.uint32).reshape(len(strings), -1)
+    alphabet, letters = np.unique(codes, return_inverse=True)
+    letters = letters.reshape(codes.shape)
+    rows = np.repeat(np.arange(len(strings)), codes.shape[1])
+    counts = np.bincount(
+        rows * len(alphabet) + letters.ravel(), minlength=len(strings) * len(alphabet)
+    ).reshape(len(strings), len(alphabet))
+    # exclude padding and vowels
+    counts[:, np.isin(alphabet, [0] + [ord(vowel) for vowel in "aeiou"])] = 0
+    return counts
+
+
+def flatten_pairs(pairs):
     """
-    From the adverb, collocation_word pairs, find and process synsets. 
-    Return pairs element with synonyms attached. 
+    Flatten pairs into (word, synonym) entries. 
+    Returns pair index, word, synonym, and number of synonyms of each entry.
     """
-    synseted = []
-    # iterate verbs, adjectives and find their synonyms
-    for pos, adverb, (word, count) in pairs:
-        synsets = wn.synsets(word)
-        synonym_list = [synset.lemma_names()
-            for synset in synsets 
-            if synset.pos() is pos 
-            if len(synset.lemma_names()) >= 4
-        ]
-        synonym = synonym_list[0] if len(synonym_list) != 0 else []
-        if len(synonym) != 0:
-            elem = (pos, adverb, (word, count), synonym)
-            synseted.append(elem)
-    return synseted
+    pair_index, words, synonyms, diversities = [], [], [], []
+    for index, (pos, adverb, (word, _), synonym) in enumerate(pairs):
+        for syn in synonym:
+            pair_index.append(index)
+            words.append(word)
+            synonyms.append(syn)
+            diversities.append(len(synonym))
+    return pair_index, words, synonyms, diversities
 
 
-def evaluate(adverbs, pairs):
+def print_sweep(results, top=3):
     """
-    Evaluate each pairs element. 
-    Find the best matching synonyms with self-evaluated scores. 
-    Return pairs to save, with score.
-    [
-        (score, 'v', adverb + verb, best_scored_word), 
-        (score, 'a', adverb + adjective, best_scored_word), 
-        ...
-    ]
+    Print a table of sweep results, one row for each combination of parameters.
     """
-    evaluated = []
-    for pos, adverb, (word, _), synonym in pairs:
-        # list to contain scores of each synonym
-        scored_synonym = [(0, syn) for syn in synonym]
-        for index, (score, syn) in enumerate(scored_synonym):
-            # lower scores for similar words (to exclude difference in tense)
-            word_letters = list(word)
-            for letter in syn:
-                if letter not in "aeiou" and letter in word_letters:
-                    word_letters.remove(letter)
-            common_length = len(word) - len(word_letters)
-            score = 1 - (common_length / len(syn))
-            # lower scores for words that collocate with adverb a lot.
-            collocation_freq = 0
-            for collocation, _ in oppositeConditionalFreqDist[syn].items():
-                if collocation in adverbs: collocation_freq += 1
-            if collocation_freq != 0:
-                score *= 1 / (1 + collocation_freq)
-            # give extra score to diversity of synonym, 
-            # because if is likely to have varied meanings. 
-            score *= len(synonym) / 28
-            # save score
-            scored_synonym[index] = (score, syn)
-        # get the best score and scored word
-        score, best_scored_word = sorted(scored_synonym)[::-1][0]
-        elem = (score, pos, adverb + " " + word, best_scored_word)
-        evaluated.append(elem)
-    
-    # sort the evaluated pairs
-    evaluated = sorted(evaluated)[::-1]
-    return evaluated
+    names = list(PARAMETERS)
+    print(" | ".join(names + ["pairs", "best pairs"]))
+    for parameters, evaluated in results:
+        best = ", ".join("%s/%s" % (collocation, word) 
+            for _, _, collocation, word in evaluated[:top])
+        row = [str(parameters[name]) for name in names] + [str(len(evaluated)), best]
+        print(" | ".join(row))
 
 
 def save(pairs):
@@ -167,24 +530,73 @@ def save(pairs):
     print("=> %5.2f%% are verbs" % (num_verbs / len(pairs)))
 
 
+def sweep_assignment(assignment):
+    """
+    Parse 'NAME=VALUES' of `--sweep`, ex. 'diversity=20,28.5'. 
+    NAME must be one of `PARAMETERS`, and VALUES of the type of its default: 
+    integers for the counts, numbers for `diversity`. 
+    Returns (name, list of values).
+    """
+    name, _, values = assignment.partition('=')
+    if name not in PARAMETERS:
+        raise argparse.ArgumentTypeError("invalid choice: %r (choose from %s)" % (
+            name, ', '.join(sorted(PARAMETERS))))
+    try:
+        return name, [type(PARAMETERS[name])(value) for value in values.split(',')]
+    except ValueError:
+        raise argparse.ArgumentTypeError("invalid values for %s: %r" % (name, values))
+
+
 # Main function of word processing algorithm. 
-def main():
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Find intensity-modifying pairs.")
+    parser.add_argument('--stream', nargs='+', metavar='FILE',
+        help="mine plain-text files, read in chunks, instead of the brown corpus")
+    parser.add_argument('--approximate', action='store_true',
+        help="with --stream, count in bounded memory with count-min sketches")
+    parser.add_argument('--sketch-bits', type=int, default=22,
+        help="log2 of counters per sketch row (default: 22)")
+    parser.add_argument('--sketch-depth', type=int, default=4,
+        help="rows per sketch (default: 4)")
+    parser.add_argument('--heavy-hitters', type=int, default=200000,
+        help="words and bigrams tracked by name (default: 200000)")
+    parser.add_argument('--distributional', type=int, default=0, metavar='K',
+        help="add K distributional paraphrases to the wordnet synonyms of each pair")
+    parser.add_argument('--sweep', nargs='+', metavar='NAME=VALUES', type=sweep_assignment,
+        help="print results for a grid of parameters instead, ex. hold_count=1,2 diversity=20,28.5; "
+            "NAME is one of %s, and diversity takes decimals" % ', '.join(sorted(PARAMETERS)))
+    args = parser.parse_args(argv)
+    miner = IntensityPairMiner()
+    if args.stream:
+        sketch = dict(
+            bits=args.sketch_bits, depth=args.sketch_depth, heavy_hitters=args.heavy_hitters
+        ) if args.approximate else {}
+        miner.load_stream(args.stream, args.approximate, **sketch)
+    else:
+        miner.load()
+    if args.sweep:
+        print_sweep(miner.sweep(dict(args.sweep)))
+        return
+
     # extract adverbs list with seed 'highly' and 'very'
-    adverbs = get_adverbs()
+    adverbs = miner.get_adverbs()
     # print
     print("(ADVERBS) Total %d extracted: " % len(adverbs))
     print(', '.join(sorted(adverbs)))
 
     # get adverb, and word pairs, and synsets
-    pairs = get_pairs(adverbs)
-    synseted_pairs = get_synsets(pairs)
+    pairs = miner.get_pairs(adverbs)
+    if args.distributional:
+        synseted_pairs = miner.get_candidates(pairs, top_k=args.distributional)
+    else:
+        synseted_pairs = miner.get_synsets(pairs)
     # print
     print("(SYNONYMS) Total %d pairs: " % len(synseted_pairs))
     pprint.pprint(synseted_pairs[:20])
     print("\b, ...]")
 
     # evaluate processed word pairs
-    evaluated_pairs = evaluate(adverbs, synseted_pairs)
+    evaluated_pairs = miner.evaluate(adverbs, synseted_pairs)
     # print
     random.shuffle(evaluated_pairs)
     print("(EVALUATED) Total %d pairs: " % len(evaluated_pairs))
@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Startup-time benchmark of `IntensityPairMiner`. 
+Each case runs in a fresh interpreter, so nothing is shared between runs: 
+    1. cold import: importing the module only. 
+    2. warm load: import, then load every resource from existing snapshots. 
+    3. full build: import, then count and build every resource from scratch. 
+
+    $ python benchmark_startup.py --repeat 5
+"""
+
+import argparse, os, shutil, statistics, subprocess, sys, tempfile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Timed code of each case. Prints elapsed seconds.
+CASES = [
+    ('cold import', """
+import CS372_HW1_code_20170305 as hw1
+"""),
+    ('warm load', """
+import CS372_HW1_code_20170305 as hw1
+miner = hw1.IntensityPairMiner(cache_dir=CACHE_DIR).load()
+miner.gloss_index, miner.flags, miner.stopwords
+"""),
+    ('full build', """
+import CS372_HW1_code_20170305 as hw1
+miner = hw1.IntensityPairMiner(cache_dir=CACHE_DIR).build()
+miner.stopwords
+"""),
+]
+
+TEMPLATE = """
+import sys, time
+sys.path.insert(0, %(here)r)
+CACHE_DIR = %(cache_dir)r
+start = time.perf_counter()
+%(code)s
+print(time.perf_counter() - start)
+"""
+
+
+def run(code, cache_dir):
+    """
+    Run `code` in a fresh interpreter. 
+    Returns elapsed seconds it reports. 
+    """
+    script = TEMPLATE % {'here': HERE, 'cache_dir': cache_dir, 'code': code}
+    output = subprocess.check_output([sys.executable, '-c', script], cwd=HERE)
+    return float(output.decode().strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark HW1 startup time.")
+    parser.add_argument('--repeat', type=int, default=3, help="runs of each case (default: 3)")
+    args = parser.parse_args()
+
+    # Builds go to a scratch cache, which the warm loads then read. 
+    cache_dir = tempfile.mkdtemp(prefix='hw1-cache-')
+    try:
+        results = dict()
+        # 'full build' first, so that 'warm load' finds its snapshots.
+        for name, code in CASES[::-1]:
+            results[name] = [run(code, cache_dir) for _ in range(args.repeat)]
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    print("%-12s %10s %10s %10s" % ("case", "median", "min", "max"))
+    for name, _ in CASES:
+        times = results[name]
+        print("%-12s %9.3fs %9.3fs %9.3fs" % (name, statistics.median(times), min(times), max(times)))
+
+
+if __name__ == "__main__":
+    main()
@@ -4,29 +4,126 @@
 import nltk
 from nltk.corpus import wordnet as wn
 from nltk.corpus import brown, stopwords
-from collections import defaultdict
 import random, pprint
+import argparse, functools, heapq, itertools, multiprocessing, os, sys
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from common.snapshot import cached_snapshot, fingerprint
+from common.gloss_index import GlossIndex
+from common.counts import Vocabulary, split_tagged_key, tagged_key
+from common.intensifiers import IntensifierIndex
+from common.definition_intensity import DefinitionIntensity
+from common.association import MEASURES, association_scores
+from common.tag_filter import UNIVERSAL_TAGS, TagPairFilter
+from common.adjacency import AdjacencyIndex
+from common.suffix_array import MAX_N, NgramIndex
+from common.tagged_store import TaggedStore
+from common.profiler import profile_sentences, read_tagged_files
+from common.sharding import pool_context
+from common.score_cache import ScoreCache
+from common.incremental import IncrementalCounts
+
+# Persisted indexes are kept next to this script.
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache')
+# Columnar tagged corpora, shared with the other homeworks.
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'cache')
+# Processes building the gloss intensity table and scoring collocations. 
+# None uses every core, 1 works in this process. Results are the same either way.
+PROCESSES = None
+# Part-of-speech pair rules of scheme 1. 
+TAG_RULES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tag_rules.json')
+# Bump when the way intensifiers are selected changes.
+LEXICON_VERSION = 1
+# Keywords that are likely to be in intensity-modifying words. 
+KEYWORDS = ['extent', 'intensifier', 'intensity', 'quantifier', 'degree', 'comparative']
 
 # ============================================================== #
 # ====================== Global Variables ====================== #
 # ============================================================== #
 
-# Brown text corpora
-stopwords_en = stopwords.words('english')
-tagged_words = brown.tagged_words(tagset="universal")
-tagged_bigrams = [
-    ((word1.lower(), tag1), (word2.lower(), tag2))
-    for (word1, tag1), (word2, tag2) in nltk.bigrams(tagged_words)
-    # Filter out punctuations and bigrams with it.
-    if not (tag1 == '.' or tag2 == '.')
-]
-
-# NLTK frequency distribution.
-freqDist = nltk.FreqDist(tagged_bigrams)
-conditionalFreqDist = nltk.ConditionalFreqDist(tagged_bigrams)
-oppositeConditionalFreqDist = nltk.ConditionalFreqDist(
-    (back, front) for front, back in tagged_bigrams
-)
+@functools.lru_cache(maxsize=None)
+def load_tagged_store():
+    """
+    Returns TaggedStore of universal-tagged brown corpus, converted on first use.
+    """
+    return TaggedStore.load(brown, CORPUS_DIR, 'brown')
+
+@functools.lru_cache(maxsize=None)
+def load_count_tables():
+    """
+    Returns IncrementalCounts of the tagged bigrams of brown corpus, plus 
+    the documents ingested since, see `ingest_documents`. 
+    The tables are counted on first use, and persisted. 
+    """
+    store = load_tagged_store()
+    return IncrementalCounts.load(os.path.join(CACHE_DIR, 'tagged_counts'),
+        fingerprint(store.key, 'lowercase', '.'), store.tagged_bigram_counts)
+
+@functools.lru_cache(maxsize=None)
+def get_bigram_counts():
+    """
+    Count lowercased, universal-tagged bigrams of brown corpus, and of 
+    the ingested documents. Bigrams with punctuations are filtered out. 
+    Returns BigramCounts over 'word/TAG' keys, as a sparse matrix.
+    """
+    return load_count_tables().counts
+
+@functools.lru_cache(maxsize=None)
+def get_vocabulary_columns():
+    """
+    Split the 'word/TAG' vocabulary of the tagged bigram counts. 
+    Returns numpy arrays of words and tags, indexed by word id.
+    """
+    keys = [split_tagged_key(str(key)) for key in get_bigram_counts().vocabulary.words]
+    words = np.array([word for word, tag in keys], dtype=np.str_)
+    tags = np.array([tag for word, tag in keys], dtype=np.str_)
+    return words, tags
+
+@functools.lru_cache(maxsize=None)
+def get_adjacency_index():
+    """
+    Returns AdjacencyIndex of the tagged bigram counts, with left and 
+    right neighbors of each tagged word sorted by frequency.
+    """
+    return AdjacencyIndex(get_bigram_counts())
+
+@functools.lru_cache(maxsize=None)
+def get_ngram_index():
+    """
+    Returns NgramIndex over the tagged word ids of brown corpus, for 
+    n-grams up to MAX_N. Punctuations are boundaries, as for bigrams. 
+    The suffix arrays are built on first use, and persisted. 
+    Its ids index its own vocabulary, the tagged words of brown corpus, 
+    which ingested documents do not change; see `get_frequent_ngrams`. 
+    """
+    store = load_tagged_store()
+    vocabulary, ids = store.tagged_key_ids()
+    ids = np.where(store.kept(), ids, -1)
+    return NgramIndex.load(ids, [store.key, 'lowercase', '.'], CACHE_DIR, vocabulary=vocabulary)
+
+@functools.lru_cache(maxsize=None)
+def load_tag_filter(path):
+    """
+    Returns TagPairFilter compiled from the rule file at `path`.
+    """
+    return TagPairFilter.load(path)
+
+@functools.lru_cache(maxsize=None)
+def get_stopwords():
+    """
+    Returns tuple of english stopwords, read from NLTK on first use. 
+    """
+    return tuple(stopwords.words('english'))
+
+@functools.lru_cache(maxsize=None)
+def get_content_mask():
+    """
+    Returns boolean numpy array indexed by word id, True for alphabetic 
+    words which are not stopwords. 
+    """
+    words, tags = get_vocabulary_columns()
+    return np.char.isalpha(words) & ~np.isin(words, list(get_stopwords()))
 
 # Intensifiers from NLTK wordnet. 
 def get_intensifiers():
@@ -37,8 +134,6 @@ def get_intensifiers():
         (intensifier, universal_tag), ...
     ]
     """
-    # keywords that are likely to be in intensity-modifying words. 
-    keywords = ['extent', 'intensifier', 'intensity', 'quantifier', 'degree', 'comparative']
     intensifiers = []
     # Mapping dictionary from synset pos to universal tag.
     wnpos_to_universal = {
@@ -48,15 +143,13 @@ def get_intensifiers():
         'n': 'NOUN',
         'v': 'VERB'
     }
-    # Iterate synsets.
-    for synset in list(wn.all_synsets()):
-        # for each synset definition, check for intensity modifying keywords
-        for keyword in keywords:
-            if keyword in synset.definition():
-                intensifiers.extend([
-                    (lemma, wnpos_to_universal[synset.pos()])
-                    for lemma in synset.lemma_names()
-                ])
+    # Synsets whose definition holds any of intensity modifying keywords.
+    gloss_index = GlossIndex.load(wn, CACHE_DIR)
+    for synset_id in gloss_index.match(KEYWORDS):
+        intensifiers.extend([
+            (lemma, wnpos_to_universal[gloss_index.pos(synset_id)])
+            for lemma in gloss_index.lemma_names(synset_id)
+        ])
     # remove more_than_two words intensifiers, and proper nouns. 
     intensifiers = [ (intensifier, universal_tag)
         for (intensifier, universal_tag) in intensifiers
@@ -66,19 +159,52 @@ def get_intensifiers():
     intensifiers = list(set(intensifiers))
     intensifiers = [ (intensifier, universal_tag)
         for (intensifier, universal_tag) in intensifiers
-        if intensifier not in stopwords_en
+        if intensifier not in get_stopwords()
     ]
     return intensifiers
 
-intensifiers = get_intensifiers()
-# Printing intensifiers
-print("\nPrinting Example Intensifiers..")
-print(random.sample(intensifiers, 10), end="\b, ...]\n")
-print("searching for ['pitch', 'dead', 'deathly', 'stark'] ..")
-intensifier_words = [ word for word, tag in intensifiers ]
-print(" =>", [ e in intensifier_words 
-    for e in ['pitch', 'dead', 'deathly', 'stark']
-]) # //=> [True, True, True, True]
+@functools.lru_cache(maxsize=None)
+def load_intensifiers():
+    """
+    Load intensifiers from the persisted lexicon. The lexicon is built by 
+    `get_intensifiers` on first use, and rebuilt when the wordnet version, 
+    the keywords or the stopwords change. 
+    Returns IntensifierIndex of intensifiers with universal tag.
+    """
+    key = fingerprint(LEXICON_VERSION, wn.get_version(), KEYWORDS, sorted(get_stopwords()))
+    def build():
+        intensifiers = sorted(get_intensifiers())
+        arrays = {
+            'words': np.array([word for word, tag in intensifiers], dtype=np.str_),
+            'tags': np.array([tag for word, tag in intensifiers], dtype=np.str_),
+        }
+        return arrays, {'wordnet': wn.get_version(), 'keywords': KEYWORDS}
+    lexicon = cached_snapshot(os.path.join(CACHE_DIR, 'intensifiers'), key, build)
+    return IntensifierIndex(lexicon['words'], lexicon['tags'])
+
+@functools.lru_cache(maxsize=None)
+def load_definition_intensity():
+    """
+    Load gloss intensities of all wordnet lemmas, counted with the 
+    intensifier lexicon. The table is built in `PROCESSES` processes on 
+    first use, and rebuilt when the lexicon changes. 
+    Returns DefinitionIntensity, mapping word to its gloss intensity.
+    """
+    intensifiers = load_intensifiers()
+    return DefinitionIntensity.load(wn, intensifiers.words.tolist(),
+        nltk.word_tokenize, CACHE_DIR, PROCESSES)
+
+
+def print_intensifiers(intensifiers):
+    """
+    Print examples of intensifiers, and check for the known ones.
+    """
+    print("\nPrinting Example Intensifiers..")
+    print(random.sample(list(intensifiers), 10), end="\b, ...]\n")
+    print("searching for ['pitch', 'dead', 'deathly', 'stark'] ..")
+    print(" =>", [ e in intensifiers 
+        for e in ['pitch', 'dead', 'deathly', 'stark']
+    ]) # //=> [True, True, True, True]
 
 # ============================================================== #
 
@@ -86,12 +212,11 @@ def print_tags():
     """
     Print words for each universal part-of-speech tag. 
     For designing purposes of this project, shows 5 examples each.
+    See `python -m common.profiler` for token, type and transition counts.
     """
-    # For each element, keys are tags, and values are corresponding
-    # sets containing words of each tag. 
-    tags = defaultdict(set)
-    for word, tag in tagged_words:
-        tags[tag].add(word)
+    # One pass over the corpus, keeping token counts, and a uniform 
+    # sample of distinct words for each tag. 
+    profile = profile_sentences(load_tagged_store().sentences(), seed=random.randrange(1 << 32))
     # Dictionary for matching abbreviation
     abbr_to_full = {
         '.': 'Punctuation',     # 문장부호
@@ -108,12 +233,12 @@ def print_tags():
         'X': 'Unknown',         # 분류 없음
     }
     # Print words.
-    print("\n=== %d Universal Tags ===" % len(tags))
-    keys = sorted(tags.keys())
+    print("\n=== %d Universal Tags ===" % len(profile.tags()))
+    keys = profile.tags()
     print(": {" + ", ".join(keys) + "}")
     for i, key in enumerate(keys):
         print("%d. %s (%s):" % (i+1, abbr_to_full[key], key), end=" ")
-        print(random.sample(tags[key], 5), end="\b, ... ]\n")
+        print(profile.samples(key, 5), end="\b, ... ]\n")
 
 
 # ============================================================== #
@@ -121,103 +246,118 @@ def print_tags():
 # ============================================================== #
 
 # === Scheme 1 ================================================= #
-def get_collocations():
+def get_collocations(rules_path=None, n=2):
     """
     Process collocation_list directly from frequency distribution of bigrams
     in NLTK brown corpus. For each collocation bigram, remove those that contain 
     part-of-speech which obviously do not restrict the meaning of other word.
-    Returns list of collocation pairs. 
+    The part-of-speech rules are read from `rules_path` (default TAG_RULES), 
+    and compiled into a tag-pair allow-matrix. 
+    With `n` above 2, n-grams are taken from the n-gram index instead, and 
+    every two adjacent words of them are filtered as a bigram. 
+    Returns list of collocation pairs (n-tuples for n-grams). 
     [
         ((word, pos), (word, pos)), ...
     ]
     """
+    words, tags = get_vocabulary_columns()
+    tag_filter = load_tag_filter(rules_path or TAG_RULES)
     # The term 'collocation' refers to frequent occurrence of phrase 
-    # of words that go together. It will be restricted to bigrams here.
-    frequentBigrams = [ tagged_bigram
-        for tagged_bigram in list(freqDist)
-        if freqDist[tagged_bigram] >= 5
-    ]
+    # of words that go together. It will be restricted to n-grams here.
+    grams = get_frequent_ngrams(n, 5)
     # Exclude stopwords, and all non-alphabeticals (ex. 'CS372').
-    collocation_list = [ ((word1, tag1), (word2, tag2))
-        for (word1, tag1), (word2, tag2) in frequentBigrams
-        if word1.isalpha() and word2.isalpha()
-        if not word1 in stopwords_en
-        if not word2 in stopwords_en
-    ]
+    is_kept = get_content_mask()
+    grams = grams[is_kept[grams].all(axis=1)]
     # Add pos filters. 
-    collocation_list = [
-        ((word1, tag1), (word2, tag2))
-        for (word1, tag1), (word2, tag2) in collocation_list
-
-        # Remove adpositions (prepositions + postpositions), and unknown
-        # pos tag words, predeterminers, conjunctions, and pronouns. 
-        # ex. (ADP) 'looked like', 'door behind', (X) 'et al', 'deja vue', 
-        #     (PRT) "'all' the time", "'both' our children"
-        #     (CONJ) 'yet even', (PRON) 'reminds us'
-        if not (tag1 == 'ADP' or tag2 == 'ADP')
-        if not (tag1 == 'PRT' or tag2 == 'PRT')
-        if not (tag1 == 'X' or tag2 == 'X')
-        if not (tag1 == 'CONJ' or tag2 == 'CONJ')
-        if not (tag1 == 'PRON' or tag2 == 'PRON')
-
-        # Above is for any existence of ADP, PRT, X, CONJ, PRON. 
-        # Below removes occurences of any combinations of pos tags, that do
-        # nothing to restrict or that only restrict the meaning but do not intensify.
-        # 
-        #  - Possible pos left: ADJ, ADV, DET, NOUN, NUM, VERB. 
-        #  - No restrictions of tag1 == 'ADV' will be given. 
-        #  - Inspect all 30 combinations..
-        # Case: _, 'ADJ' (ex. 'nothing less', 'made possible', 'one last')
-        if not (tag1 in ['DET', 'NOUN', 'NUM', 'VERB'] and tag2 == 'ADJ')
-        # Case: _, 'ADV'
-        if not (tag1 in ['ADJ', 'DET', 'NOUN', 'NUM'] and tag2 == 'ADV')
-        # Case: _, 'DET' (ex. 'one another')
-        if not (tag1 in ['ADJ', 'DET', 'NOUN', 'NUM', 'VERB'] and tag2 == 'DET')
-        # Case: _, 'NOUN' (ex. 'every day', 'dissolved oxygen', 'stock market')
-        if not (tag1 in ['DET', 'NOUN', 'VERB'] and tag2 == 'NOUN')
-        # Case: _, 'NUM' (ex. 'first one', 'two hundred')
-        if not (tag1 == 'NUM' and word1 not in ['thousand', 'million'])
-        if not (tag2 == 'NUM')
-        # Case: _, 'VERB' (ex. 'girl said', 'would happen', 'one could')
-        if not (tag1 in ['ADJ', 'DET', 'NOUN', 'NUM', 'VERB'] and tag2 == 'VERB')
+    # Remove adpositions (prepositions + postpositions), and unknown
+    # pos tag words, predeterminers, conjunctions, and pronouns. 
+    # ex. (ADP) 'looked like', 'door behind', (X) 'et al', 'deja vue', 
+    #     (PRT) "'all' the time", "'both' our children"
+    #     (CONJ) 'yet even', (PRON) 'reminds us'
+    # Then remove combinations of pos tags, that do nothing to restrict 
+    # or that only restrict the meaning but do not intensify. 
+    #  - Possible pos left: ADJ, ADV, DET, NOUN, NUM, VERB. 
+    #  - No restrictions of tag1 == 'ADV' will be given. 
+    #  ex. _, 'ADJ': 'nothing less', 'made possible', 'one last'
+    #      _, 'DET': 'one another'
+    #      _, 'NOUN': 'every day', 'dissolved oxygen', 'stock market'
+    #      _, 'NUM': 'first one', 'two hundred'
+    #      _, 'VERB': 'girl said', 'would happen', 'one could'
+    tag_ids = tag_filter.tag_ids(tags.tolist())
+    mask = np.ones(len(grams), dtype=bool)
+    for j in range(n - 1):
+        fronts, backs = grams[:, j], grams[:, j + 1]
+        mask &= tag_filter.mask(tag_ids[fronts], tag_ids[backs], words[fronts], words[backs])
+    return decode_ngrams(grams[mask])
+
+
+def get_frequent_ngrams(n, min_count):
+    """
+    Tagged n-grams occurring at least `min_count` times. Bigrams come from 
+    the bigram counts, longer n-grams from the n-gram index. 
+    Returns numpy array of word ids of the bigram counts, one row per n-gram.
+    """
+    counts = get_bigram_counts()
+    if n == 2:
+        bigrams = counts.forward.tocoo()
+        mask = bigrams.data >= min_count
+        return np.stack([bigrams.row[mask], bigrams.col[mask]], axis=1)
+    index = get_ngram_index()
+    grams, freqs = index.ngrams(n, min_count)
+    # New words of ingested documents shift the ids of the counts, 
+    # so the ids of the index are mapped by key. 
+    return counts.vocabulary.indices(index.vocabulary.words)[grams]
+
+
+def decode_ngrams(grams):
+    """
+    Returns list of tuples of (word, tag), for rows of word ids.
+    """
+    words, tags = get_vocabulary_columns()
+    words, tags = words.tolist(), tags.tolist()
+    return [
+        tuple((words[index], tags[index]) for index in gram)
+        for gram in grams.tolist()
     ]
-    return collocation_list
 
 
 # === Scheme 2 ================================================= #
-def get_collocations2(intensifiers):
+def get_collocations2(intensifiers, n=2):
     """
     Process collocations_list from given intensifiers with bigrams. 
-    Returns list of collocation pairs. 
+    With `n` above 2, n-grams starting or ending with an intensifier are 
+    taken from the n-gram index instead. 
+    Returns list of collocation pairs (n-tuples for n-grams). 
     [
         ((word, pos), (word, pos)), ...
     ]
     """
-    # Initialize collocation_list and frequency_barrier
-    collocation_list = []
+    counts = get_bigram_counts()
+    # Initialize frequency_barrier
     frequency_barrier = 3
     # Filter out short comparatives. 
     intensifiers = [(intensifier, tag) for (intensifier, tag) in intensifiers if len(intensifier) >= 6]
-    for intensifier, tag in intensifiers:
-        # Use intensifiers at front or at back. 
-        upright_collocating_pairs = [ ((intensifier, tag), tagged_word)
-            for tagged_word, freq in list(conditionalFreqDist[(intensifier, tag)].items())
-            if freq >= frequency_barrier
-        ]
-        reversed_collocating_pairs = [ (tagged_word, (intensifier, tag))
-            for tagged_word, freq in list(oppositeConditionalFreqDist[(intensifier, tag)].items())
-            if freq >= frequency_barrier
-        ]
-        collocation_list.extend(upright_collocating_pairs)
-        collocation_list.extend(reversed_collocating_pairs)
+    ids = counts.vocabulary.indices([tagged_key(word, tag) for word, tag in intensifiers])
+    ids = ids[ids >= 0]
+    if n == 2:
+        # Use intensifiers at front or at back, with all their neighbors 
+        # above the barrier found in one batched query each way. 
+        adjacency = get_adjacency_index()
+        fronts, backs, _ = adjacency.right(ids, frequency_barrier)
+        reversed_backs, reversed_fronts, _ = adjacency.left(ids, frequency_barrier)
+        grams = np.stack([
+            np.concatenate([fronts, reversed_fronts]),
+            np.concatenate([backs, reversed_backs]),
+        ], axis=1)
+    else:
+        grams = get_frequent_ngrams(n, frequency_barrier)
+        grams = grams[np.isin(grams[:, 0], ids) | np.isin(grams[:, -1], ids)]
     # Exclude stopwords, and all non-alphabeticals (ex. 'CS372').
-    collocation_list = [ ((word1, tag1), (word2, tag2))
-        for (word1, tag1), (word2, tag2) in collocation_list
-        if word1.isalpha() and word2.isalpha()
-        if not word1 in stopwords_en
-        if not word2 in stopwords_en
-    ]
-    collocation_list = list(set(collocation_list))
+    is_kept = get_content_mask()
+    grams = grams[is_kept[grams].all(axis=1)]
+    # remove duplicates
+    grams = np.unique(grams, axis=0) if len(grams) else grams
+    collocation_list = decode_ngrams(grams)
     return collocation_list
 
 # ============================================================== #
@@ -227,90 +367,296 @@ def get_collocations2(intensifiers):
 # ========================= Evaluation ========================= #
 # ============================================================== #
 
+def collocation_ids(collocation_list):
+    """
+    Word ids of both words of each pair, in the tagged bigram counts. 
+    Returns numpy arrays of front ids and back ids, -1 for unseen words.
+    """
+    counts = get_bigram_counts()
+    keys = [tagged_key(word, tag) for pair in collocation_list for word, tag in pair]
+    ids = counts.vocabulary.indices(keys).reshape(-1, 2)
+    return ids[:, 0], ids[:, 1]
+
+
+def restrictivity_scores(collocation_list):
+    """
+    Calculate the likelihood of occurence of word1, before word2 and 
+    occurence of word2, after word1, for all pairs at once. 
+    Row and column totals of the bigram matrix are computed once. 
+    Returns numpy array of restrictivity scores, aligned with collocation_list.
+    """
+    return restrictivity_id_scores(*collocation_ids(collocation_list))
+
+
+def restrictivity_id_scores(fronts, backs):
+    """
+    Restrictivity scores of pairs given as word ids of the tagged bigram 
+    counts, -1 for unseen words, see `restrictivity_scores`. 
+    Returns numpy array of restrictivity scores.
+    """
+    counts = get_bigram_counts()
+    known = (fronts >= 0) & (backs >= 0)
+    freq = np.zeros(len(fronts))
+    freq[known] = counts.pair_counts(fronts[known], backs[known])
+    # Measure 1: add scores for frequent bigrams
+    _max = counts.forward.data.max() if counts.forward.nnz else 1
+    # Measure 2: calculate upright, and reversed restrictivity; 
+    # the share of bigrams starting with word1 that end with word2, and 
+    # the share of bigrams ending with word2 that start with word1. 
+    following, preceding = counts.bigram_totals()
+    totals = np.zeros((len(fronts), 2))
+    totals[fronts >= 0, 0] = following[fronts[fronts >= 0]]
+    totals[backs >= 0, 1] = preceding[backs[backs >= 0]]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        restrictivity = np.where(totals > 0, freq[:, None] / totals, 0)
+    upright_restrictivity, reversed_restrictivity = restrictivity[:, 0], restrictivity[:, 1]
+    return (freq / _max) * (upright_restrictivity * reversed_restrictivity)
+
+
 def add_restrictivity_score(element):
     """
-    Calculate the likelihood of occurence of word1, before word2 or 
-    occurence of word2, after word1 based on the mode. 
+    Restrictivity of a single pair, see `restrictivity_scores`. 
     Returns element with restrictivity score. 
     """
-    front, back = element
-    # Measure 1: add scores for frequent bigrams
-    _max = 9717 # => max([f for e, f in freqDist.items()])
-    restrictivity_score = freqDist[element] / _max
-    # Measure 2: calculate upright, and reversed restrictivity. 
-    def get_restrictivity(word1, word2, mode="upright"):
-        """
-        Default mode is "upright", and set to "reversed" if it is using
-        oppositeConditionalFreqDist. 
-        Return the restrictivity score.
-        """
-        is_upright = mode == "upright"
-        cfd = conditionalFreqDist[word1] if is_upright \
-                else oppositeConditionalFreqDist[word2]
-        total = sum([freq for word, freq in list(cfd.items())])
-        if total == 0: return 0
-        # multiplied by 100 to prevent rounding error.
-        return (cfd[word2] / total) if is_upright \
-                else (cfd[word1] / total)
-    # Return with restrictivity_score.
-    upright_restrictivity = get_restrictivity(front, back)
-    reversed_restrictivity = get_restrictivity(front, back, "reversed")
-    restrictivity_score *= upright_restrictivity * reversed_restrictivity
-    return restrictivity_score, (front, back)
-
-
-def add_intensity_score(element):
+    return float(restrictivity_scores([element])[0]), element
+
+
+def add_intensity_score(element, members=None):
     """
     If the pair in element contains intensity-modifying words, 
     adds higher score for intensity. 
+    `members` tells whether word1 and word2 are intensifiers, and is 
+    looked up in the intensifier index if not given. 
     Returns element with intensity score. 
     """
     restrictivity_score, ((word1, tag1), \
         (word2, tag2)) = element
+    intensifiers = load_intensifiers()
+    if members is None:
+        members = [intensifiers.has_form(word1), intensifiers.has_form(word2)]
     # Measure 1: add scores for existence of intensifiers.
     intensity_score = 1
-    for word in [word1, word2]:
-        if word in intensifiers:
+    for is_intensifier in members:
+        if is_intensifier:
             intensity_score *= 2
     # Measure 2: use synset definitions for additionals.
-    def get_definition_intensity(word):
-        definitions = [synset.definition() for synset in wn.synsets(word)]
-        counts = [1] * len(definitions) # list to store counts for each definitions. 
-        for index, definition in enumerate(definitions):
-            count = 1 # Initialize
-            tokens = nltk.word_tokenize(definition)
-            for token in tokens:
-                if token in intensifiers: count += 1
-            counts[index] = count
-        return max(counts) if not len(counts) == 0 else 1
-    intensity_score *= get_definition_intensity(word1)
-    intensity_score *= get_definition_intensity(word2)
+    # For each synset of a word, 1 + number of intensifiers in its 
+    # definition; the largest one is precomputed for every lemma. 
+    definition_intensity = load_definition_intensity()
+    intensity_score *= definition_intensity[word1]
+    intensity_score *= definition_intensity[word2]
     return restrictivity_score, intensity_score, \
         ((word1, tag1), (word2, tag2))
 
 
-def evaluate(collocation_list):
+def score_collocations(collocation_list, measure=None):
+    """
+    Score each collocation pairs, see `evaluate`. 
+    Return list of (score, (word1, word2)), in the order of collocation_list.
+    """
+    if measure is not None:
+        scores = association_scores(get_bigram_counts(), 
+            *collocation_ids(collocation_list), measures=[measure])[measure]
+        return [
+            (score, (word1, word2))
+            for score, ((word1, tag1), (word2, tag2)) in zip(scores.tolist(), collocation_list)
+        ]
+    # Restrictivity Score, for all pairs in one vectorized pass.
+    result = zip(restrictivity_scores(collocation_list).tolist(), collocation_list)
+    # Intensity Score, with intensifier membership of every word 
+    # looked up in one pass over the ids of the pairs. 
+    words = [word for pair in collocation_list for word, tag in pair]
+    vocabulary, ids = Vocabulary.from_tokens(words)
+    members = load_intensifiers().contains_ids(ids, vocabulary).reshape(-1, 2)
+    result = map(add_intensity_score, result, members.tolist())
+    # Calculate overall score.
+    return [
+        (restrictivity_score * intensity_score, (word1, word2))
+        for restrictivity_score, intensity_score, \
+            ((word1, tag1), (word2, tag2)) in result
+    ]
+
+
+# Candidates of the running parallel `evaluate`. Pool workers receive them 
+# once when they start, and read the count tables their parent loaded, 
+# so batches are sent as index ranges only. 
+_candidates = []
+
+def _set_candidates(collocation_list):
+    global _candidates
+    _candidates = collocation_list
+
+def _score_range(bounds, measure=None):
+    """
+    Pool worker: scores of `_candidates[start:end]`, in order.
+    """
+    start, end = bounds
+    return [score for score, pair in score_collocations(_candidates[start:end], measure)]
+
+def _score_batch(bounds, measure=None, top=None):
+    """
+    Pool worker: score `_candidates[start:end]`, and keep the local top.
+    Return list of (score, (word1, word2)), best first.
+    """
+    start, end = bounds
+    result = sorted(score_collocations(_candidates[start:end], measure))[::-1]
+    return result[:top] if top else result
+
+
+def _load_shared_tables(measure):
+    """
+    Load the tables scoring reads, before a pool starts, so workers inherit them.
+    """
+    get_bigram_counts()
+    if measure is None:
+        load_intensifiers()
+        load_definition_intensity()
+
+
+def _batches(collocation_list, batch_size):
+    """
+    Return list of (start, end) index ranges of `batch_size` pairs, 
+    covering collocation_list in order. 
+    """
+    return [
+        (start, min(start + batch_size, len(collocation_list)))
+        for start in range(0, len(collocation_list), batch_size)
+    ]
+
+def _map_batches(worker, collocation_list, measure, processes, batch_size):
+    """
+    Run `worker` on every batch of collocation_list in a pool of `processes`
+    processes (None uses every core). 
+    Return list of worker results, in the order of the batches, or None if 
+    the pairs are better scored in this process: with one process, a 
+    single batch, or inside a pool worker already. 
+    """
+    processes = processes or os.cpu_count() or 1
+    if processes == 1 or len(collocation_list) <= batch_size \
+            or multiprocessing.current_process().name != 'MainProcess':
+        return None
+    _load_shared_tables(measure)
+    with pool_context().Pool(processes, _set_candidates, (collocation_list,)) as pool:
+        return pool.map(worker, _batches(collocation_list, batch_size), chunksize=1)
+
+
+def score_pairs(collocation_list, measure=None, processes=1, batch_size=20000):
+    """
+    Scores of collocation pairs, in the order of collocation_list. 
+    Batches of `batch_size` pairs are scored across `processes` processes.
+    Return list of scores.
+    """
+    results = _map_batches(functools.partial(_score_range, measure=measure), 
+        collocation_list, measure, processes, batch_size)
+    if results is None:
+        return [score for score, pair in score_collocations(collocation_list, measure)]
+    return [score for result in results for score in result]
+
+
+# ScoreCache of each measure, see `get_score_cache`.
+_score_caches = dict()
+
+def get_score_cache(measure=None):
+    """
+    Returns ScoreCache of tagged bigram scores under `measure`, shared by 
+    all schemes during this run.
+    """
+    return _score_caches.setdefault(measure, ScoreCache())
+
+
+def ingest_documents(documents):
+    """
+    Add the counts of new documents, each a list of sentences of 
+    (word, universal tag), to the persisted count tables. 
+    Only the changes are applied: bigram counts and marginals are 
+    incremented where the documents touch them. Cached scores of pairs 
+    whose counts or marginals changed are forgotten, so `evaluate` with 
+    the cache re-scores those pairs only. 
+    Restrictivity is divided by the largest bigram count, and association 
+    measures depend on the number of all bigrams; when those change, every 
+    pair is re-scored. 
+    The n-gram index still covers brown corpus only. 
+    Raises ValueError, before anything is counted, if a token is not 
+    tagged with a universal tag. 
+    Returns CountChanges.
+    """
+    documents = [[list(sentence) for sentence in document] for document in documents]
+    unknown = [
+        tagged_key(word, tag)
+        for document in documents for sentence in document for word, tag in sentence
+        if tag not in UNIVERSAL_TAGS
+    ]
+    if unknown:
+        raise ValueError("%d tokens without a universal tag, ex. %s (tags are %s)" % (
+            len(unknown), ', '.join(unknown[:5]), ', '.join(UNIVERSAL_TAGS)))
+    tables = load_count_tables()
+    changes = tables.add_documents(documents)
+    tables.save()
+    for accessor in [get_bigram_counts, get_vocabulary_columns, get_adjacency_index, get_content_mask]:
+        accessor.cache_clear()
+    before, after = changes.top
+    for measure, cache in _score_caches.items():
+        if measure is not None or before != after:
+            if changes.bigrams:
+                cache.clear()
+            continue
+        cache.discard([
+            pair for pair in cache.scores
+            if changes.affects(tagged_key(*pair[0]), tagged_key(*pair[1]))
+        ])
+    return changes
+
+
+def evaluate(collocation_list, measure=None, processes=1, top=None, batch_size=20000, cache=None):
     """
     Evaluate each collocation pairs. 
     Find the best restrictive and intensity-modifying pairs with self-evaluated scores.
     We provide two measures: 
         1. 'restrictivity' / 2. 'intensity'
-    Return collocation pair, bind with score in tuple.
+    If `measure` is given, pairs are ranked by that association measure
+    instead, one of 'pmi', 'npmi', 'llr', 't', 'chi2', 'dice'. 
+    With `processes` other than 1, batches of `batch_size` pairs are scored 
+    in a process pool (None uses every core), each keeping its own `top` 
+    pairs, and merged. The ranking is the same for any number of processes.
+    With a ScoreCache `cache`, pairs scored before are not scored again, 
+    and the new scores are added to it. Every score is then needed for the 
+    cache, so batches return all of theirs, and the `top` pairs are picked 
+    from the merged scores with a heap.
+    Return collocation pair, bind with score in tuple, `top` best ones if given.
     [
         (restrictivity_score * intensity_score, (word1, word2)), 
         ...
     ]
     """
-    # Restrictivity Score
-    result = map(add_restrictivity_score, collocation_list)
-    # Intensity Score
-    result = map(add_intensity_score, result)
-    # Calculate overall score.
-    result = [
-        (restrictivity_score * intensity_score, (word1, word2))
-        for restrictivity_score, intensity_score, \
-            ((word1, tag1), (word2, tag2)) in result
-    ]
+    if cache is not None:
+        scores = cache.get_many(collocation_list, 
+            lambda missing: score_pairs(missing, measure, processes, batch_size))
+        result = [
+            (score, (word1, word2))
+            for score, ((word1, tag1), (word2, tag2)) in zip(scores, collocation_list)
+        ]
+        return heapq.nlargest(top, result) if top else sorted(result)[::-1]
+    results = _map_batches(functools.partial(_score_batch, measure=measure, top=top), 
+        collocation_list, measure, processes, batch_size)
+    if results is None:
+        result = sorted(score_collocations(collocation_list, measure))[::-1]
+        return result[:top] if top else result
+    # every local top is sorted best first, and ties are broken by the pair
+    result = heapq.merge(*results, reverse=True)
+    return list(itertools.islice(result, top) if top else result)
+
+
+def rank_ngrams(collocation_list):
+    """
+    Rank n-grams of more than two words by their frequency, counted 
+    in the n-gram index. 
+    Return list of (frequency, (word1, word2, ...)), most frequent first.
+    """
+    index = get_ngram_index()
+    result = []
+    for gram in collocation_list:
+        ids = index.vocabulary.indices([tagged_key(word, tag) for word, tag in gram])
+        result.append((index.count(ids.tolist()), tuple(word for word, tag in gram)))
     return sorted(result)[::-1]
 
 # ============================================================== #
@@ -321,30 +667,75 @@ def save(result):
     Save output as a csv file.
     """
     file = open('CS372_HW2_output_20170305.csv', 'w')
-    for idx, (_, (word1, word2)) in enumerate(result):
+    for idx, (_, words) in enumerate(result):
         index = "(%d)" % (idx + 1)
-        file.write(",".join([index, word1, word2]) + "\n")
+        file.write(",".join([index] + list(words)) + "\n")
     file.close()
 
 
 # Main function for word processing algorithm. 
-def main():
+def main(argv=None):
     """
     For this assignment, collocation lists will be processed in 
     two different ways of schemes.
     """
+    parser = argparse.ArgumentParser(description="Find restrictive, intensity-modifying collocations.")
+    parser.add_argument('--measure', choices=sorted(MEASURES),
+        help="rank by an association measure instead of restrictivity and intensity")
+    parser.add_argument('--tag-rules', metavar='FILE', default=TAG_RULES,
+        help="json file of part-of-speech pair rules for scheme 1 (default: tag_rules.json)")
+    parser.add_argument('--processes', type=int, default=PROCESSES,
+        help="processes scoring collocations (default: every core)")
+    parser.add_argument('--n', type=int, default=2, choices=range(2, MAX_N + 1),
+        help="words per collocation; above 2, n-grams are ranked by frequency (default: 2)")
+    parser.add_argument('--ingest', nargs='+', metavar='FILE',
+        help="add universal-tagged text files, one sentence of 'word/TAG' tokens per line, "
+            "to the count tables first; each file is one document")
+    args = parser.parse_args(argv)
+
+    # add new documents to the persisted counts
+    if args.ingest:
+        try:
+            changes = ingest_documents([read_tagged_files([path]) for path in args.ingest])
+        except ValueError as error:
+            parser.error("--ingest: %s" % error)
+        print("Ingested %d documents: %d bigrams, %d new words" % (
+            len(args.ingest), changes.bigrams, changes.new_words))
+
     # print universal tags
     print_tags()
 
+    # Intensifiers from the persisted lexicon
+    intensifiers = load_intensifiers()
+    print_intensifiers(intensifiers)
+
     # Process collocation list
     print("\nRunning 'intensity', 'restrictivity' schemes..")
-    collocation_list1 = get_collocations()
-    collocation_list2 = get_collocations2(intensifiers)
+    collocation_list1 = get_collocations(args.tag_rules, args.n)
+    collocation_list2 = get_collocations2(intensifiers, args.n)
+
+    if args.n > 2:
+        result1 = rank_ngrams(collocation_list1)[:50]
+        seen = set(result1)
+        result2 = [e for e in rank_ngrams(collocation_list2) if e not in seen][:50]
+        print("\n=== Results ===")
+        pprint.pprint(result1 + result2)
+        save(result1 + result2)
+        return
 
     # evaluate processed collocation list 
+    # Both schemes go through one score cache, so pairs found by both 
+    # are scored once. 
     print("Evaluating collocation_lists..")
-    result1 = evaluate(collocation_list1)[:50]
-    result2 = [e for e in evaluate(collocation_list2) if e not in result1][:50]
+    cache = get_score_cache(args.measure)
+    result1 = evaluate(collocation_list1, args.measure, args.processes, top=50, cache=cache)
+    # at most 50 of the best 100 are in result1 already
+    seen = set(result1)
+    result2 = [e for e in evaluate(collocation_list2, args.measure, args.processes, top=100, cache=cache)
+        if e not in seen][:50]
+    stats = cache.stats()
+    print("Score cache: %d hits, %d misses (%.1f%% hit rate)" % (
+        stats['hits'], stats['misses'], 100 * stats['hit_rate']))
     
     print("\n=== Results ===")
     result = result1 + result2
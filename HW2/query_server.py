@@ -0,0 +1,346 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Local query server over the HW2 collocation tables.
+The bigram counts, their marginals, the adjacency index and the intensifier
+lexicon are loaded once, from the persisted snapshots, and every query is
+then answered from memory:
+    1. neighbors: words next to a word, most frequent first.
+    2. collocates: neighbors of a word, ranked by score.
+    3. score: scores of word pairs, as `evaluate` computes them.
+
+    $ python query_server.py --port 8372
+    $ curl -s localhost:8372/query -d '{"op": "collocates", "word": "stark", "tag": "ADJ"}'
+    $ curl -s localhost:8372/query -d '{"queries": [
+        {"op": "score", "pairs": [["pitch", "black"]]},
+        {"op": "neighbors", "word": "black/ADJ", "side": "left", "top": 5}]}'
+
+A request holds one query, or a batch of them under "queries"; the
+response holds one result, or "results" in the order of the queries.
+Words are lowercased. A word without a tag ('pitch', or "tag" left out)
+stands for its most frequent tag, and a pair without tags for its most
+frequent tagging. A query that fails gets {"error": message} as its
+result, without failing the rest of its batch.
+"""
+
+import argparse, json, os, sys, time
+import numpy as np
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+
+import CS372_HW2_code_20170305 as hw2
+from common.association import MEASURES, association_scores
+from common.counts import split_tagged_key, tagged_key
+
+# Port of the server, 'CS372'.
+PORT = 8372
+# Neighbors and collocates returned when a query does not say.
+TOP = 10
+
+
+class CollocationService(object):
+    """
+    Answers collocation queries from tables loaded once.
+    Queries are dictionaries with an "op" and its arguments, see `query`.
+    """
+
+    def __init__(self):
+        self.counts = hw2.get_bigram_counts()
+        self.vocabulary = self.counts.vocabulary
+        self.adjacency = hw2.get_adjacency_index()
+        self.words, self.tags = hw2.get_vocabulary_columns()
+        self.content = hw2.get_content_mask()
+        self.intensifiers = hw2.load_intensifiers()
+        # intensity factor of each word id, see `intensity`; 0 until needed
+        self.intensity_factors = np.zeros(len(self.vocabulary), dtype=np.int64)
+        # loaded now, so the first score query does not wait for them
+        hw2.load_definition_intensity()
+        self.counts.bigram_totals()
+        self.operations = {
+            'neighbors': self.neighbors,
+            'collocates': self.collocates,
+            'score': self.score,
+        }
+
+    # === Lookups ================================================== #
+    def tagged_ids(self, word):
+        """
+        Ids of every tagged form of `word`, most frequent first.
+        """
+        prefix = word + '/'
+        # keys starting with 'word/' sort between 'word/' and 'word0'
+        start = int(np.searchsorted(self.vocabulary.words, prefix))
+        end = int(np.searchsorted(self.vocabulary.words, word + '0'))
+        # 'word/TAG' only: tags never hold '/', longer words might
+        ids = np.array([
+            index for index in range(start, end)
+            if '/' not in self.vocabulary[index][len(prefix):]
+        ], dtype=np.int64)
+        return ids[np.argsort(-self.counts.unigrams[ids], kind='stable')]
+
+    def resolve(self, word, tag=None):
+        """
+        Id of a tagged word. `word` may be 'word/TAG' itself; without a tag,
+        the most frequent tagged form is taken.
+        Raises KeyError if the word was never seen.
+        """
+        word = word.lower()
+        if tag is None and '/' in word:
+            word, tag = split_tagged_key(word)
+        if tag is not None:
+            tag = tag.upper()
+            index = self.vocabulary.index(tagged_key(word, tag))
+            if index < 0:
+                raise KeyError("unknown word %s" % tagged_key(word, tag))
+            return index
+        ids = self.tagged_ids(word)
+        if len(ids) == 0:
+            raise KeyError("unknown word %s" % word)
+        return int(ids[0])
+
+    def resolve_pair(self, pair):
+        """
+        Ids of both words of `pair`, each 'word', 'word/TAG' or [word, tag].
+        Untagged words take the tags of their most frequent bigram.
+        """
+        candidates = []
+        for item in pair:
+            if isinstance(item, (list, tuple)):
+                candidates.append(np.array([self.resolve(*item)]))
+            elif '/' in item:
+                candidates.append(np.array([self.resolve(item)]))
+            else:
+                candidates.append(self.tagged_ids(item.lower()))
+                if len(candidates[-1]) == 0:
+                    raise KeyError("unknown word %s" % item.lower())
+        fronts, backs = [ids.ravel() for ids in np.meshgrid(*candidates, indexing='ij')]
+        best = int(np.argmax(self.counts.pair_counts(fronts, backs)))
+        return int(fronts[best]), int(backs[best])
+
+    def key(self, index):
+        return [str(self.words[index]), str(self.tags[index])]
+
+    def lookup(self, side):
+        """
+        Adjacency lookup of neighbors on `side`, 'left' or 'right'.
+        """
+        if side not in ('left', 'right'):
+            raise ValueError("side must be 'left' or 'right', not %r" % (side,))
+        return self.adjacency.left if side == 'left' else self.adjacency.right
+
+    def intensity(self, ids):
+        """
+        Intensity factor of each word id: 2 for intensifiers, 1 otherwise, 
+        times the gloss intensity of the word. The intensity score of a 
+        pair, as `hw2.add_intensity_score` computes it, is the product of 
+        the factors of its words. Each factor is computed once. 
+        Returns numpy array of factors.
+        """
+        ids = np.asarray(ids, dtype=np.int64)
+        missing = np.unique(ids[self.intensity_factors[ids] == 0])
+        if len(missing):
+            definition_intensity = hw2.load_definition_intensity()
+            self.intensity_factors[missing] = [
+                (2 if self.intensifiers.has_form(word) else 1) * definition_intensity[word]
+                for word in self.words[missing].tolist()
+            ]
+        return self.intensity_factors[ids]
+
+    def pair_scores(self, fronts, backs, measure=None):
+        """
+        Scores of id pairs, as `hw2.evaluate` ranks them under `measure`, 
+        all in one vectorized pass. 
+        Returns numpy array of scores.
+        """
+        if measure is not None:
+            return association_scores(self.counts, fronts, backs, measures=[measure])[measure]
+        return hw2.restrictivity_id_scores(fronts, backs) * (self.intensity(fronts) * self.intensity(backs))
+
+    # === Operations =============================================== #
+    def neighbors(self, word, tag=None, side='right', top=TOP, min_count=1):
+        """
+        Words following (side 'right') or preceding (side 'left') a word,
+        at least `min_count` times, most frequent first.
+        """
+        lookup = self.lookup(side)
+        index = self.resolve(word, tag)
+        sources, neighbors, counts = lookup([index], min_count)
+        return {
+            'word': self.key(index),
+            'neighbors': [
+                {'word': self.key(neighbor), 'count': count}
+                for neighbor, count in zip(neighbors[:top].tolist(), counts[:top].tolist())
+            ],
+        }
+
+    def collocates(self, word, tag=None, side='right', top=TOP, min_count=1, measure=None, content=True):
+        """
+        Neighbors of a word on `side`, at least `min_count` times, ranked by
+        `measure` (restrictivity and intensity by default). With `content`,
+        only alphabetic words which are not stopwords.
+        """
+        if measure is not None and measure not in MEASURES:
+            raise ValueError("unknown measure %s" % measure)
+        lookup = self.lookup(side)
+        index = self.resolve(word, tag)
+        sources, neighbors, counts = lookup([index], min_count)
+        if content:
+            keep = self.content[neighbors]
+            neighbors, counts = neighbors[keep], counts[keep]
+        if side == 'left':
+            fronts, backs = neighbors, np.full(len(neighbors), index)
+        else:
+            fronts, backs = np.full(len(neighbors), index), neighbors
+        scores = self.pair_scores(fronts, backs, measure)
+        order = np.lexsort((neighbors, -scores))[:top]
+        return {
+            'word': self.key(index),
+            'collocates': [
+                {'word': self.key(neighbor), 'count': count, 'score': score}
+                for neighbor, count, score in zip(neighbors[order].tolist(),
+                    counts[order].tolist(), scores[order].tolist())
+            ],
+        }
+
+    def score(self, pairs, measure=None):
+        """
+        Scores of word pairs, with bigram counts and restrictivity.
+        Every pair is scored in one batch.
+        """
+        if measure is not None and measure not in MEASURES:
+            raise ValueError("unknown measure %s" % measure)
+        ids = np.array([self.resolve_pair(pair) for pair in pairs], dtype=np.int64).reshape(-1, 2)
+        fronts, backs = ids[:, 0], ids[:, 1]
+        keys = [(tuple(self.key(front)), tuple(self.key(back)))
+            for front, back in zip(fronts.tolist(), backs.tolist())]
+        scores = self.pair_scores(fronts, backs, measure)
+        restrictivity = hw2.restrictivity_id_scores(fronts, backs)
+        counts = self.counts.pair_counts(fronts, backs)
+        return {
+            'scores': [
+                {
+                    'pair': [list(front), list(back)],
+                    'count': count,
+                    'restrictivity': restrictivity_score,
+                    'intensifiers': [self.intensifiers.has_form(front[0]), self.intensifiers.has_form(back[0])],
+                    'score': score,
+                }
+                for (front, back), count, restrictivity_score, score
+                in zip(keys, counts.tolist(), restrictivity.tolist(), scores.tolist())
+            ],
+        }
+
+    def query(self, request):
+        """
+        Answer one query, {"op": name, argument: value, ...}, or a batch,
+        {"queries": [query, ...]}.
+        Returns result dictionary, {"results": [result, ...]} for a batch.
+        A batch that is not a list, or a query that is not an object, gets
+        an error result.
+        """
+        if 'queries' in request:
+            queries = request['queries']
+            if not isinstance(queries, list):
+                return {'error': "queries must be a list of query objects"}
+            return {'results': [
+                self.query(query) if isinstance(query, dict)
+                else {'error': "expected a query object, not %s" % json.dumps(query)}
+                for query in queries
+            ]}
+        arguments = dict(request)
+        operation = self.operations.get(arguments.pop('op', None))
+        if operation is None:
+            return {'error': "unknown op, choose from %s" % ', '.join(sorted(self.operations))}
+        try:
+            return operation(**arguments)
+        except (KeyError, ValueError, TypeError) as error:
+            return {'error': str(error.args[0]) if error.args else repr(error)}
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+    """
+    POST /query with a json query or batch. GET /health checks the server.
+    Connections are kept alive, so a client pays the handshake once.
+    """
+    protocol_version = 'HTTP/1.1'
+    # headers and body are written separately; do not let the body wait
+    # for the client to acknowledge the headers
+    disable_nagle_algorithm = True
+    verbose = False
+
+    def reply(self, status, body):
+        data = json.dumps(body).encode('utf8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == '/health':
+            self.reply(200, {'words': len(self.server.service.vocabulary),
+                'bigrams': int(self.server.service.counts.forward.nnz)})
+        else:
+            self.reply(404, {'error': "not found"})
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length)
+        if self.path != '/query':
+            self.reply(404, {'error': "not found"})
+            return
+        try:
+            request = json.loads(body.decode('utf8'))
+        except ValueError as error:
+            self.reply(400, {'error': "invalid json: %s" % error})
+            return
+        if not isinstance(request, dict):
+            self.reply(400, {'error': "expected a json object"})
+            return
+        if not isinstance(request.get('queries', []), list):
+            self.reply(400, {'error': "queries must be a list of query objects"})
+            return
+        self.reply(200, self.server.service.query(request))
+
+    def log_message(self, format, *args):
+        if self.verbose:
+            BaseHTTPRequestHandler.log_message(self, format, *args)
+
+
+def make_server(service, host='127.0.0.1', port=PORT, verbose=False):
+    """
+    Returns ThreadingHTTPServer answering queries with `service`.
+    Port 0 picks a free port, see `server.server_address`.
+    """
+    handler = type('Handler', (QueryHandler,), {'verbose': verbose})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.service = service
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve HW2 collocation queries over local HTTP.")
+    parser.add_argument('--host', default='127.0.0.1', help="address to listen on (default: 127.0.0.1)")
+    parser.add_argument('--port', type=int, default=PORT, help="port to listen on (default: %d)" % PORT)
+    parser.add_argument('--verbose', action='store_true', help="log every request")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    service = CollocationService()
+    print("Loaded %d words, %d bigrams in %.2fs" % (
+        len(service.vocabulary), service.counts.forward.nnz, time.perf_counter() - start))
+    server = make_server(service, args.host, args.port, args.verbose)
+    print("Serving on http://%s:%d/query" % server.server_address[:2])
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -7,35 +7,57 @@ from nltk.corpus import wordnet as wn
 from nltk.corpus import brown, cmudict, stopwords
 from nltk.stem import WordNetLemmatizer
 # Network
-from urllib import request
+from urllib import parse, request
 from urllib.error import HTTPError
 from bs4 import BeautifulSoup
 # Misc
-import time, os
+import argparse, functools, os, sys
 from collections import defaultdict
 from pprint import pprint
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from common.tagged_store import TaggedStore
+from common.crawler import Checkpoint, crawl
+
+# Columnar tagged corpora, shared with the other homeworks.
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'cache')
+# Online dictionary that heteronym candidates are looked up in.
+LEXICO_URL = "https://www.lexico.com/en/definition/"
+# Limits of the heteronym crawl, see `common.crawler.crawl`. 
+# The dictionary answers 429 (Too Many Requests) when pressed; those 
+# requests are retried after backing off. 
+CRAWL = {
+    'concurrency': 4,   # requests in flight
+    'rate': 2.,         # requests per second, retries included
+    'retries': 5,       # retries of a word after 429, 5xx or network errors
+}
+# Seconds to wait for a response.
+TIMEOUT = 30
+
 
 # Globals
 heteronym_keys = []
 heteronyms = dict()
 stopwords_en = stopwords.words('english')
 cdict = cmudict.dict()
-tagged_sentences = brown.tagged_sents(tagset="universal")
 n = WordNetLemmatizer()
 
 
-def get_heteronyms():
+def get_heteronyms(file_name='heteronyms.txt', url=LEXICO_URL, **settings):
     """Get heteronym list.
 
     If `heteronyms.txt` exists, parse it and return. 
-    Else, build heteronym list.
+    Else, build heteronym list by crawling, see `crawl_heteronym_entries`.
+
+    Args:
+        file_name (String): heteronym list.
+        url (String): dictionary to look candidates up in.
+        settings: overrides of `CRAWL`.
 
     Updates:
         heteronyms (Dictionary)
         heteronym_keys (List)
     """
-    file_name = 'heteronyms.txt'
     if not os.path.isfile(file_name):
         # Candidate for heteronyms
         candidates = [ word
@@ -47,15 +69,11 @@ def get_heteronyms():
         ]
 
         # Web crawling
-        file = open(file_name, "a")
-        for idx, word in enumerate(candidates):
-            entry = get_heteronym_entry(word)
+        entries = crawl_heteronym_entries(candidates, file_name, url, **settings)
+        for word in candidates:
             # Insert to dictionary
-            if entry:
-                file.write("".join([word, ": ", str(entry), "\n"]))
-                heteronyms[word] = entry
-            time.sleep(1) # HTTPError code 429: Too Many Requests
-        file.close()
+            if entries.get(word):
+                heteronyms[word] = entries[word]
     else:
         heteronym_file = open(file_name, 'r')
         lines = [
@@ -93,11 +111,56 @@ def get_heteronyms():
     heteronym_keys.extend(list(heteronyms.keys()))
 
 
-def get_heteronym_entry(word):
+def crawl_heteronym_entries(candidates, file_name='heteronyms.txt', url=LEXICO_URL, **settings):
+    """Look every candidate up, concurrently and rate-limited.
+
+    Every word looked up is recorded in `<file_name>.checkpoint` right 
+    away, so an interrupted crawl resumes where it stopped. Once every 
+    candidate is done, heteronyms are written to `file_name` in candidate 
+    order, and the checkpoint is removed. Words that kept failing are 
+    reported instead, and are retried by the next run.
+
+    Args:
+        candidates (List): candidate words for heteronyms.
+        file_name (String): heteronym list to write.
+        url (String): dictionary to look candidates up in.
+        settings: overrides of `CRAWL`.
+
+    Returns:
+        entries (Dictionary): word -> heteronym entry, of words looked up, 
+            see `get_heteronym_entry`.
+    """
+    checkpoint = Checkpoint(file_name + '.checkpoint')
+    results, stats = crawl(candidates, functools.partial(get_heteronym_entry, url=url),
+        checkpoint, **dict(CRAWL, **settings))
+    print("Looked up %d words, %d resumed from checkpoint, %d retries" % (
+        stats.done, stats.resumed, stats.retries))
+    # json turns tuples into lists
+    entries = dict(
+        (word, [(pron, [tuple(meaning) for meaning in meanings]) for pron, meanings in entry])
+        for word, entry in results.items()
+    )
+    if stats.failed:
+        print("%d words failed, and are retried on the next run:" % len(stats.failed))
+        pprint(sorted(stats.failed.items())[:10])
+        return entries
+
+    temporary = file_name + '.tmp'
+    with open(temporary, 'w') as file:
+        for word in candidates:
+            if entries.get(word):
+                file.write("".join([word, ": ", str(entries[word]), "\n"]))
+    os.replace(temporary, file_name)
+    checkpoint.remove()
+    return entries
+
+
+def get_heteronym_entry(word, url=LEXICO_URL):
     """Web crawler to verify heteronym.
 
     Args:
         word (String): candidate `word` for heteronym. 
+        url (String): dictionary to look `word` up in.
     
     Returns:
         results (List): Build heteronym entry. List of pronounciations dictionary, 
@@ -116,19 +179,30 @@ def get_heteronym_entry(word):
             ]
 
     Raises:
-        Exception: HTTPError except 404. 
-        AttributeError: No required attribute for word in web.
+        HTTPError: except 404. 
+        URLError: the dictionary could not be reached.
     """
     # urllib
-    url = "https://www.lexico.com/en/definition/"
     try:
-        page = request.urlopen(url + word)
+        with request.urlopen(url + parse.quote(word), timeout=TIMEOUT) as page:
+            html = page.read().decode('utf8')
     except HTTPError as e:
         if e.code == 404:
             return []
-        raise Exception
-    html = page.read().decode('utf8')
+        raise
+    return parse_heteronym_entry(html)
+
+
+def parse_heteronym_entry(html):
+    """Build heteronym entry from a dictionary page, see `get_heteronym_entry`.
 
+    Args:
+        html (String): dictionary page of a word.
+
+    Returns:
+        results (List): heteronym entry, or empty list if the word 
+            is not a heteronym, or the page is not as expected.
+    """
     # beautifulsoup
     soup = BeautifulSoup(html, 'html.parser')
     homographs = soup.find_all(class_="entryGroup")
@@ -189,11 +263,21 @@ def get_heteronym_entry(word):
     except AttributeError:
         return []
 
-    # close and return entry
-    page.close()
     return list(result.items())
 
 
+def load_tagged_store():
+    """Load universal-tagged brown sentences from the columnar store.
+
+    The store is converted from the corpus on first use, and is shared
+    with HW2, so later runs map it instead of parsing the corpus.
+
+    Returns:
+        store (TaggedStore): `store.sentences()` yields lists of (word, tag).
+    """
+    return TaggedStore.load(brown, CORPUS_DIR, 'brown')
+
+
 def search_heteronyms():
     """Find and evaluate heteronyms for all sentences. 
 
@@ -204,7 +288,7 @@ def search_heteronyms():
         ]
     """
     answer = []
-    for sentence in tagged_sentences:
+    for sentence in load_tagged_store().sentences():
         score, result = evaluate(sentence)
         if score != 0:
             result.insert(1, "Brown")
@@ -352,9 +436,17 @@ def save(answer):
 
 
 # Main function for word processing algorithm. 
-def main():
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Find sentences with heteronyms in brown corpus.")
+    parser.add_argument('--url', default=LEXICO_URL, help="dictionary to look heteronyms up in")
+    parser.add_argument('--concurrency', type=int, default=CRAWL['concurrency'],
+        help="dictionary requests in flight (default: %d)" % CRAWL['concurrency'])
+    parser.add_argument('--rate', type=float, default=CRAWL['rate'],
+        help="dictionary requests per second (default: %g)" % CRAWL['rate'])
+    args = parser.parse_args(argv)
+
     # Build heteronym list
-    get_heteronyms()
+    get_heteronyms(url=args.url, concurrency=args.concurrency, rate=args.rate)
 
     # Find sentences with heteronyms
     answer = search_heteronyms()
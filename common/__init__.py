@@ -0,0 +1 @@
+"""Shared corpus-statistics helpers used by the homework scripts."""
@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Left and right neighbors of every word, sorted by bigram frequency.
+
+Each row of the bigram matrix (and of its transpose) is reordered by
+decreasing count. Entries are also keyed by `row * (top + 1) + (top - count)`
+(`top` being the largest count), which is ascending over the whole array,
+so the neighbors of any number of words above any thresholds are found
+with one `numpy.searchsorted` call.
+"""
+
+import numpy as np
+
+
+class _SortedRows(object):
+    """CSR rows with entries in decreasing count order."""
+
+    def __init__(self, matrix):
+        self.indptr = np.asarray(matrix.indptr, dtype=np.int64)
+        rows = np.repeat(np.arange(len(self.indptr) - 1, dtype=np.int64), np.diff(self.indptr))
+        counts = np.asarray(matrix.data, dtype=np.int64)
+        order = np.lexsort((matrix.indices, -counts, rows))
+        self.neighbors = np.asarray(matrix.indices)[order]
+        self.counts = counts[order]
+        self.top = int(self.counts.max()) if len(self.counts) else 0
+        self.keys = rows * (self.top + 1) + (self.top - self.counts)
+
+    def query(self, ids, min_counts):
+        """Entries of rows `ids` with count at least `min_counts`.
+
+        Returns:
+            sources, neighbors, counts (numpy.ndarray): one item per entry,
+                grouped by query in order of `ids`, each group by
+                decreasing count.
+        """
+        ids = np.asarray(ids, dtype=np.int64)
+        # a threshold above every count selects nothing, one below 1 selects all
+        thresholds = np.clip(np.broadcast_to(min_counts, ids.shape), 0, self.top + 1)
+        starts = self.indptr[ids]
+        ends = np.searchsorted(self.keys, ids * (self.top + 1) + (self.top - thresholds), side='right')
+        ends = np.maximum(np.minimum(ends, self.indptr[ids + 1]), starts)
+        lengths = ends - starts
+        # positions start..end-1 of every query, concatenated
+        offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+        positions = np.arange(int(lengths.sum()), dtype=np.int64) + offsets
+        return np.repeat(ids, lengths), self.neighbors[positions], self.counts[positions]
+
+
+class AdjacencyIndex(object):
+    """Bidirectional, frequency-sorted adjacency lists of a `BigramCounts`.
+
+    Attributes:
+        vocabulary (Vocabulary)
+    """
+
+    def __init__(self, counts):
+        self.vocabulary = counts.vocabulary
+        self._right = _SortedRows(counts.forward)
+        self._left = _SortedRows(counts.reverse)
+
+    def right(self, ids, min_count=1):
+        """Words following `ids` at least `min_count` times, see `_SortedRows.query`."""
+        return self._right.query(ids, min_count)
+
+    def left(self, ids, min_count=1):
+        """Words preceding `ids` at least `min_count` times, see `_SortedRows.query`."""
+        return self._left.query(ids, min_count)
@@ -0,0 +1,142 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Vectorized association measures over bigram contingency tables.
+
+For a bigram (w1, w2) out of N bigrams, the contingency table is
+
+             w2      not w2
+    w1      o11       o12
+    not w1  o21       o22
+
+and every measure below maps arrays of these cells to an array of scores,
+following the definitions of `nltk.metrics.BigramAssocMeasures`. All
+candidate bigrams are scored together, so the cost is a handful of array
+operations regardless of how many candidates there are.
+"""
+
+import numpy as np
+
+
+def contingency(counts, fronts, backs):
+    """Contingency cells of the bigrams `(fronts[i], backs[i])`.
+
+    Args:
+        counts (BigramCounts): bigram counts.
+        fronts, backs (numpy.ndarray): word ids. Unknown ids (-1) get
+            empty marginals.
+
+    Returns:
+        o11, o12, o21, o22 (numpy.ndarray): float arrays, one cell per bigram.
+    """
+    fronts = np.asarray(fronts, dtype=np.int64)
+    backs = np.asarray(backs, dtype=np.int64)
+    known = (fronts >= 0) & (backs >= 0)
+    o11 = np.zeros(len(fronts))
+    o11[known] = counts.pair_counts(fronts[known], backs[known])
+    following, preceding = counts.bigram_totals()
+    first = np.zeros(len(fronts))
+    first[fronts >= 0] = following[fronts[fronts >= 0]]
+    second = np.zeros(len(backs))
+    second[backs >= 0] = preceding[backs[backs >= 0]]
+    total = float(counts.forward.data.sum())
+    o12 = first - o11
+    o21 = second - o11
+    o22 = total - o11 - o12 - o21
+    return o11, o12, o21, o22
+
+
+def _expected(o11, o12, o21, o22):
+    """Expected cells under independence, in the order of the observed ones."""
+    total = o11 + o12 + o21 + o22
+    rows = (o11 + o12, o21 + o22)
+    columns = (o11 + o21, o12 + o22)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return [
+            rows[row] * columns[column] / total
+            for row in (0, 1) for column in (0, 1)
+        ]
+
+
+def _divide(numerator, denominator):
+    """`numerator / denominator`, 0 where the denominator is 0."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(denominator != 0, numerator / denominator, 0.)
+
+
+def pmi(o11, o12, o21, o22):
+    """Pointwise mutual information, log2(o11 / e11). -inf for unseen bigrams."""
+    e11 = _expected(o11, o12, o21, o22)[0]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(e11 > 0, np.log2(o11 / e11), -np.inf)
+
+
+def npmi(o11, o12, o21, o22):
+    """PMI normalized by -log2 p(w1, w2), in [-1, 1]."""
+    total = o11 + o12 + o21 + o22
+    with np.errstate(divide='ignore', invalid='ignore'):
+        joint = -np.log2(o11 / total)
+    scores = _divide(pmi(o11, o12, o21, o22), joint)
+    # a bigram that makes up the whole corpus is perfectly associated
+    scores[(o11 > 0) & (joint == 0)] = 1.
+    scores[o11 == 0] = -1.
+    return scores
+
+
+def likelihood_ratio(o11, o12, o21, o22):
+    """Log-likelihood ratio, 2 * sum o * ln(o / e) over the four cells."""
+    score = np.zeros(len(o11))
+    for observed, expected in zip((o11, o12, o21, o22), _expected(o11, o12, o21, o22)):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            term = observed * np.log(observed / expected)
+        score += np.where(observed > 0, term, 0.)
+    return 2 * score
+
+
+def t_score(o11, o12, o21, o22):
+    """Student's t, (o11 - e11) / sqrt(o11)."""
+    e11 = _expected(o11, o12, o21, o22)[0]
+    return _divide(o11 - e11, np.sqrt(o11))
+
+
+def chi_square(o11, o12, o21, o22):
+    """Pearson's chi-square of the 2x2 table."""
+    total = o11 + o12 + o21 + o22
+    return _divide(
+        total * (o11 * o22 - o12 * o21) ** 2,
+        (o11 + o12) * (o11 + o21) * (o12 + o22) * (o21 + o22),
+    )
+
+
+def dice(o11, o12, o21, o22):
+    """Dice coefficient, 2 * o11 / (f(w1) + f(w2))."""
+    return _divide(2 * o11, (o11 + o12) + (o11 + o21))
+
+
+# name -> measure
+MEASURES = {
+    'pmi': pmi,
+    'npmi': npmi,
+    'llr': likelihood_ratio,
+    't': t_score,
+    'chi2': chi_square,
+    'dice': dice,
+}
+
+
+def association_scores(counts, fronts, backs, measures=('pmi',)):
+    """Score bigrams with each of `measures`.
+
+    Args:
+        counts (BigramCounts): bigram counts.
+        fronts, backs (numpy.ndarray): word ids of the bigrams.
+        measures (List): names in `MEASURES`.
+
+    Returns:
+        scores (Dictionary): measure name -> float array, one score per bigram.
+    """
+    unknown = [name for name in measures if name not in MEASURES]
+    if unknown:
+        raise ValueError("unknown association measure(s) %s, choose from %s"
+            % (', '.join(unknown), ', '.join(sorted(MEASURES))))
+    cells = contingency(counts, fronts, backs)
+    return dict((name, MEASURES[name](*cells)) for name in measures)
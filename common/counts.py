@@ -0,0 +1,261 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Integer-id encoded count tables.
+
+Words are mapped to ids through a sorted vocabulary array, so the tables
+can live in memory-mapped arrays (see `common.snapshot`) and still be
+queried with words, the same way as `nltk.FreqDist` and
+`nltk.ConditionalFreqDist`.
+"""
+
+import numpy as np
+from scipy import sparse
+
+
+def tagged_key(word, tag):
+    """Vocabulary entry of a tagged word, ex. ('black', 'ADJ') -> 'black/ADJ'."""
+    return word + '/' + tag
+
+
+def split_tagged_key(key):
+    """Inverse of `tagged_key`. Words may hold '/', tags never do."""
+    word, tag = key.rsplit('/', 1)
+    return word, tag
+
+
+def reduce_codes(codes, counts):
+    """Sum `counts` of equal `codes`.
+
+    Returns:
+        codes (numpy.ndarray): sorted, unique.
+        counts (numpy.ndarray): summed counts of each code.
+    """
+    order = np.argsort(codes, kind='stable')
+    codes, counts = codes[order], counts[order]
+    if len(codes) == 0:
+        return codes, counts
+    starts = np.flatnonzero(np.concatenate([[True], codes[1:] != codes[:-1]]))
+    return codes[starts], np.add.reduceat(counts, starts)
+
+
+class Vocabulary(object):
+    """Sorted array of words. The id of a word is its position.
+
+    Lookups are binary searches over the array, so no dictionary has to be
+    rebuilt when the vocabulary is loaded from disk.
+    """
+
+    def __init__(self, words):
+        self.words = words
+
+    @classmethod
+    def from_tokens(cls, tokens):
+        """Build a vocabulary and encode `tokens` with it.
+
+        Returns:
+            vocabulary (Vocabulary)
+            ids (numpy.ndarray): id of each token.
+        """
+        words, ids = np.unique(np.asarray(tokens, dtype=np.str_), return_inverse=True)
+        return cls(words), ids.astype(np.int32)
+
+    def __len__(self):
+        return len(self.words)
+
+    def __getitem__(self, index):
+        return str(self.words[index])
+
+    def __contains__(self, word):
+        return self.index(word) >= 0
+
+    def index(self, word):
+        """Returns id of `word`, or -1 if it is not in the vocabulary."""
+        index = int(np.searchsorted(self.words, word))
+        if index < len(self.words) and self.words[index] == word:
+            return index
+        return -1
+
+    def indices(self, words):
+        """Vectorized `index`. Returns numpy array of ids, -1 for unknown words."""
+        words = np.asarray(words, dtype=np.str_)
+        if len(self.words) == 0:
+            return np.full(len(words), -1, dtype=np.int64)
+        indices = np.searchsorted(self.words, words)
+        clipped = np.minimum(indices, len(self.words) - 1)
+        return np.where(self.words[clipped] == words, clipped, -1)
+
+
+class FrequencyTable(object):
+    """`nltk.FreqDist`-like view over a count array indexed by word id."""
+
+    def __init__(self, vocabulary, counts):
+        self.vocabulary = vocabulary
+        self.counts = counts
+
+    def __getitem__(self, word):
+        index = self.vocabulary.index(word)
+        return int(self.counts[index]) if index >= 0 else 0
+
+    def __len__(self):
+        return int(np.count_nonzero(self.counts))
+
+    def N(self):
+        return int(self.counts.sum())
+
+
+class ConditionalRow(object):
+    """One row of a `ConditionalTable`, behaving like an `nltk.FreqDist`."""
+
+    def __init__(self, vocabulary, indices, counts):
+        self.vocabulary = vocabulary
+        self.indices = indices
+        self.counts = counts
+
+    def __getitem__(self, word):
+        index = self.vocabulary.index(word)
+        position = np.searchsorted(self.indices, index)
+        if index >= 0 and position < len(self.indices) and self.indices[position] == index:
+            return int(self.counts[position])
+        return 0
+
+    def __len__(self):
+        return len(self.indices)
+
+    def items(self):
+        return [
+            (self.vocabulary[index], int(count))
+            for index, count in zip(self.indices, self.counts)
+        ]
+
+
+class ConditionalTable(object):
+    """`nltk.ConditionalFreqDist`-like view over CSR arrays.
+
+    Row `i` holds the counts of condition `vocabulary[i]`, column ids
+    sorted in ascending order.
+    """
+
+    def __init__(self, vocabulary, indptr, indices, counts):
+        self.vocabulary = vocabulary
+        self.indptr = indptr
+        self.indices = indices
+        self.counts = counts
+
+    def __getitem__(self, word):
+        index = self.vocabulary.index(word)
+        if index < 0:
+            return ConditionalRow(self.vocabulary, self.indices[:0], self.counts[:0])
+        start, end = self.indptr[index], self.indptr[index + 1]
+        return ConditionalRow(self.vocabulary, self.indices[start:end], self.counts[start:end])
+
+
+class BigramCounts(object):
+    """Unigram and bigram counts of an id-encoded token sequence.
+
+    The bigram counts are kept as one sparse co-occurrence matrix in CSR
+    form, `forward[w1, w2]`, together with its transpose, `reverse[w2, w1]`.
+    Successors and predecessors of a word are both row slices.
+
+    Attributes:
+        vocabulary (Vocabulary)
+        unigrams (numpy.ndarray): count of each word id.
+        forward (scipy.sparse.csr_matrix): w1 -> w2 counts.
+        reverse (scipy.sparse.csr_matrix): w2 -> w1 counts.
+        totals (Tuple): marginals returned by `bigram_totals`, if known
+            already, or None to sum them from the matrices.
+    """
+
+    def __init__(self, vocabulary, unigrams, forward, reverse=None, totals=None):
+        self.vocabulary = vocabulary
+        self.unigrams = unigrams
+        self.forward = forward
+        self.reverse = reverse if reverse is not None else forward.T.tocsr()
+        self.totals = totals
+
+    @classmethod
+    def from_ids(cls, vocabulary, ids):
+        """Count unigrams and bigrams of `ids` in a single scan.
+
+        Every bigram is packed into one integer code, so counting is a
+        single `numpy.unique` over the corpus. The codes come out sorted by
+        (w1, w2), which is already the CSR layout of `forward`.
+        """
+        size = len(vocabulary)
+        ids = np.asarray(ids, dtype=np.int64)
+        unigrams = np.bincount(ids, minlength=size)
+        codes, counts = np.unique(ids[:-1] * size + ids[1:], return_counts=True)
+        return cls.from_codes(vocabulary, unigrams, codes, counts)
+
+    @classmethod
+    def from_codes(cls, vocabulary, unigrams, codes, counts):
+        """Build from sorted bigram codes `w1 * len(vocabulary) + w2`."""
+        size = len(vocabulary)
+        rows, columns = np.divmod(codes, size)
+        indptr = np.zeros(size + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=size), out=indptr[1:])
+        forward = sparse.csr_matrix(
+            (counts.astype(np.int64), columns.astype(np.int32), indptr),
+            shape=(size, size),
+        )
+        return cls(vocabulary, unigrams, forward)
+
+    @classmethod
+    def from_arrays(cls, vocabulary, arrays, prefix=''):
+        """Rebuild from the output of `arrays`, without copying."""
+        size = len(vocabulary)
+        def matrix(name):
+            return sparse.csr_matrix((
+                arrays[prefix + name + '_counts'],
+                arrays[prefix + name + '_indices'],
+                arrays[prefix + name + '_indptr'],
+            ), shape=(size, size), copy=False)
+        return cls(vocabulary, arrays[prefix + 'unigram_counts'],
+            matrix('bigram'), matrix('opposite'))
+
+    def arrays(self, prefix=''):
+        """Returns dictionary of arrays to save with `common.snapshot`."""
+        arrays = {prefix + 'unigram_counts': self.unigrams}
+        for name, matrix in [('bigram', self.forward), ('opposite', self.reverse)]:
+            arrays[prefix + name + '_indptr'] = matrix.indptr
+            arrays[prefix + name + '_indices'] = matrix.indices
+            arrays[prefix + name + '_counts'] = matrix.data
+        return arrays
+
+    def successors(self, index):
+        """Returns ids and counts of words following word id `index`."""
+        start, end = self.forward.indptr[index], self.forward.indptr[index + 1]
+        return self.forward.indices[start:end], self.forward.data[start:end]
+
+    def predecessors(self, index):
+        """Returns ids and counts of words preceding word id `index`."""
+        start, end = self.reverse.indptr[index], self.reverse.indptr[index + 1]
+        return self.reverse.indices[start:end], self.reverse.data[start:end]
+
+    def pair_counts(self, fronts, backs):
+        """Vectorized `forward[w1, w2]` over arrays of word ids, 0 for unseen pairs."""
+        fronts = np.asarray(fronts, dtype=np.int64)
+        backs = np.asarray(backs, dtype=np.int64)
+        if len(fronts) == 0:
+            return np.zeros(0, dtype=np.int64)
+        return np.asarray(self.forward[fronts, backs]).ravel()
+
+    def bigram_totals(self):
+        """Marginals of the bigram matrix.
+
+        Returns:
+            following (numpy.ndarray): number of bigrams starting with each word id.
+            preceding (numpy.ndarray): number of bigrams ending with each word id.
+        """
+        if self.totals is not None:
+            return self.totals
+        return (
+            np.asarray(self.forward.sum(axis=1)).ravel(),
+            np.asarray(self.reverse.sum(axis=1)).ravel(),
+        )
+
+    def freq_dist(self):
+        return FrequencyTable(self.vocabulary, self.unigrams)
+
+    def conditional_freq_dist(self, reverse=False):
+        matrix = self.reverse if reverse else self.forward
+        return ConditionalTable(self.vocabulary, matrix.indptr, matrix.indices, matrix.data)
@@ -0,0 +1,240 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Concurrent, rate-limited and resumable crawling of keyed pages.
+
+`crawl` fetches one page per key with a blocking `fetch(key)` function
+(ex. `urllib.request.urlopen` and a parser), run by a fixed number of
+asyncio workers on a thread pool:
+
+- every request, retries included, first takes a token from a token
+  bucket, so the request rate never exceeds `rate` per second, with
+  bursts of at most `burst` requests;
+- 429 (Too Many Requests), 5xx responses and network errors are retried
+  with exponential backoff and jitter, or after the `Retry-After` the
+  server asks for. A 429 holds back the other workers as well. Other
+  HTTP errors fail the key, not the crawl;
+- each finished key is appended to a checkpoint file right away, so an
+  interrupted crawl resumes with the keys it had not finished.
+
+Nothing here is tied to one site: point `fetch` at a local stub server to
+try a crawl out.
+"""
+
+import asyncio, concurrent.futures, json, os, random, socket, time
+from urllib.error import HTTPError, URLError
+
+# Status codes that are retried; every 5xx is, too.
+RETRY_STATUS = (408, 429)
+
+
+class TokenBucket(object):
+    """Token bucket of `capacity` tokens, refilled at `rate` tokens per second.
+
+    Args:
+        rate (Float): tokens per second.
+        capacity (Float): tokens held at most, the largest burst.
+        clock (Function): monotonic clock in seconds.
+    """
+
+    def __init__(self, rate, capacity=1., clock=time.monotonic):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = float(rate)
+        self.capacity = float(max(capacity, 1.))
+        self.clock = clock
+        self.tokens = self.capacity
+        self.updated = clock()
+        self._lock = None
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        """Wait until a token is available, and take it. Waiters are served in order."""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            self._refill()
+            while self.tokens < 1.:
+                await asyncio.sleep((1. - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= 1.
+
+    def defer(self, seconds):
+        """Hold every request back for `seconds` more, ex. after a 429."""
+        self._refill()
+        self.tokens = min(self.tokens, 0.) - seconds * self.rate
+
+
+class Checkpoint(object):
+    """Append-only journal of finished keys and their results, one json
+    line `[key, result]` per key.
+
+    Args:
+        path (String): journal file, created on the first record.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+
+    def load(self):
+        """Returns dictionary of the keys recorded so far, key -> result.
+        A line cut short by an interruption is ignored."""
+        results = dict()
+        if not os.path.isfile(self.path):
+            return results
+        with open(self.path, 'r', encoding='utf8') as file:
+            for line in file:
+                try:
+                    key, result = json.loads(line)
+                except ValueError:
+                    continue
+                results[key] = result
+        return results
+
+    def record(self, key, result):
+        if self._file is None:
+            self._file = open(self.path, 'a', encoding='utf8')
+        self._file.write(json.dumps([key, result], ensure_ascii=False) + '\n')
+        self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def remove(self):
+        """Drop the journal, once its results are saved elsewhere."""
+        self.close()
+        if os.path.isfile(self.path):
+            os.remove(self.path)
+
+
+def _retry_after(error, limit):
+    """Seconds a 429 or 503 response asks to wait, at most `limit`, or None."""
+    headers = getattr(error, 'headers', None)
+    value = headers.get('Retry-After') if headers is not None else None
+    try:
+        return min(max(float(value), 0.), limit)
+    except (TypeError, ValueError):
+        return None
+
+
+def is_retryable(error):
+    """Whether a failed request is worth retrying."""
+    if isinstance(error, HTTPError):
+        return error.code in RETRY_STATUS or 500 <= error.code < 600
+    return isinstance(error, (URLError, socket.timeout, ConnectionError))
+
+
+class CrawlStats(object):
+    """Counters of one crawl.
+
+    Attributes:
+        done (Integer): keys fetched in this run.
+        resumed (Integer): keys skipped, found in the checkpoint.
+        retries (Integer): requests repeated after a retryable error.
+        failed (Dictionary): key -> error message, keys given up on.
+    """
+
+    def __init__(self):
+        self.done = 0
+        self.resumed = 0
+        self.retries = 0
+        self.failed = dict()
+
+
+async def crawl_async(keys, fetch, checkpoint=None, concurrency=4, rate=1., burst=1.,
+        retries=5, backoff=1., max_backoff=60., executor=None):
+    """Fetch every key, see `crawl`. To be awaited in a running event loop."""
+    results = checkpoint.load() if checkpoint is not None else dict()
+    stats = CrawlStats()
+    queue = asyncio.Queue()
+    for key in dict.fromkeys(keys):
+        if key in results:
+            stats.resumed += 1
+        else:
+            queue.put_nowait(key)
+    bucket = TokenBucket(rate, burst)
+    loop = asyncio.get_running_loop()
+    own_executor = executor is None
+    if own_executor:
+        executor = concurrent.futures.ThreadPoolExecutor(concurrency)
+
+    async def fetch_with_retries(key):
+        for attempt in range(retries + 1):
+            await bucket.acquire()
+            try:
+                return await loop.run_in_executor(executor, fetch, key)
+            except asyncio.CancelledError:
+                raise
+            except Exception as error:
+                if attempt == retries or not is_retryable(error):
+                    raise
+                delay = _retry_after(error, max_backoff)
+                if delay is None:
+                    # full jitter, so workers that failed together retry apart
+                    delay = random.uniform(0, min(max_backoff, backoff * 2 ** attempt))
+                stats.retries += 1
+                if getattr(error, 'code', None) == 429:
+                    # the server wants all of us to slow down, not just this worker;
+                    # the next `acquire` waits the delay out
+                    bucket.defer(delay)
+                    continue
+                await asyncio.sleep(delay)
+
+    async def worker():
+        while True:
+            try:
+                key = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            try:
+                result = await fetch_with_retries(key)
+            except asyncio.CancelledError:
+                raise
+            except Exception as error:
+                stats.failed[key] = '%s: %s' % (type(error).__name__, error)
+                continue
+            results[key] = result
+            stats.done += 1
+            if checkpoint is not None:
+                checkpoint.record(key, result)
+
+    try:
+        await asyncio.gather(*[worker() for _ in range(max(1, concurrency))])
+    finally:
+        if own_executor:
+            executor.shutdown(wait=False)
+        if checkpoint is not None:
+            checkpoint.close()
+    return results, stats
+
+
+def crawl(keys, fetch, checkpoint=None, concurrency=4, rate=1., burst=1.,
+        retries=5, backoff=1., max_backoff=60.):
+    """Fetch the page of every key, concurrently and within a rate limit.
+
+    Args:
+        keys (List): keys to fetch, ex. words. Duplicates are fetched once.
+        fetch (Function): blocking `fetch(key)`, returns a json-serializable
+            result. Raises `urllib.error.HTTPError` and friends on failure.
+        checkpoint (Checkpoint): journal of finished keys. Keys already in
+            it are not fetched again, and their results are returned too.
+        concurrency (Integer): requests in flight at most.
+        rate (Float): requests per second at most, retries included.
+        burst (Float): requests sent at once at most, after idling.
+        retries (Integer): retries of a key after retryable errors.
+        backoff (Float): seconds; retry n waits up to `backoff * 2 ** n`,
+            unless the server says how long. Either wait is capped at
+            `max_backoff`.
+
+    Returns:
+        results (Dictionary): key -> result, of the finished keys.
+        stats (CrawlStats): counters, and the keys that failed.
+    """
+    return asyncio.run(crawl_async(keys, fetch, checkpoint, concurrency, rate, burst,
+        retries, backoff, max_backoff))
@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Gloss intensity of every WordNet lemma.
+
+The gloss intensity of a word is, over the synsets `wordnet.synsets(word)`
+returns, the largest `1 + number of intensifier tokens` of a definition,
+and 1 if the word has no synsets. Definitions are tokenized once each, and
+the synsets of every lemma name are looked up, both in a process pool. The
+value of every lemma name is persisted, so scoring a word is a dictionary
+lookup instead of tokenizing all of its glosses.
+"""
+
+import functools, multiprocessing, os
+import numpy as np
+
+from common.snapshot import cached_snapshot, corpus_fingerprint, fingerprint
+from common.sharding import pool_context, split_shards
+
+# Bump when the way intensities are computed changes.
+TABLE_VERSION = 1
+
+
+def gloss_counts(definitions, forms, tokenize):
+    """`1 + number of tokens in forms` of each definition.
+
+    Returns:
+        counts (List): one count per definition.
+    """
+    return [
+        1 + sum(1 for token in tokenize(definition) if token in forms)
+        for definition in definitions
+    ]
+
+
+def _gloss_counts_shard(forms, tokenize, definitions):
+    return gloss_counts(definitions, forms, tokenize)
+
+
+def lemma_intensities(words, wordnet, synset_counts):
+    """Largest gloss count over `wordnet.synsets(word)` of each word, or 1.
+
+    Args:
+        synset_counts (Dictionary): synset name -> count, see `gloss_counts`.
+
+    Returns:
+        values (List): one value per word.
+    """
+    values = []
+    for word in words:
+        counts = [synset_counts[synset.name()] for synset in wordnet.synsets(word)]
+        values.append(max(counts) if counts else 1)
+    return values
+
+
+# WordNet reader and synset counts of the running build. Pool workers
+# inherit them once, so only words are sent with each shard.
+_wordnet, _synset_counts = None, None
+
+def _set_tables(wordnet, synset_counts):
+    global _wordnet, _synset_counts
+    _wordnet, _synset_counts = wordnet, synset_counts
+
+def _lemma_intensities_shard(words):
+    return lemma_intensities(words, _wordnet, _synset_counts)
+
+
+def build_definition_intensity(wordnet, forms, tokenize, processes=None):
+    """Compute the gloss intensity of every lemma name of `wordnet`.
+
+    Args:
+        wordnet: NLTK WordNet corpus reader.
+        forms (Set): intensifier surface forms.
+        tokenize (Function): picklable, splits a definition into tokens.
+        processes (Integer): size of the pools tokenizing definitions and
+            looking up lemmas. Defaults to the number of cores. With 1, no
+            pool is started.
+
+    Returns:
+        arrays (Dictionary), meta (Dictionary): for `common.snapshot`.
+    """
+    forms = frozenset(forms)
+    synsets = list(wordnet.all_synsets())
+    definitions = [synset.definition() for synset in synsets]
+    words = sorted(set(wordnet.all_lemma_names()))
+    processes = processes or os.cpu_count() or 1
+    if processes == 1 or multiprocessing.current_process().name != 'MainProcess':
+        counts = gloss_counts(definitions, forms, tokenize)
+        synset_counts = dict(zip([synset.name() for synset in synsets], counts))
+        values = lemma_intensities(words, wordnet, synset_counts)
+    else:
+        with pool_context().Pool(processes) as pool:
+            shards = pool.map(functools.partial(_gloss_counts_shard, forms, tokenize),
+                split_shards(definitions, 4 * processes), chunksize=1)
+        counts = [count for shard in shards for count in shard]
+        synset_counts = dict(zip([synset.name() for synset in synsets], counts))
+        with pool_context().Pool(processes, _set_tables, (wordnet, synset_counts)) as pool:
+            shards = pool.map(_lemma_intensities_shard, split_shards(words, 4 * processes), chunksize=1)
+        values = [value for shard in shards for value in shard]
+    arrays = {
+        'words': np.array(words, dtype=np.str_),
+        'values': np.array(values, dtype=np.int32),
+    }
+    return arrays, {'synsets': len(synsets), 'words': len(words)}
+
+
+class DefinitionIntensity(object):
+    """Gloss intensity of words, read from a persisted table.
+
+    Words outside the table (ex. inflected forms) are computed from their
+    glosses on first use and remembered.
+    """
+
+    def __init__(self, words, values, wordnet, forms, tokenize):
+        self.table = dict(zip(words.tolist(), values.tolist()))
+        self.wordnet = wordnet
+        self.forms = frozenset(forms)
+        self.tokenize = tokenize
+
+    @classmethod
+    def load(cls, wordnet, forms, tokenize, cache_dir, processes=None, rebuild=False):
+        """Load the table under `cache_dir`. It is rebuilt when the WordNet
+        data, the intensifier forms or the tokenizer change, or if `rebuild`."""
+        forms = sorted(set(forms))
+        key = fingerprint(TABLE_VERSION, wordnet.get_version(), corpus_fingerprint(wordnet),
+            forms, '%s.%s' % (getattr(tokenize, '__module__', None),
+                getattr(tokenize, '__qualname__', repr(tokenize))))
+        snapshot = cached_snapshot(os.path.join(cache_dir, 'definition_intensity'), key,
+            lambda: build_definition_intensity(wordnet, forms, tokenize, processes), rebuild)
+        return cls(snapshot['words'], snapshot['values'], wordnet, forms, tokenize)
+
+    def __len__(self):
+        return len(self.table)
+
+    def __getitem__(self, word):
+        if word not in self.table:
+            definitions = [synset.definition() for synset in self.wordnet.synsets(word)]
+            counts = gloss_counts(definitions, self.forms, self.tokenize)
+            self.table[word] = max(counts) if counts else 1
+        return self.table[word]
@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Distributional similarity over bigram context counts.
+
+The context vector of a word is its row of right neighbors (`forward`)
+next to its row of left neighbors (`reverse`), weighted with positive
+pointwise mutual information (PPMI) and L2-normalized. Cosine similarity
+of many words against many candidates is then one sparse matrix product.
+"""
+
+import numpy as np
+from scipy import sparse
+
+
+def ppmi_vectors(counts, alpha=0.75):
+    """L2-normalized PPMI context vectors of every word.
+
+    Args:
+        counts (BigramCounts): bigram counts to take contexts from.
+        alpha (Float): context distribution smoothing. Raising context counts 
+            to `alpha` < 1 keeps rare contexts from dominating PMI.
+
+    Returns:
+        vectors (scipy.sparse.csr_matrix): one row per word id, 
+            `2 * len(vocabulary)` columns (right contexts, then left contexts).
+    """
+    contexts = sparse.hstack([counts.forward, counts.reverse], format='csr', dtype=np.float64)
+    word_totals = np.asarray(contexts.sum(axis=1)).ravel()
+    context_totals = np.asarray(contexts.sum(axis=0)).ravel() ** alpha
+    context_probability = context_totals / context_totals.sum()
+
+    # PMI of stored entries: log( P(w, c) / (P(w) * P_alpha(c)) )
+    rows = np.repeat(np.arange(contexts.shape[0]), np.diff(contexts.indptr))
+    pmi = np.log(contexts.data / (word_totals[rows] * context_probability[contexts.indices]))
+    contexts.data = np.maximum(pmi, 0)
+    contexts.eliminate_zeros()
+
+    norms = np.sqrt(np.asarray(contexts.multiply(contexts).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    return sparse.diags(1 / norms).dot(contexts).tocsr()
+
+
+def top_k_similar(vectors, queries, candidates, k, batch_size=1024):
+    """Most similar candidates of each query, by cosine similarity.
+
+    Queries are scored against all candidates with one sparse product per
+    batch of `batch_size` queries, which bounds the memory of the dense 
+    similarity block.
+
+    Args:
+        vectors (scipy.sparse.csr_matrix): L2-normalized rows, see `ppmi_vectors`.
+        queries (numpy.ndarray): word ids to find similar words for.
+        candidates (numpy.ndarray): word ids that may be proposed.
+        k (Integer): candidates per query.
+
+    Returns:
+        ids (numpy.ndarray): (len(queries), k) candidate word ids, most similar 
+            first, -1 where fewer than `k` candidates have a positive similarity.
+        similarities (numpy.ndarray): matching cosine similarities.
+    """
+    queries = np.asarray(queries, dtype=np.int64)
+    candidates = np.asarray(candidates, dtype=np.int64)
+    k = min(k, len(candidates))
+    ids = np.full((len(queries), k), -1, dtype=np.int64)
+    similarities = np.zeros((len(queries), k))
+    if k == 0:
+        return ids, similarities
+    candidate_vectors = vectors[candidates].T.tocsc()
+    for start in range(0, len(queries), batch_size):
+        batch = queries[start:start + batch_size]
+        block = vectors[batch].dot(candidate_vectors).toarray()
+        # a word is not its own paraphrase
+        block[batch[:, None] == candidates[None, :]] = 0
+        top = np.argpartition(-block, k - 1, axis=1)[:, :k]
+        top_similarities = np.take_along_axis(block, top, axis=1)
+        order = np.argsort(-top_similarities, axis=1, kind='stable')
+        top = np.take_along_axis(top, order, axis=1)
+        top_similarities = np.take_along_axis(top_similarities, order, axis=1)
+        ids[start:start + len(batch)] = np.where(top_similarities > 0, candidates[top], -1)
+        similarities[start:start + len(batch)] = top_similarities
+    return ids, similarities
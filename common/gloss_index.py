@@ -0,0 +1,167 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Inverted index from WordNet gloss tokens to synsets.
+
+Synsets are numbered POS by POS, so every part-of-speech owns a contiguous
+range of synset ids and restricting a posting list to a POS is a range
+check. Lemma names are stored with the index, so answering a query never
+goes back to WordNet.
+"""
+
+import os, re
+import numpy as np
+
+from common.snapshot import cached_snapshot, corpus_fingerprint, fingerprint
+from common.counts import Vocabulary
+
+# Bump when the layout of the index changes.
+INDEX_VERSION = 1
+# Order of POS partitions. 's' is the adjective satellite.
+POS_ORDER = 'nvasr'
+# Gloss tokens are maximal runs of letters. Keywords are plain words, so
+# `keyword in definition` holds exactly when some token contains it.
+TOKEN_PATTERN = re.compile(r'[A-Za-z]+')
+
+
+def _csr(rows, values, size):
+    """Group `values` by `rows` (ids below `size`). Returns indptr, values."""
+    order = np.lexsort((values, rows))
+    indptr = np.zeros(size + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=size), out=indptr[1:])
+    return indptr, values[order]
+
+
+def build_gloss_index(wordnet):
+    """Scan all synsets once and build the arrays of a `GlossIndex`.
+
+    Returns:
+        arrays (Dictionary), meta (Dictionary): for `common.snapshot`.
+    """
+    synsets = sorted(wordnet.all_synsets(), key=lambda synset: POS_ORDER.index(synset.pos()))
+    names, lemma_rows, lemmas, token_rows, tokens = [], [], [], [], []
+    for synset_id, synset in enumerate(synsets):
+        names.append(synset.name())
+        for lemma in synset.lemma_names():
+            lemma_rows.append(synset_id)
+            lemmas.append(lemma)
+        for token in set(TOKEN_PATTERN.findall(synset.definition())):
+            token_rows.append(synset_id)
+            tokens.append(token)
+
+    # POS partitions: synsets of POS_ORDER[i] are [offsets[i], offsets[i+1])
+    pos_counts = [0] * len(POS_ORDER)
+    for synset in synsets:
+        pos_counts[POS_ORDER.index(synset.pos())] += 1
+    pos_offsets = np.concatenate([[0], np.cumsum(pos_counts)]).astype(np.int64)
+
+    vocabulary, token_ids = Vocabulary.from_tokens(tokens)
+    token_indptr, postings = _csr(
+        token_ids, np.asarray(token_rows, dtype=np.int32), len(vocabulary))
+    lemma_indptr = np.zeros(len(synsets) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(lemma_rows, minlength=len(synsets)), out=lemma_indptr[1:])
+
+    arrays = {
+        'tokens': vocabulary.words,
+        'token_indptr': token_indptr,
+        'postings': postings,
+        'synset_names': np.array(names, dtype=np.str_),
+        'pos_offsets': pos_offsets,
+        'lemma_indptr': lemma_indptr,
+        'lemmas': np.array(lemmas, dtype=np.str_),
+    }
+    return arrays, {'synsets': len(synsets)}
+
+
+class GlossIndex(object):
+    """Posting lists of synset ids for every gloss token.
+
+    Attributes:
+        tokens (Vocabulary): gloss tokens.
+        synset_names (numpy.ndarray): name of each synset id, ex. 'very.r.01'.
+    """
+
+    def __init__(self, arrays):
+        self.tokens = Vocabulary(arrays['tokens'])
+        self.token_indptr = arrays['token_indptr']
+        self.postings = arrays['postings']
+        self.synset_names = arrays['synset_names']
+        self.pos_offsets = arrays['pos_offsets']
+        self.lemma_indptr = arrays['lemma_indptr']
+        self.lemmas = arrays['lemmas']
+        self._matching_tokens = dict()
+
+    @classmethod
+    def load(cls, wordnet, cache_dir, rebuild=False):
+        """Load the persisted index under `cache_dir`, building it if the 
+        WordNet data has changed since it was written, or if `rebuild`."""
+        key = fingerprint(INDEX_VERSION, wordnet.get_version(), corpus_fingerprint(wordnet))
+        snapshot = cached_snapshot(os.path.join(cache_dir, 'gloss_index'), key,
+            lambda: build_gloss_index(wordnet), rebuild)
+        return cls(snapshot)
+
+    def __len__(self):
+        return len(self.synset_names)
+
+    def pos(self, synset_id):
+        """Returns WordNet POS of `synset_id`."""
+        return POS_ORDER[int(np.searchsorted(self.pos_offsets, synset_id, side='right')) - 1]
+
+    def name(self, synset_id):
+        return str(self.synset_names[synset_id])
+
+    def lemma_names(self, synset_id):
+        start, end = self.lemma_indptr[synset_id], self.lemma_indptr[synset_id + 1]
+        return [str(lemma) for lemma in self.lemmas[start:end]]
+
+    def _token_ids(self, keyword, exact):
+        """Ids of gloss tokens equal to, or containing `keyword`."""
+        if exact:
+            index = self.tokens.index(keyword)
+            return np.array([index] if index >= 0 else [], dtype=np.int64)
+        if keyword not in self._matching_tokens:
+            self._matching_tokens[keyword] = np.flatnonzero(
+                np.char.find(self.tokens.words, keyword) >= 0)
+        return self._matching_tokens[keyword]
+
+    def _restrict(self, synset_ids, pos):
+        if pos is None:
+            return synset_ids
+        mask = np.zeros(len(synset_ids), dtype=bool)
+        for tag in pos:
+            index = POS_ORDER.index(tag)
+            start, end = self.pos_offsets[index], self.pos_offsets[index + 1]
+            mask |= (synset_ids >= start) & (synset_ids < end)
+        return synset_ids[mask]
+
+    def postings_of(self, keyword, pos=None, exact=False):
+        """Synsets whose gloss holds `keyword`.
+
+        Args:
+            keyword (String): word to search for.
+            pos (String): WordNet POS letters to keep, ex. 'r' or 'as'. 
+                None keeps all.
+            exact (Boolean): match whole tokens only. By default a token 
+                matches if it contains `keyword`, as `keyword in definition`.
+
+        Returns:
+            synset_ids (numpy.ndarray): sorted, unique.
+        """
+        lists = [
+            self.postings[self.token_indptr[index]:self.token_indptr[index + 1]]
+            for index in self._token_ids(keyword, exact)
+        ]
+        if not lists:
+            return np.zeros(0, dtype=np.int32)
+        return self._restrict(np.unique(np.concatenate(lists)), pos)
+
+    def match(self, keywords, min_count=1, pos=None, exact=False):
+        """Synsets whose gloss holds at least `min_count` of `keywords`.
+
+        Returns:
+            synset_ids (numpy.ndarray): sorted, unique.
+        """
+        lists = [self.postings_of(keyword, pos, exact) for keyword in keywords]
+        if not lists:
+            return np.zeros(0, dtype=np.int32)
+        synset_ids, hold_counts = np.unique(np.concatenate(lists), return_counts=True)
+        return synset_ids[hold_counts >= min_count]
@@ -0,0 +1,204 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Persisted tagged bigram counts, grown document by document.
+
+The counts of a base corpus are saved once (see `common.snapshot`),
+together with their marginals: the number of bigrams starting and ending
+with each word. New tagged documents are counted on their own, and their
+counts are added to the saved tables as a delta:
+
+- if the documents bring no new words, the delta matrix is added to the
+  bigram matrices, and the marginals and unigram counts are incremented
+  at the ids the delta touches;
+- new words are merged into the sorted vocabulary first. Ids only shift,
+  never reorder, so the existing rows are moved to their new ids without
+  sorting anything.
+
+Each update reports which bigrams and marginals it changed, so scores
+derived from the counts can be recomputed for the affected pairs only.
+"""
+
+import numpy as np
+from scipy import sparse
+
+from common.snapshot import cached_snapshot, save_snapshot
+from common.counts import Vocabulary, BigramCounts, reduce_codes, tagged_key
+
+
+def count_documents(documents, lowercase=True, skip_tags=('.',)):
+    """Count the `tagged_key` unigrams and bigrams of tagged documents.
+
+    Bigrams touching a token tagged with one of `skip_tags` are not
+    counted, as with `common.tagged_store.TaggedStore.tagged_bigram_counts`,
+    and neither are bigrams across two documents.
+
+    Args:
+        documents (Iterable): documents, each an iterable of sentences,
+            lists of (word, tag).
+
+    Returns:
+        counts (BigramCounts): over the 'word/TAG' keys of the documents.
+    """
+    tokens, keep, joined = [], [], []
+    for document in documents:
+        first = True
+        for sentence in document:
+            for word, tag in sentence:
+                tokens.append(tagged_key(word.lower() if lowercase else word, tag))
+                keep.append(tag not in skip_tags)
+                joined.append(not first)
+                first = False
+    vocabulary, ids = Vocabulary.from_tokens(tokens)
+    ids = ids.astype(np.int64)
+    size = len(vocabulary)
+    keep = np.array(keep, dtype=bool)
+    both = keep[:-1] & keep[1:] & np.array(joined[1:], dtype=bool)
+    codes, counts = reduce_codes(
+        ids[:-1][both] * size + ids[1:][both], np.ones(int(both.sum()), dtype=np.int64))
+    return BigramCounts.from_codes(vocabulary, np.bincount(ids, minlength=size), codes, counts)
+
+
+def _move_rows(matrix, mapping, size):
+    """CSR `matrix` with rows and columns moved to the ids in `mapping`, an
+    increasing array, in a `size` x `size` matrix."""
+    lengths = np.zeros(size, dtype=np.int64)
+    lengths[mapping] = np.diff(matrix.indptr)
+    indptr = np.zeros(size + 1, dtype=np.int64)
+    np.cumsum(lengths, out=indptr[1:])
+    indices = mapping[np.asarray(matrix.indices)].astype(np.int32)
+    return sparse.csr_matrix((np.asarray(matrix.data), indices, indptr), shape=(size, size))
+
+
+def _move(array, mapping, size):
+    moved = np.zeros(size, dtype=np.int64)
+    moved[mapping] = array
+    return moved
+
+
+class CountChanges(object):
+    """What one update changed in an `IncrementalCounts`.
+
+    Attributes:
+        pairs (Set): ('word1/TAG1', 'word2/TAG2') keys of changed bigram counts.
+        following (Set): keys whose number of following bigrams changed.
+        preceding (Set): keys whose number of preceding bigrams changed.
+        new_words (Integer): keys added to the vocabulary.
+        bigrams (Integer): bigrams added; the total changes if not 0.
+        top (Tuple): largest bigram count (before, after).
+    """
+
+    def __init__(self, pairs, following, preceding, new_words, bigrams, top):
+        self.pairs = pairs
+        self.following = following
+        self.preceding = preceding
+        self.new_words = new_words
+        self.bigrams = bigrams
+        self.top = top
+
+    def affects(self, front, back):
+        """Whether the counts or marginals of bigram `front` `back` changed."""
+        return front in self.following or back in self.preceding
+
+
+class IncrementalCounts(object):
+    """Tagged bigram counts saved at `path`, updated with document deltas.
+
+    Attributes:
+        counts (BigramCounts): current counts, with the marginals below
+            as its `totals`.
+        following, preceding (numpy.ndarray): bigrams starting and ending
+            with each word id.
+        top (Integer): largest bigram count.
+        documents (Integer): documents added since the base corpus.
+    """
+
+    def __init__(self, path, key, counts, following, preceding, top, documents=0):
+        self.path = path
+        self.key = key
+        self.counts = counts
+        self.following = following
+        self.preceding = preceding
+        self.top = top
+        self.documents = documents
+
+    @classmethod
+    def load(cls, path, key, build, rebuild=False):
+        """Open the counts saved at `path`, with the documents added to them.
+
+        Args:
+            key (String): key of the base corpus. Counts saved for another
+                key, ingested documents included, are replaced.
+            build (Function): returns the `BigramCounts` of the base corpus.
+        """
+        def build_snapshot():
+            counts = build()
+            following, preceding = counts.bigram_totals()
+            top = int(counts.forward.data.max()) if counts.forward.nnz else 0
+            return cls._arrays(counts, following, preceding), {'top': top, 'documents': 0}
+        snapshot = cached_snapshot(path, key, build_snapshot, rebuild)
+        counts = BigramCounts.from_arrays(Vocabulary(snapshot['words']), snapshot)
+        counts.totals = (snapshot['following'], snapshot['preceding'])
+        return cls(path, key, counts, snapshot['following'], snapshot['preceding'],
+            snapshot.meta['top'], snapshot.meta['documents'])
+
+    @staticmethod
+    def _arrays(counts, following, preceding):
+        arrays = counts.arrays()
+        arrays.update({'words': counts.vocabulary.words, 'following': following, 'preceding': preceding})
+        return arrays
+
+    def save(self):
+        """Write the current counts over the saved ones."""
+        save_snapshot(self.path, self.key,
+            self._arrays(self.counts, self.following, self.preceding),
+            {'top': self.top, 'documents': self.documents})
+
+    def add_documents(self, documents, lowercase=True, skip_tags=('.',)):
+        """Add the counts of tagged documents, see `count_documents`.
+
+        Returns:
+            changes (CountChanges)
+        """
+        documents = list(documents)
+        delta = count_documents(documents, lowercase, skip_tags)
+        words = self.counts.vocabulary.words
+        merged = np.union1d(words, delta.vocabulary.words)
+        size = len(merged)
+        forward, reverse = self.counts.forward, self.counts.reverse
+        unigrams, following, preceding = self.counts.unigrams, self.following, self.preceding
+        if size > len(words):
+            mapping = np.searchsorted(merged, words)
+            forward = _move_rows(forward, mapping, size)
+            reverse = _move_rows(reverse, mapping, size)
+            unigrams = _move(unigrams, mapping, size)
+            following = _move(following, mapping, size)
+            preceding = _move(preceding, mapping, size)
+        elif not following.flags.writeable:
+            # saved arrays are mapped read-only; later updates go in place
+            unigrams, following, preceding = np.array(unigrams), np.array(following), np.array(preceding)
+
+        # the delta, recoded over the merged vocabulary
+        delta_ids = np.searchsorted(merged, delta.vocabulary.words)
+        matrix = delta.forward.tocoo()
+        rows, columns = delta_ids[matrix.row], delta_ids[matrix.col]
+        added = sparse.csr_matrix((matrix.data.astype(np.int64), (rows, columns)), shape=(size, size))
+        forward = (forward + added).tocsr()
+        reverse = (reverse + added.T).tocsr()
+        np.add.at(unigrams, delta_ids, delta.unigrams)
+        np.add.at(following, rows, matrix.data)
+        np.add.at(preceding, columns, matrix.data)
+
+        vocabulary = Vocabulary(merged)
+        self.counts = BigramCounts(vocabulary, unigrams, forward, reverse, (following, preceding))
+        self.following, self.preceding = following, preceding
+        top = self.top
+        if len(rows):
+            self.top = max(top, int(self.counts.pair_counts(rows, columns).max()))
+        self.documents += len(documents)
+
+        keys = delta.vocabulary.words
+        return CountChanges(
+            set(zip(keys[matrix.row].tolist(), keys[matrix.col].tolist())),
+            set(keys[np.unique(matrix.row)].tolist()),
+            set(keys[np.unique(matrix.col)].tolist()),
+            size - len(words), int(matrix.data.sum()), (top, self.top))
@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Hashed lookups over an intensifier lexicon.
+
+The lexicon is a list of `(form, tag)` entries. The index answers
+membership by surface form and by `(form, tag)` in constant time, and
+marks the members of a whole vocabulary at once, so arrays of word ids
+are tested with a single mask lookup.
+"""
+
+import numpy as np
+
+
+class IntensifierIndex(object):
+    """Intensifier lexicon with hashed lookups.
+
+    Iterating yields the `(form, tag)` entries in sorted order. `in` accepts
+    either a form or a `(form, tag)` tuple.
+
+    Args:
+        words (List): surface form of each entry.
+        tags (List): tag of each entry.
+    """
+
+    def __init__(self, words, tags):
+        self.entries = sorted(set(zip([str(word) for word in words], [str(tag) for tag in tags])))
+        self.pairs = frozenset(self.entries)
+        self.tags = {}
+        for word, tag in self.entries:
+            self.tags.setdefault(word, set()).add(tag)
+        self.words = np.array(sorted(self.tags), dtype=np.str_)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def __contains__(self, item):
+        if isinstance(item, tuple):
+            return item in self.pairs
+        return item in self.tags
+
+    def has_form(self, word, tag=None):
+        """Returns True if `word` is an intensifier, with `tag` if given."""
+        if tag is None:
+            return word in self.tags
+        return (word, tag) in self.pairs
+
+    def tags_of(self, word):
+        """Returns set of tags `word` is listed with, empty if none."""
+        return self.tags.get(word, set())
+
+    def mask(self, vocabulary):
+        """Marks intensifiers of a vocabulary.
+
+        Args:
+            vocabulary: `Vocabulary`, or array of words.
+
+        Returns:
+            mask (numpy.ndarray): boolean array indexed by word id.
+        """
+        words = np.asarray(getattr(vocabulary, 'words', vocabulary), dtype=np.str_)
+        return np.isin(words, self.words)
+
+    def contains_ids(self, ids, vocabulary):
+        """Batched `has_form` over word ids of `vocabulary`.
+
+        Returns:
+            members (numpy.ndarray): boolean array shaped like `ids`,
+                False for negative (unknown) ids.
+        """
+        ids = np.asarray(ids)
+        mask = self.mask(vocabulary)
+        members = np.zeros(ids.shape, dtype=bool)
+        known = ids >= 0
+        members[known] = mask[ids[known]]
+        return members
@@ -0,0 +1,197 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""One-pass profile of a POS-tagged corpus in bounded memory.
+
+For every tag, the profile keeps its token count, a bottom-k sketch of
+the distinct words seen with it, and counts of tag-to-tag transitions
+inside sentences. A bottom-k sketch keeps the `k` words with the smallest
+(salted) hashes. Those are a uniform sample of the distinct words, like a
+reservoir over types instead of tokens, and the k-th smallest hash also
+estimates how many distinct words there are. Memory is fixed by `k` and
+the number of tags, however large the corpus is.
+
+The sample stands in for a reservoir sample of the words of each tag. A
+reservoir over tokens would draw frequent words over and over and could
+not count types, while the sketch draws each distinct word at most once,
+and sketches of separate batches merge into the sketch of the whole.
+
+Profile an NLTK corpus, or tagged text files with one sentence per line
+of 'word/TAG' tokens:
+
+    $ python -m common.profiler brown
+    $ python -m common.profiler --files corpus1.txt corpus2.txt
+"""
+
+import argparse, hashlib
+from collections import Counter
+import numpy as np
+
+# Tokens processed at once.
+BATCH_SIZE = 1 << 16
+
+
+class DistinctSample(object):
+    """Bottom-k sketch of distinct labels.
+
+    Args:
+        size (Integer): number of hashes kept, k.
+        seed: salt of the hashes. Other seeds give other samples.
+    """
+
+    def __init__(self, size=1024, seed=0):
+        self.size = size
+        self.salt = ('%s:' % (seed,)).encode('utf8')
+        self.hashes = np.zeros(0, dtype=np.uint64)
+        self.labels = dict()
+
+    def hash(self, labels):
+        """Salted 64-bit hashes of `labels`. Returns numpy uint64 array."""
+        return np.array([
+            int.from_bytes(hashlib.blake2b(self.salt + label.encode('utf8'), digest_size=8).digest(), 'little')
+            for label in labels
+        ], dtype=np.uint64)
+
+    def offer(self, labels):
+        """Add distinct `labels`."""
+        labels = list(labels)
+        hashes = np.concatenate([self.hashes, self.hash(labels)])
+        names = dict(self.labels)
+        names.update(zip(hashes[len(self.hashes):].tolist(), labels))
+        hashes = np.unique(hashes)[:self.size]
+        self.hashes = hashes
+        self.labels = dict((key, names[key]) for key in hashes.tolist())
+
+    def sample(self, count):
+        """Returns `count` distinct labels (all if fewer), uniformly chosen."""
+        return [self.labels[key] for key in self.hashes[:count].tolist()]
+
+    def estimate(self):
+        """Number of distinct labels offered. Exact below `size` of them."""
+        if len(self.hashes) < self.size:
+            return len(self.hashes)
+        return int(round((self.size - 1) / ((float(self.hashes[-1]) + 1) / 2. ** 64)))
+
+
+class TagProfile(object):
+    """Token counts, distinct word sketches and transitions of every tag.
+
+    Attributes:
+        tokens (Counter): tag -> number of tokens.
+        transitions (Counter): (tag1, tag2) -> number of times tag2
+            directly follows tag1 in a sentence.
+        words (Dictionary): tag -> DistinctSample of its words.
+    """
+
+    def __init__(self, sketch_size=1024, seed=0):
+        self.sketch_size = sketch_size
+        self.seed = seed
+        self.tokens = Counter()
+        self.transitions = Counter()
+        self.words = dict()
+
+    def update(self, sentences):
+        """Profile a batch of sentences, lists of (word, tag)."""
+        batch = dict()
+        for sentence in sentences:
+            previous = None
+            for word, tag in sentence:
+                batch.setdefault(tag, set()).add(word)
+                self.tokens[tag] += 1
+                if previous is not None:
+                    self.transitions[(previous, tag)] += 1
+                previous = tag
+        for tag, words in batch.items():
+            if tag not in self.words:
+                # salted by tag too, so tags sharing words get different samples
+                self.words[tag] = DistinctSample(self.sketch_size, '%s/%s' % (self.seed, tag))
+            self.words[tag].offer(sorted(words))
+
+    def tags(self):
+        return sorted(self.tokens)
+
+    def types(self, tag):
+        """Estimated number of distinct words tagged `tag`."""
+        return self.words[tag].estimate() if tag in self.words else 0
+
+    def samples(self, tag, count=5):
+        """`count` distinct words tagged `tag`, uniformly chosen."""
+        return self.words[tag].sample(count) if tag in self.words else []
+
+
+def profile_sentences(sentences, sketch_size=1024, seed=0, batch_size=BATCH_SIZE):
+    """Profile an iterable of sentences in one pass.
+
+    Returns:
+        profile (TagProfile)
+    """
+    profile = TagProfile(sketch_size, seed)
+    batch, size = [], 0
+    for sentence in sentences:
+        batch.append(sentence)
+        size += len(sentence)
+        if size >= batch_size:
+            profile.update(batch)
+            batch, size = [], 0
+    profile.update(batch)
+    return profile
+
+
+def read_tagged_files(paths, separator='/', encoding='utf8'):
+    """Yields sentences of tagged text files, one per non-empty line.
+
+    Tokens are 'word/TAG', split at the last `separator`. Tokens without
+    it are skipped.
+    """
+    for path in paths:
+        with open(path, 'r', encoding=encoding, errors='replace') as file:
+            for line in file:
+                sentence = [
+                    tuple(token.rsplit(separator, 1))
+                    for token in line.split()
+                    if separator in token
+                ]
+                if sentence:
+                    yield sentence
+
+
+def print_profile(profile, samples=5, transitions=10):
+    """Print tokens, types and examples of every tag, and the most
+    frequent tag transitions."""
+    total = sum(profile.tokens.values())
+    print("=== %d tags, %d tokens ===" % (len(profile.tokens), total))
+    for tag in profile.tags():
+        print("%-6s %10d tokens %9d types  %s" % (
+            tag, profile.tokens[tag], profile.types(tag), ', '.join(profile.samples(tag, samples))))
+    print("=== top %d of %d tag transitions ===" % (
+        min(transitions, len(profile.transitions)), len(profile.transitions)))
+    for (first, second), count in profile.transitions.most_common(transitions):
+        print("%-6s -> %-6s %10d" % (first, second, count))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Profile the tags of a tagged corpus in one pass.")
+    parser.add_argument('corpus', nargs='?', help="name of an NLTK corpus, ex. brown")
+    parser.add_argument('--files', nargs='+', metavar='FILE',
+        help="profile tagged text files instead, one sentence of 'word/TAG' tokens per line")
+    parser.add_argument('--tagset', default='universal',
+        help="tagset to map an NLTK corpus to (default: universal)")
+    parser.add_argument('--samples', type=int, default=5, help="example words per tag (default: 5)")
+    parser.add_argument('--transitions', type=int, default=10,
+        help="tag transitions to print (default: 10)")
+    parser.add_argument('--sketch-size', type=int, default=1024,
+        help="words kept per tag to estimate type counts (default: 1024)")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+    if args.files:
+        sentences = read_tagged_files(args.files)
+    elif args.corpus:
+        import nltk.corpus
+        sentences = getattr(nltk.corpus, args.corpus).tagged_sents(tagset=args.tagset)
+    else:
+        parser.error("give a corpus name or --files")
+    profile = profile_sentences(sentences, args.sketch_size, args.seed)
+    print_profile(profile, args.samples, args.transitions)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Memo of scores of hashable keys, with hit and miss counters.
+
+Keys scored by one caller are served to any later caller, so items that
+several candidate lists share are scored once per run. Misses are
+deduplicated and scored in a single batch, so vectorized or parallel
+scoring functions keep working on whole batches.
+"""
+
+
+class ScoreCache(object):
+    """Scores of keys, each computed at most once.
+
+    Attributes:
+        scores (Dictionary): key -> score.
+        hits (Integer): keys served from the cache.
+        misses (Integer): keys that had to be scored.
+    """
+
+    def __init__(self):
+        self.scores = dict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.scores)
+
+    def __contains__(self, key):
+        return key in self.scores
+
+    def get_many(self, keys, compute):
+        """Scores of `keys`, in order.
+
+        Args:
+            keys (List): hashable keys, duplicates allowed.
+            compute (Function): `compute(missing)` returns the scores of a
+                list of distinct keys that are not cached yet, in order.
+
+        Returns:
+            scores (List): one score per key.
+        """
+        keys = list(keys)
+        missing = list(dict.fromkeys(key for key in keys if key not in self.scores))
+        if missing:
+            self.scores.update(zip(missing, compute(missing)))
+        self.misses += len(missing)
+        self.hits += len(keys) - len(missing)
+        return [self.scores[key] for key in keys]
+
+    def discard(self, keys):
+        """Forget the scores of `keys`, so they are scored again when asked.
+        Returns number of scores forgotten."""
+        forgotten = 0
+        for key in keys:
+            if self.scores.pop(key, None) is not None:
+                forgotten += 1
+        return forgotten
+
+    def clear(self):
+        self.scores.clear()
+
+    def stats(self):
+        """Returns dictionary of hits, misses, size and hit rate."""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'size': len(self.scores),
+            'hit_rate': self.hits / lookups if lookups else 0.,
+        }
@@ -0,0 +1,164 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Sharded, multi-process unigram and bigram counting.
+
+The file ids of a corpus are split into contiguous shards. Each worker
+counts its shard into a `CountTable`, which holds counts over the shard's
+own sorted vocabulary plus the first and last token of the shard. Tables
+of adjacent shards are merged pairwise, level by level (a tree reduction),
+and the bigram spanning each shard boundary is added back while merging.
+The final table is therefore identical to counting the whole corpus in a
+single process.
+"""
+
+import functools, multiprocessing, os
+import numpy as np
+
+from common.counts import Vocabulary, BigramCounts, reduce_codes
+
+
+class CountTable(object):
+    """Mergeable unigram and bigram counts of a contiguous run of tokens.
+
+    Attributes:
+        words (numpy.ndarray): sorted vocabulary of the run.
+        unigrams (numpy.ndarray): count of each word.
+        codes (numpy.ndarray): sorted bigram codes, `w1 * len(words) + w2`.
+        counts (numpy.ndarray): count of each bigram code.
+        first, last (Tuple): (word id, kept) of the first and last token. 
+            A bigram is only counted if both of its tokens are kept.
+    """
+
+    def __init__(self, words, unigrams, codes, counts, first=None, last=None):
+        self.words = words
+        self.unigrams = unigrams
+        self.codes = codes
+        self.counts = counts
+        self.first = first
+        self.last = last
+
+    @classmethod
+    def from_tokens(cls, tokens, keep=None):
+        """Count a list of tokens.
+
+        Args:
+            tokens (List): token strings, in corpus order.
+            keep (numpy.ndarray): boolean per token. Bigrams touching a token 
+                that is not kept are not counted. By default all are kept.
+        """
+        vocabulary, ids = Vocabulary.from_tokens(tokens)
+        ids = ids.astype(np.int64)
+        if keep is None:
+            keep = np.ones(len(ids), dtype=bool)
+        size = len(vocabulary)
+        both = keep[:-1] & keep[1:]
+        codes, counts = reduce_codes(
+            ids[:-1][both] * size + ids[1:][both], np.ones(int(both.sum()), dtype=np.int64))
+        if len(ids) == 0:
+            return cls(vocabulary.words, np.zeros(0, dtype=np.int64), codes, counts)
+        return cls(vocabulary.words, np.bincount(ids, minlength=size), codes, counts,
+            (int(ids[0]), bool(keep[0])), (int(ids[-1]), bool(keep[-1])))
+
+    def is_empty(self):
+        return self.first is None
+
+    def merge(self, other):
+        """Counts of this run followed directly by the run of `other`."""
+        if other.is_empty():
+            return self
+        if self.is_empty():
+            return other
+        words = np.union1d(self.words, other.words)
+        size = len(words)
+        mapping = np.searchsorted(words, self.words)
+        other_mapping = np.searchsorted(words, other.words)
+
+        def recode(table, mapping):
+            rows, columns = np.divmod(table.codes, len(table.words))
+            return mapping[rows] * size + mapping[columns]
+
+        codes = [recode(self, mapping), recode(other, other_mapping)]
+        counts = [self.counts, other.counts]
+        # the bigram across the boundary of the two runs
+        (last, last_kept), (first, first_kept) = self.last, other.first
+        if last_kept and first_kept:
+            codes.append(np.array([mapping[last] * size + other_mapping[first]]))
+            counts.append(np.ones(1, dtype=np.int64))
+        codes, counts = reduce_codes(np.concatenate(codes), np.concatenate(counts))
+
+        unigrams = np.zeros(size, dtype=np.int64)
+        unigrams[mapping] += self.unigrams
+        unigrams[other_mapping] += other.unigrams
+        return CountTable(words, unigrams, codes, counts,
+            (int(mapping[self.first[0]]), self.first[1]),
+            (int(other_mapping[other.last[0]]), other.last[1]))
+
+    def bigram_counts(self):
+        """Returns `BigramCounts` of the table."""
+        return BigramCounts.from_codes(Vocabulary(self.words), self.unigrams, self.codes, self.counts)
+
+
+# === Corpus readers ============================================ #
+# Module level functions, so that workers can receive them pickled.
+
+def corpus_words(corpus_name, fileids, lowercase=False):
+    """Tokens of `fileids` of an NLTK corpus, ex. 'brown'."""
+    import nltk.corpus
+    words = getattr(nltk.corpus, corpus_name).words(fileids)
+    tokens = [word.lower() for word in words] if lowercase else list(words)
+    return tokens, None
+
+
+def count_shard(reader, fileids):
+    """Worker: count the tokens that `reader` returns for `fileids`."""
+    tokens, keep = reader(fileids)
+    return CountTable.from_tokens(tokens, keep)
+
+
+def _merge_pair(tables):
+    return tables[0].merge(tables[1]) if len(tables) == 2 else tables[0]
+
+
+def split_shards(fileids, shards):
+    """Split `fileids` into `shards` contiguous, near-equal runs."""
+    bounds = np.linspace(0, len(fileids), shards + 1).round().astype(int)
+    return [list(fileids[start:end]) for start, end in zip(bounds[:-1], bounds[1:]) if end > start]
+
+
+def pool_context():
+    """Multiprocessing context of the process pools of `common` and the scripts.
+    Forked workers are preferred: they share the tables the scripts have loaded, 
+    where spawned workers would import the scripts and load them again."""
+    if 'fork' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('fork')
+    return multiprocessing.get_context()
+
+
+def count_sharded(reader, fileids, processes=None, shards=None):
+    """Count the corpus behind `reader` shard by shard, in a process pool.
+
+    Args:
+        reader (Function): picklable, `reader(fileids)` returns a list of tokens 
+            and a keep mask (or None), ex. `functools.partial(corpus_words, 'brown')`.
+        fileids (List): file ids, in corpus order.
+        processes (Integer): size of the pool. Defaults to the number of cores.
+            With 1, everything is counted in this process.
+        shards (Integer): number of shards. Defaults to 4 per process, so 
+            uneven shards do not leave workers idle.
+
+    Returns:
+        table (CountTable): identical to counting all files in one run.
+    """
+    processes = processes or os.cpu_count() or 1
+    # Workers of a pool never start pools of their own.
+    if processes == 1 or multiprocessing.current_process().name != 'MainProcess':
+        return count_shard(reader, list(fileids))
+    shards = split_shards(list(fileids), shards or 4 * processes)
+    with pool_context().Pool(processes) as pool:
+        tables = pool.map(functools.partial(count_shard, reader), shards, chunksize=1)
+        # tree reduction over adjacent tables, keeping corpus order
+        while len(tables) > 1:
+            tables = pool.map(_merge_pair, [
+                tables[index:index + 2] for index in range(0, len(tables), 2)
+            ], chunksize=1)
+    return tables[0]
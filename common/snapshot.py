@@ -0,0 +1,158 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""On-disk snapshots of numpy arrays.
+
+A snapshot is a directory holding one `.npy` file per array and a
+`manifest.json` describing them. Arrays are memory-mapped on load, so
+reopening a snapshot costs a few milliseconds regardless of its size.
+Each snapshot is stamped with a key; a snapshot whose key differs from the
+requested one is treated as stale and rebuilt.
+"""
+
+import hashlib, json, os, shutil
+import numpy as np
+
+# Bump when the layout of the snapshot directory changes.
+FORMAT_VERSION = 1
+MANIFEST = 'manifest.json'
+
+
+def fingerprint(*parts):
+    """Stable hash of json-serializable settings.
+
+    Returns:
+        key (String): hex digest of `parts`.
+    """
+    blob = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha1(blob.encode('utf8')).hexdigest()
+
+
+def corpus_fingerprint(corpus):
+    """Describe the files behind an NLTK corpus reader.
+
+    File ids, sizes and modification times are included, so replacing or
+    editing the corpus data invalidates any snapshot built from it.
+
+    Returns:
+        description (List): [(fileid, size, mtime), ...]
+    """
+    description = []
+    for fileid in corpus.fileids():
+        pointer = corpus.abspath(fileid)
+        # Files inside a zip archive share the archive's modification time.
+        if hasattr(pointer, 'zipfile'):
+            mtime = os.stat(pointer.zipfile.filename).st_mtime
+        else:
+            mtime = os.stat(pointer.path).st_mtime
+        description.append((fileid, pointer.file_size(), mtime))
+    return description
+
+
+class Snapshot(object):
+    """Read-only view over the arrays of a snapshot directory.
+
+    Attributes:
+        path (String): snapshot directory.
+        key (String): key the snapshot was built for.
+        meta (Dictionary): json-serializable extras saved with the arrays.
+    """
+
+    def __init__(self, path, key, arrays, meta):
+        self.path = path
+        self.key = key
+        self.meta = meta
+        self._arrays = arrays
+
+    def __getitem__(self, name):
+        return self._arrays[name]
+
+    def __contains__(self, name):
+        return name in self._arrays
+
+    def keys(self):
+        return self._arrays.keys()
+
+
+def save_snapshot(path, key, arrays, meta=None):
+    """Write `arrays` to the snapshot directory `path`.
+
+    The snapshot is written next to its destination and renamed into
+    place, so readers never observe a half-written snapshot.
+
+    Args:
+        path (String): snapshot directory.
+        key (String): key to stamp the snapshot with.
+        arrays (Dictionary): name -> numpy array. Object arrays are not allowed,
+            since they cannot be memory-mapped.
+        meta (Dictionary): json-serializable extras.
+    """
+    parent = os.path.dirname(os.path.abspath(path))
+    os.makedirs(parent, exist_ok=True)
+    staging = "%s.tmp-%d" % (path, os.getpid())
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+
+    manifest = {
+        'version': FORMAT_VERSION,
+        'key': key,
+        'meta': meta or {},
+        'arrays': {},
+    }
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        if array.dtype.hasobject:
+            raise ValueError("array '%s' has object dtype" % name)
+        np.save(os.path.join(staging, name + '.npy'), array)
+        manifest['arrays'][name] = {
+            'dtype': array.dtype.str,
+            'shape': list(array.shape),
+        }
+    with open(os.path.join(staging, MANIFEST), 'w') as file:
+        json.dump(manifest, file, indent=2, sort_keys=True)
+
+    # Swap the new snapshot in, then drop the old one.
+    retired = "%s.old-%d" % (path, os.getpid())
+    if os.path.exists(path):
+        os.rename(path, retired)
+    os.rename(staging, path)
+    shutil.rmtree(retired, ignore_errors=True)
+
+
+def load_snapshot(path, key):
+    """Open the snapshot at `path` with memory-mapped arrays.
+
+    Returns:
+        snapshot (Snapshot): or None, if it does not exist, was written by
+            another format version, or was built for another key.
+    """
+    try:
+        with open(os.path.join(path, MANIFEST), 'r') as file:
+            manifest = json.load(file)
+    except (IOError, ValueError):
+        return None
+    if manifest.get('version') != FORMAT_VERSION or manifest.get('key') != key:
+        return None
+    arrays = dict()
+    for name in manifest['arrays']:
+        arrays[name] = np.load(os.path.join(path, name + '.npy'), mmap_mode='r')
+    return Snapshot(path, key, arrays, manifest['meta'])
+
+
+def cached_snapshot(path, key, build, rebuild=False):
+    """Load the snapshot at `path`, rebuilding it first if it is stale.
+
+    Args:
+        path (String): snapshot directory.
+        key (String): expected key, see `fingerprint`.
+        build (Function): returns `(arrays, meta)` for `save_snapshot`.
+        rebuild (Boolean): build even if the snapshot is up to date.
+
+    Returns:
+        snapshot (Snapshot)
+    """
+    snapshot = None if rebuild else load_snapshot(path, key)
+    if snapshot is None:
+        arrays, meta = build()
+        save_snapshot(path, key, arrays, meta)
+        snapshot = load_snapshot(path, key)
+    return snapshot
@@ -0,0 +1,293 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Streaming unigram and bigram counting over large plain-text files.
+
+Files are read in fixed-size chunks and tokenized chunk by chunk; counts
+are updated incrementally, so only one chunk of text is held in memory.
+Two counters are provided:
+
+    StreamCounter: exact counts. Memory grows with the number of distinct
+        words and bigrams.
+    SketchCounter: approximate counts in count-min sketches, plus the 
+        heaviest words and bigrams. Memory is fixed by its parameters, 
+        however large the input is.
+
+Both return `common.counts.BigramCounts`, so the mining code does not
+care which one produced its tables.
+"""
+
+import hashlib, re
+import numpy as np
+
+from common.counts import Vocabulary, BigramCounts, reduce_codes
+
+# Words (with inner hyphens or apostrophes), or single punctuation marks.
+TOKEN_PATTERN = re.compile(r"\w+(?:[-']\w+)*|[^\w\s]")
+# Whitespace in front of the last token of a chunk, which may be cut.
+TRAILING_TOKEN = re.compile(r"\s(?=\S*\Z)")
+# Default size of text chunks, in characters.
+CHUNK_SIZE = 1 << 24
+
+
+def read_chunks(paths, chunk_size=CHUNK_SIZE, encoding='utf8'):
+    """Yields text of `paths` in chunks of at most `chunk_size` characters."""
+    for path in paths:
+        with open(path, 'r', encoding=encoding, errors='replace') as file:
+            while True:
+                chunk = file.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+            # files are separated, even if one does not end with a newline.
+            yield '\n'
+
+
+def stream_tokens(paths, chunk_size=CHUNK_SIZE, lowercase=False):
+    """Yields lists of tokens of `paths`, one list per chunk of text.
+
+    A token cut by a chunk boundary is carried over to the next chunk.
+    """
+    rest = ''
+    for chunk in read_chunks(paths, chunk_size):
+        text = rest + chunk
+        match = TRAILING_TOKEN.search(text)
+        if match is None:
+            rest = text
+            continue
+        text, rest = text[:match.start()], text[match.end():]
+        if lowercase:
+            text = text.lower()
+        tokens = TOKEN_PATTERN.findall(text)
+        if tokens:
+            yield tokens
+    if rest:
+        yield TOKEN_PATTERN.findall(rest.lower() if lowercase else rest)
+
+
+class StreamCounter(object):
+    """Exact, incrementally updated unigram and bigram counts.
+
+    Words get ids in order of first appearance. Bigram counts of each chunk
+    are reduced with numpy and merged into the totals once enough of them
+    are pending.
+    """
+
+    def __init__(self, merge_every=1 << 24):
+        self.index = dict()
+        self.unigrams = np.zeros(0, dtype=np.int64)
+        self.tokens = 0
+        self.merge_every = merge_every
+        self._codes = []
+        self._counts = []
+        self._pending = 0
+        self._previous = None
+
+    def update(self, tokens):
+        """Add a list of consecutive tokens to the counts."""
+        if not tokens:
+            return
+        index = self.index
+        ids = np.fromiter(
+            (index.setdefault(token, len(index)) for token in tokens),
+            dtype=np.int64, count=len(tokens),
+        )
+        self.tokens += len(ids)
+        unigrams = np.bincount(ids, minlength=len(index))
+        unigrams[:len(self.unigrams)] += self.unigrams
+        self.unigrams = unigrams
+
+        # the bigram across the chunk boundary
+        if self._previous is not None:
+            ids = np.concatenate([[self._previous], ids])
+        self._previous = ids[-1]
+        codes, counts = reduce_codes((ids[:-1] << 32) | ids[1:], np.ones(len(ids) - 1, dtype=np.int64))
+        self._codes.append(codes)
+        self._counts.append(counts)
+        self._pending += len(codes)
+        if self._pending >= self.merge_every:
+            self._merge()
+
+    def _merge(self):
+        if len(self._codes) > 1:
+            codes, counts = reduce_codes(np.concatenate(self._codes), np.concatenate(self._counts))
+            self._codes, self._counts = [codes], [counts]
+        # counts codes added since, so merges stay `merge_every` codes apart
+        self._pending = 0
+
+    def counts(self):
+        """Returns `BigramCounts` over a sorted vocabulary."""
+        self._merge()
+        words = np.array(list(self.index), dtype=np.str_)
+        order = np.argsort(words, kind='stable')
+        rank = np.empty(len(order), dtype=np.int64)
+        rank[order] = np.arange(len(order))
+        codes = self._codes[0] if self._codes else np.zeros(0, dtype=np.int64)
+        counts = self._counts[0] if self._counts else np.zeros(0, dtype=np.int64)
+        codes = rank[codes >> 32] * len(words) + rank[codes & 0xFFFFFFFF]
+        order_ = np.argsort(codes)
+        return BigramCounts.from_codes(
+            Vocabulary(words[order]), self.unigrams[order], codes[order_], counts[order_])
+
+
+def hash_strings(strings):
+    """Stable 64-bit hashes of `strings`. Returns numpy uint64 array."""
+    return np.array([
+        int.from_bytes(hashlib.blake2b(string.encode('utf8'), digest_size=8).digest(), 'little')
+        for string in strings
+    ], dtype=np.uint64)
+
+
+def hash_pairs(left, right):
+    """Combine 64-bit hashes of bigram members into one hash."""
+    with np.errstate(over='ignore'):
+        return left * np.uint64(0x9E3779B97F4A7C15) + (right ^ (right >> np.uint64(29)))
+
+
+class CountMinSketch(object):
+    """Count-min sketch over 64-bit keys.
+
+    Estimates never undercount; with `depth` rows of `2 ** bits` counters,
+    overcounts stay below `e / 2 ** bits` of the total with probability
+    `1 - exp(-depth)`.
+    """
+
+    def __init__(self, bits=20, depth=4, seed=0):
+        self.bits = bits
+        self.table = np.zeros((depth, 1 << bits), dtype=np.int64)
+        random = np.random.RandomState(seed)
+        self.multipliers = random.randint(1, 1 << 62, size=depth).astype(np.uint64) * np.uint64(2) + np.uint64(1)
+
+    def _columns(self, keys):
+        # multiply-shift hashing, one multiplier per row
+        with np.errstate(over='ignore'):
+            mixed = np.asarray(keys, dtype=np.uint64)[None, :] * self.multipliers[:, None]
+        return (mixed >> np.uint64(64 - self.bits)).astype(np.int64)
+
+    def add(self, keys, counts):
+        columns = self._columns(keys)
+        for row in range(len(self.table)):
+            np.add.at(self.table[row], columns[row], counts)
+
+    def query(self, keys):
+        columns = self._columns(keys)
+        rows = np.arange(len(self.table))[:, None]
+        return self.table[rows, columns].min(axis=0)
+
+
+class HeavyHitters(object):
+    """The `size` keys with the largest sketch estimates seen so far."""
+
+    def __init__(self, sketch, size):
+        self.sketch = sketch
+        self.size = size
+        self.keys = np.zeros(0, dtype=np.uint64)
+        self.labels = dict()
+
+    def offer(self, keys, labels):
+        """Consider `keys` (unique), named by `labels`, after they were added 
+        to the sketch."""
+        candidates = np.concatenate([self.keys, keys])
+        candidate_labels = [self.labels[key] for key in self.keys.tolist()] + list(labels)
+        candidates, first = np.unique(candidates, return_index=True)
+        estimates = self.sketch.query(candidates)
+        if len(candidates) > self.size:
+            keep = np.argpartition(-estimates, self.size - 1)[:self.size]
+        else:
+            keep = np.arange(len(candidates))
+        self.keys = candidates[keep]
+        self.labels = {
+            key: candidate_labels[index]
+            for key, index in zip(self.keys.tolist(), first[keep].tolist())
+        }
+
+    def items(self):
+        """Returns list of (label, estimated count)."""
+        estimates = self.sketch.query(self.keys) if len(self.keys) else []
+        return [
+            (self.labels[key], int(estimate))
+            for key, estimate in zip(self.keys.tolist(), estimates)
+        ]
+
+
+class SketchCounter(object):
+    """Approximate unigram and bigram counts in bounded memory.
+
+    Every token and bigram is added to a count-min sketch; the `heavy_hitters`
+    words and bigrams with the largest estimates are tracked by name. Only
+    those can be listed afterwards, which is all the mining needs, since
+    rare words are filtered out by frequency anyway.
+    """
+
+    def __init__(self, bits=22, depth=4, heavy_hitters=200000, seed=0):
+        self.unigram_sketch = CountMinSketch(bits, depth, seed)
+        self.bigram_sketch = CountMinSketch(bits, depth, seed + 1)
+        self.top_unigrams = HeavyHitters(self.unigram_sketch, heavy_hitters)
+        self.top_bigrams = HeavyHitters(self.bigram_sketch, heavy_hitters)
+        self.tokens = 0
+        self._previous = None
+
+    def update(self, tokens):
+        """Add a list of consecutive tokens to the sketches."""
+        if not tokens:
+            return
+        self.tokens += len(tokens)
+        carried = self._previous is not None
+        if carried:
+            tokens = [self._previous] + tokens
+        self._previous = tokens[-1]
+        words, inverse = np.unique(np.array(tokens, dtype=np.str_), return_inverse=True)
+        hashes = hash_strings(words.tolist())
+
+        # unigrams, leaving out the token carried over from the last chunk
+        unigram_counts = np.bincount(inverse, minlength=len(words))
+        if carried:
+            unigram_counts[inverse[0]] -= 1
+        present = np.flatnonzero(unigram_counts)
+        self.unigram_sketch.add(hashes[present], unigram_counts[present])
+        self.top_unigrams.offer(hashes[present], words[present].tolist())
+
+        # bigrams
+        left, right = inverse[:-1], inverse[1:]
+        codes, counts = reduce_codes(left * len(words) + right, np.ones(len(left), dtype=np.int64))
+        left, right = np.divmod(codes, len(words))
+        bigram_hashes = hash_pairs(hashes[left], hashes[right])
+        self.bigram_sketch.add(bigram_hashes, counts)
+        self.top_bigrams.offer(bigram_hashes, list(zip(words[left].tolist(), words[right].tolist())))
+
+    def counts(self):
+        """Returns `BigramCounts` over the tracked words and bigrams, with 
+        estimated counts."""
+        bigrams = self.top_bigrams.items()
+        words = set(word for word, _ in self.top_unigrams.items())
+        for (word1, word2), _ in bigrams:
+            words.add(word1)
+            words.add(word2)
+        vocabulary = Vocabulary(np.array(sorted(words), dtype=np.str_))
+        unigrams = self.unigram_sketch.query(hash_strings(vocabulary.words.tolist())) \
+            if len(vocabulary) else np.zeros(0, dtype=np.int64)
+        codes = np.array([
+            vocabulary.index(word1) * len(vocabulary) + vocabulary.index(word2)
+            for (word1, word2), _ in bigrams
+        ], dtype=np.int64)
+        counts = np.array([count for _, count in bigrams], dtype=np.int64)
+        order = np.argsort(codes)
+        return BigramCounts.from_codes(vocabulary, unigrams, codes[order], counts[order])
+
+
+def count_stream(paths, approximate=False, chunk_size=CHUNK_SIZE, lowercase=False, **sketch):
+    """Count unigrams and bigrams of plain-text files in one streaming pass.
+
+    Args:
+        paths (List): plain-text files, read in order.
+        approximate (Boolean): use `SketchCounter` instead of `StreamCounter`.
+        chunk_size (Integer): characters read at a time.
+        lowercase (Boolean): lowercase tokens.
+        sketch: keyword arguments of `SketchCounter`.
+
+    Returns:
+        counts (BigramCounts)
+    """
+    counter = SketchCounter(**sketch) if approximate else StreamCounter()
+    for tokens in stream_tokens(paths, chunk_size, lowercase):
+        counter.update(tokens)
+    return counter.counts()
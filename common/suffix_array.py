@@ -0,0 +1,200 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Suffix-array n-gram index over an id-encoded token sequence.
+
+The suffixes of the sequence are sorted by their first `depth` tokens, and
+the LCP array holds the length (up to `depth`) of the prefix each suffix
+shares with the one before it. The occurrences of any n-gram (n <= depth)
+are then one contiguous range of the suffix array, found by binary search
+one token at a time; its frequency is the size of the range, and its
+right extensions are the next column of that range, already sorted. A
+second suffix array over the reversed sequence answers left extensions.
+
+Tokens with id -1 are boundaries: no n-gram is counted across them.
+"""
+
+import bisect, os
+import numpy as np
+
+from common.snapshot import cached_snapshot, fingerprint
+
+# Bump when the layout of the index changes.
+INDEX_VERSION = 1
+# Longest n-gram the default index answers.
+MAX_N = 5
+BOUNDARY = -1
+
+
+class _Column(object):
+    """Token `j` of every sorted suffix, read one row at a time, so that
+    `bisect` probes only O(log n) rows."""
+
+    def __init__(self, tokens, suffixes, j):
+        self.tokens = tokens
+        self.suffixes = suffixes
+        self.j = j
+
+    def __len__(self):
+        return len(self.suffixes)
+
+    def __getitem__(self, row):
+        return int(self.tokens[self.suffixes[row] + self.j])
+
+
+class SuffixArray(object):
+    """Suffixes of `tokens` sorted by their first `depth` tokens.
+
+    Attributes:
+        tokens (numpy.ndarray): token ids, padded with `depth` boundaries.
+        suffixes (numpy.ndarray): start positions, in sorted order.
+        lcp (numpy.ndarray): prefix length shared with the previous suffix.
+        depth (Integer): longest n-gram answered.
+    """
+
+    def __init__(self, tokens, suffixes, lcp, depth):
+        self.tokens = tokens
+        self.suffixes = suffixes
+        self.lcp = lcp
+        self.depth = depth
+
+    @classmethod
+    def build(cls, ids, depth=MAX_N):
+        """Sort the suffixes of `ids` (int array, -1 for boundaries)."""
+        ids = np.asarray(ids, dtype=np.int32)
+        tokens = np.concatenate([ids, np.full(depth, BOUNDARY, dtype=np.int32)])
+        positions = np.arange(len(ids), dtype=np.int64)
+        # boundaries sort first, and every column compares as a whole id
+        suffixes = positions[np.lexsort([tokens[positions + j] for j in reversed(range(depth))])]
+        lcp = np.zeros(len(suffixes), dtype=np.int8)
+        alive = np.ones(max(len(suffixes) - 1, 0), dtype=bool)
+        for j in range(depth):
+            previous, current = tokens[suffixes[:-1] + j], tokens[suffixes[1:] + j]
+            alive &= (previous == current) & (current != BOUNDARY)
+            lcp[1:] += alive
+        return cls(tokens, suffixes, lcp, depth)
+
+    def column(self, j, start=0, end=None):
+        """Token `j` of the suffixes in sorted rows `start:end`."""
+        return self.tokens[self.suffixes[start:end] + j]
+
+    def find(self, ngram):
+        """Rows `start:end` of the suffixes starting with `ngram`."""
+        if len(ngram) > self.depth:
+            raise ValueError("n-grams of this index are at most %d tokens long" % self.depth)
+        start, end = 0, len(self.suffixes)
+        for j, token in enumerate(ngram):
+            if token < 0 or start >= end:
+                return start, start
+            column = _Column(self.tokens, self.suffixes, j)
+            start, end = (bisect.bisect_left(column, token, start, end),
+                bisect.bisect_right(column, token, start, end))
+        return start, end
+
+    def count(self, ngram):
+        start, end = self.find(ngram)
+        return end - start
+
+    def extensions(self, ngram, min_count=1):
+        """Tokens following `ngram`, with the count of each extended n-gram.
+        Takes time in the number of occurrences of `ngram`.
+
+        Returns:
+            tokens, counts (numpy.ndarray): by token id.
+        """
+        start, end = self.find(ngram)
+        column = self.column(len(ngram), start, end)
+        column = column[column != BOUNDARY]
+        if len(column) == 0:
+            return column, np.zeros(0, dtype=np.int64)
+        starts = np.flatnonzero(np.concatenate([[True], column[1:] != column[:-1]]))
+        counts = np.diff(np.concatenate([starts, [len(column)]]))
+        keep = counts >= min_count
+        return column[starts][keep], counts[keep]
+
+    def ngrams(self, n, min_count=1):
+        """Every n-gram occurring at least `min_count` times.
+
+        Returns:
+            ngrams (numpy.ndarray): one row of n token ids per n-gram, sorted.
+            counts (numpy.ndarray): count of each n-gram.
+        """
+        if n > self.depth:
+            raise ValueError("n-grams of this index are at most %d tokens long" % self.depth)
+        starts = np.flatnonzero(self.lcp < n)
+        counts = np.diff(np.concatenate([starts, [len(self.suffixes)]]))
+        firsts = self.suffixes[starts]
+        ngrams = np.stack([self.tokens[firsts + j] for j in range(n)], axis=1) \
+            if len(firsts) else np.zeros((0, n), dtype=np.int32)
+        keep = (ngrams != BOUNDARY).all(axis=1) & (counts >= min_count)
+        return ngrams[keep], counts[keep]
+
+
+class NgramIndex(object):
+    """Forward and backward suffix arrays of one token sequence.
+
+    Attributes:
+        vocabulary (Vocabulary): the tokens of the ids, if given. Ids
+            of other tables must be mapped by key to query the index.
+    """
+
+    def __init__(self, forward, backward, vocabulary=None):
+        self.forward = forward
+        self.backward = backward
+        self.vocabulary = vocabulary
+
+    @classmethod
+    def build(cls, ids, depth=MAX_N, vocabulary=None):
+        ids = np.asarray(ids, dtype=np.int32)
+        return cls(SuffixArray.build(ids, depth), SuffixArray.build(ids[::-1], depth), vocabulary)
+
+    def arrays(self):
+        """Returns dictionary of arrays to save with `common.snapshot`."""
+        arrays = {}
+        for name, index in [('forward', self.forward), ('backward', self.backward)]:
+            arrays[name + '_suffixes'] = index.suffixes
+            arrays[name + '_lcp'] = index.lcp
+        arrays['tokens'] = self.forward.tokens
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays, depth, vocabulary=None):
+        tokens = arrays['tokens']
+        ids = tokens[:len(tokens) - depth]
+        backward_tokens = np.concatenate([ids[::-1], tokens[len(tokens) - depth:]])
+        return cls(
+            SuffixArray(tokens, arrays['forward_suffixes'], arrays['forward_lcp'], depth),
+            SuffixArray(backward_tokens, arrays['backward_suffixes'], arrays['backward_lcp'], depth),
+            vocabulary,
+        )
+
+    @classmethod
+    def load(cls, ids, source_key, cache_dir, name='ngram_index', depth=MAX_N, rebuild=False,
+            vocabulary=None):
+        """Load the index of `ids` under `cache_dir`, building it if the
+        sequence it was built from (`source_key`) has changed, or if `rebuild`.
+        `vocabulary` is kept as is, see the class docstring."""
+        key = fingerprint(INDEX_VERSION, source_key, depth)
+        def build():
+            return cls.build(ids, depth).arrays(), {'tokens': len(ids), 'depth': depth}
+        snapshot = cached_snapshot(os.path.join(cache_dir, name), key, build, rebuild)
+        return cls.from_arrays(snapshot, depth, vocabulary)
+
+    @property
+    def depth(self):
+        return self.forward.depth
+
+    def count(self, ngram):
+        """Frequency of `ngram`, a sequence of token ids."""
+        return self.forward.count(ngram)
+
+    def right(self, ngram, min_count=1):
+        """Tokens following `ngram` at least `min_count` times, with counts."""
+        return self.forward.extensions(ngram, min_count)
+
+    def left(self, ngram, min_count=1):
+        """Tokens preceding `ngram` at least `min_count` times, with counts."""
+        return self.backward.extensions(list(ngram)[::-1], min_count)
+
+    def ngrams(self, n, min_count=1):
+        """Every n-gram occurring at least `min_count` times, with counts."""
+        return self.forward.ngrams(n, min_count)
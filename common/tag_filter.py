@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Part-of-speech pair filters compiled into boolean tag-by-tag matrices.
+
+A rule blocks bigrams whose first tag is in `first` and whose second tag
+is in `second` ('*' stands for every tag), optionally unless the first
+or second word is one of a few exception words. Rules are compiled once
+into an allow-matrix over tag ids, so filtering any number of bigrams
+is a single fancy-indexing of that matrix. Rules with exception words get
+a matrix of their own, applied together with a word-membership mask.
+
+Rule sets are json files:
+
+    {
+        "tags": ["ADJ", "ADV", ...],
+        "rules": [
+            {"first": "*", "second": ["ADP"]},
+            {"first": ["NUM"], "second": "*", "unless_first": ["thousand"]},
+            ...
+        ]
+    }
+"""
+
+import json
+import numpy as np
+
+# The 12 tags of the universal tagset.
+UNIVERSAL_TAGS = ['.', 'ADJ', 'ADP', 'ADV', 'CONJ', 'DET', 'NOUN', 'NUM', 'PRON', 'PRT', 'VERB', 'X']
+
+
+class TagPairFilter(object):
+    """Compiled rule set.
+
+    Attributes:
+        tags (List): tag of each tag id.
+        allow (numpy.ndarray): `allow[t1, t2]` is False if a rule without
+            exception words blocks the tag pair.
+        exceptions (List): (blocked matrix, first words, second words) of
+            each rule with exception words.
+    """
+
+    def __init__(self, tags, allow, exceptions=()):
+        self.tags = list(tags)
+        self.allow = allow
+        self.exceptions = list(exceptions)
+        self._ids = dict((tag, index) for index, tag in enumerate(self.tags))
+
+    @classmethod
+    def from_rules(cls, rules, tags=None):
+        """Compile a list of rule dictionaries, see the module docstring."""
+        tags = list(tags or UNIVERSAL_TAGS)
+        allow = np.ones((len(tags), len(tags)), dtype=bool)
+        exceptions = []
+
+        def select(names):
+            mask = np.zeros(len(tags), dtype=bool)
+            if names == '*':
+                mask[:] = True
+                return mask
+            for name in ([names] if isinstance(names, str) else names):
+                if name not in tags:
+                    raise ValueError("unknown tag %r in tag pair rule" % name)
+                mask[tags.index(name)] = True
+            return mask
+
+        for rule in rules:
+            blocked = np.outer(select(rule['first']), select(rule['second']))
+            first_words, second_words = rule.get('unless_first'), rule.get('unless_second')
+            if first_words or second_words:
+                exceptions.append((blocked,
+                    np.array(first_words or [], dtype=np.str_),
+                    np.array(second_words or [], dtype=np.str_)))
+            else:
+                allow &= ~blocked
+        return cls(tags, allow, exceptions)
+
+    @classmethod
+    def load(cls, path):
+        """Compile the rule set of a json file."""
+        with open(path, 'r', encoding='utf8') as file:
+            config = json.load(file)
+        return cls.from_rules(config['rules'], config.get('tags'))
+
+    def tag_ids(self, tags):
+        """Ids of `tags`. Raises ValueError for tags outside the rule set."""
+        try:
+            return np.array([self._ids[tag] for tag in tags], dtype=np.int64)
+        except KeyError as error:
+            raise ValueError("tag %s is not in the rule set" % error)
+
+    def mask(self, first_tags, second_tags, first_words=None, second_words=None):
+        """Which bigrams pass the filter.
+
+        Args:
+            first_tags, second_tags (numpy.ndarray): tag ids of the bigrams.
+            first_words, second_words (numpy.ndarray): words of the bigrams,
+                needed only if some rule has exception words.
+
+        Returns:
+            mask (numpy.ndarray): boolean, True for bigrams to keep.
+        """
+        mask = self.allow[first_tags, second_tags]
+        for blocked, first_exceptions, second_exceptions in self.exceptions:
+            hit = blocked[first_tags, second_tags]
+            if len(first_exceptions):
+                hit &= ~np.isin(first_words, first_exceptions)
+            if len(second_exceptions):
+                hit &= ~np.isin(second_words, second_exceptions)
+            mask &= ~hit
+        return mask
@@ -0,0 +1,170 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Columnar, memory-mapped store of a POS-tagged corpus.
+
+The tagged sentences of an NLTK corpus are converted once into parallel
+token columns (word id, lowercased word id, tag id) and sentence offsets,
+with the word, lowercased word and tag vocabularies saved alongside (see
+`common.snapshot`). Later runs map the arrays instead of parsing the
+corpus files and mapping tags to the tagset again.
+
+Convert ahead of time with
+
+    $ python -m common.tagged_store brown --cache-dir cache
+"""
+
+import argparse, os
+import numpy as np
+
+from common.snapshot import cached_snapshot, corpus_fingerprint, fingerprint
+from common.counts import Vocabulary, BigramCounts, reduce_codes, tagged_key
+
+# Bump when the layout of the store changes.
+STORE_VERSION = 1
+
+
+def build_tagged_store(corpus, tagset='universal'):
+    """Convert `corpus.tagged_sents(tagset=tagset)` into columns.
+
+    Returns:
+        arrays (Dictionary), meta (Dictionary): for `common.snapshot`.
+    """
+    words, tags, lengths = [], [], []
+    for sentence in corpus.tagged_sents(tagset=tagset):
+        lengths.append(len(sentence))
+        for word, tag in sentence:
+            words.append(word)
+            tags.append(tag)
+    vocabulary, word_ids = Vocabulary.from_tokens(words)
+    lower_vocabulary, lower_of_word = Vocabulary.from_tokens(np.char.lower(vocabulary.words))
+    tag_names, tag_ids = np.unique(np.asarray(tags, dtype=np.str_), return_inverse=True)
+    sentence_offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=sentence_offsets[1:])
+    arrays = {
+        'words': vocabulary.words,
+        'lower_words': lower_vocabulary.words,
+        'tags': tag_names,
+        'word_ids': word_ids,
+        'lower_ids': lower_of_word[word_ids].astype(np.int32),
+        'tag_ids': tag_ids.astype(np.uint8),
+        'sentence_offsets': sentence_offsets,
+    }
+    return arrays, {'tokens': len(words), 'sentences': len(lengths), 'tagset': tagset}
+
+
+class TaggedStore(object):
+    """Tagged sentences of a corpus, read from memory-mapped columns.
+
+    Attributes:
+        words, lower_words (Vocabulary): word forms, and lowercased ones.
+        tags (numpy.ndarray): tag of each tag id.
+        word_ids, lower_ids, tag_ids (numpy.ndarray): one entry per token.
+        sentence_offsets (numpy.ndarray): tokens of sentence i are
+            `sentence_offsets[i]:sentence_offsets[i + 1]`.
+    """
+
+    def __init__(self, arrays):
+        self.words = Vocabulary(arrays['words'])
+        self.lower_words = Vocabulary(arrays['lower_words'])
+        self.tags = arrays['tags']
+        self.word_ids = arrays['word_ids']
+        self.lower_ids = arrays['lower_ids']
+        self.tag_ids = arrays['tag_ids']
+        self.sentence_offsets = arrays['sentence_offsets']
+        # key of the snapshot, for indexes built on top of the store
+        self.key = getattr(arrays, 'key', None)
+
+    @classmethod
+    def load(cls, corpus, cache_dir, name, tagset='universal', rebuild=False):
+        """Load the store of `corpus` under `cache_dir`, converting the corpus
+        first if its files have changed since, or if `rebuild`."""
+        key = fingerprint(STORE_VERSION, name, tagset, corpus_fingerprint(corpus))
+        snapshot = cached_snapshot(os.path.join(cache_dir, '%s-%s' % (name, tagset)), key,
+            lambda: build_tagged_store(corpus, tagset), rebuild)
+        return cls(snapshot)
+
+    def __len__(self):
+        return len(self.sentence_offsets) - 1
+
+    def sentence(self, index):
+        """Returns sentence `index` as a list of (word, tag) tuples."""
+        start, end = self.sentence_offsets[index], self.sentence_offsets[index + 1]
+        return list(zip(
+            self.words.words[self.word_ids[start:end]].tolist(),
+            self.tags[self.tag_ids[start:end]].tolist(),
+        ))
+
+    def sentences(self, batch_size=4096):
+        """Yields all sentences, as `sentence` does, decoding `batch_size` at a time."""
+        for first in range(0, len(self), batch_size):
+            last = min(first + batch_size, len(self))
+            start, end = self.sentence_offsets[first], self.sentence_offsets[last]
+            tagged_words = list(zip(
+                self.words.words[self.word_ids[start:end]].tolist(),
+                self.tags[self.tag_ids[start:end]].tolist(),
+            ))
+            bounds = (self.sentence_offsets[first:last + 1] - start).tolist()
+            for begin, finish in zip(bounds[:-1], bounds[1:]):
+                yield tagged_words[begin:finish]
+
+    def tagged_key_ids(self, lowercase=True):
+        """Encode every token as its `tagged_key`.
+
+        Returns:
+            vocabulary (Vocabulary): sorted 'word/TAG' keys.
+            ids (numpy.ndarray): key id of each token.
+        """
+        ids = (self.lower_ids if lowercase else self.word_ids).astype(np.int64)
+        words = self.lower_words if lowercase else self.words
+        key_codes, token_keys = np.unique(ids * len(self.tags) + self.tag_ids, return_inverse=True)
+        word_of_key, tag_of_key = np.divmod(key_codes, len(self.tags))
+        keys = np.array([
+            tagged_key(word, tag) for word, tag
+            in zip(words.words[word_of_key].tolist(), self.tags[tag_of_key].tolist())
+        ], dtype=np.str_)
+        # rank of each key in sorted order, so that ids index a Vocabulary
+        order = np.argsort(keys, kind='stable')
+        rank = np.empty(len(keys), dtype=np.int64)
+        rank[order] = np.arange(len(keys))
+        return Vocabulary(keys[order]), rank[token_keys.ravel()]
+
+    def tagged_bigram_counts(self, lowercase=True, skip_tags=('.',)):
+        """Count `tagged_key` unigrams and bigrams over the whole corpus.
+
+        Bigrams touching a token tagged with one of `skip_tags` are not
+        counted.
+
+        Returns:
+            counts (BigramCounts): over a 'word/TAG' vocabulary.
+        """
+        vocabulary, token_keys = self.tagged_key_ids(lowercase)
+        size = len(vocabulary)
+        keep = self.kept(skip_tags)
+        both = keep[:-1] & keep[1:]
+        codes, counts = reduce_codes(
+            token_keys[:-1][both] * size + token_keys[1:][both],
+            np.ones(int(both.sum()), dtype=np.int64))
+        unigrams = np.bincount(token_keys, minlength=size)
+        return BigramCounts.from_codes(vocabulary, unigrams, codes, counts)
+
+    def kept(self, skip_tags=('.',)):
+        """Returns boolean array, False for tokens tagged with one of `skip_tags`."""
+        return ~np.isin(self.tags[self.tag_ids], list(skip_tags))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert a tagged NLTK corpus into a columnar store.")
+    parser.add_argument('corpus', help="name of the NLTK corpus, ex. brown")
+    parser.add_argument('--tagset', default='universal')
+    parser.add_argument('--cache-dir', default='cache')
+    parser.add_argument('--rebuild', action='store_true')
+    args = parser.parse_args(argv)
+    import nltk.corpus
+    store = TaggedStore.load(getattr(nltk.corpus, args.corpus), args.cache_dir,
+        args.corpus, args.tagset, args.rebuild)
+    print("%d sentences, %d tokens, %d word forms, %d tags" % (
+        len(store), len(store.word_ids), len(store.words), len(store.tags)))
+
+
+if __name__ == '__main__':
+    main()
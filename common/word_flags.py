@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Per-word bit flags over a vocabulary.
+
+For every word id, one byte records the WordNet parts of speech of the
+word (as `wordnet.synsets(word)` reports them, so inflected forms count),
+whether it is a stopword, and whether it is alphabetic. Filtering a set
+of word ids is then a single mask over this table.
+"""
+
+import os
+import numpy as np
+
+from common.snapshot import cached_snapshot, corpus_fingerprint, fingerprint
+
+# Bump when the meaning of the bits changes.
+FLAGS_VERSION = 1
+
+NOUN = 1 << 0
+VERB = 1 << 1
+ADJ = 1 << 2
+ADJ_SAT = 1 << 3
+ADV = 1 << 4
+STOPWORD = 1 << 5
+ALPHA = 1 << 6
+
+# WordNet synset pos -> bit
+POS_BITS = {
+    'n': NOUN,
+    'v': VERB,
+    'a': ADJ,
+    's': ADJ_SAT,
+    'r': ADV,
+}
+
+
+def build_word_flags(words, wordnet, stopwords):
+    """Compute the flags of each word in `words`.
+
+    WordNet is only consulted for alphabetic words that are not stopwords,
+    which are the only ones the pipelines keep.
+
+    Returns:
+        flags (numpy.ndarray): uint8 array aligned with `words`.
+    """
+    stopwords = set(stopwords)
+    flags = np.zeros(len(words), dtype=np.uint8)
+    for index, word in enumerate(words):
+        word = str(word)
+        flag = 0
+        if word.isalpha():
+            flag |= ALPHA
+        if word in stopwords:
+            flag |= STOPWORD
+        if flag == ALPHA:
+            for synset in wordnet.synsets(word):
+                flag |= POS_BITS[synset.pos()]
+        flags[index] = flag
+    return flags
+
+
+def load_word_flags(vocabulary, vocabulary_key, wordnet, stopwords, cache_dir,
+        name='word_flags', rebuild=False):
+    """Load the flags of `vocabulary`, building and persisting them on first use.
+
+    Args:
+        vocabulary (Vocabulary): words to describe.
+        vocabulary_key (String): key of the snapshot `vocabulary` came from.
+        wordnet: NLTK WordNet corpus reader.
+        stopwords (List): stopword list.
+        cache_dir (String): directory for the snapshot.
+        name (String): name of the snapshot in `cache_dir`.
+        rebuild (Boolean): build even if the snapshot is up to date.
+
+    Returns:
+        flags (numpy.ndarray): uint8 array indexed by word id.
+    """
+    key = fingerprint(FLAGS_VERSION, vocabulary_key, wordnet.get_version(),
+        corpus_fingerprint(wordnet), sorted(stopwords))
+    def build():
+        return {'flags': build_word_flags(vocabulary.words, wordnet, stopwords)}, {}
+    return cached_snapshot(os.path.join(cache_dir, name), key, build, rebuild)['flags']
@@ -0,0 +1,121 @@
+import os, sys
+
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+# The homework scripts import `common` from the repository root, and the
+# HW2 query server imports the HW2 script from its directory. The tests
+# import the HW1 script from its directory too.
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'HW1'))
+sys.path.insert(0, os.path.join(ROOT, 'HW2'))
+
+from common.incremental import IncrementalCounts
+from common.tagged_store import TaggedStore, build_tagged_store
+
+# (name, definition, lemma names) of the synsets of the `wordnet` fixture.
+SYNSETS = [
+    ('very.r.01', 'used as intensifiers; to a high degree or extent', ['very', 'really', 'real']),
+    ('highly.r.01', 'to a high degree or extent; favorably or with much respect', ['highly']),
+    ('extremely.r.01', 'to an extreme degree', ['extremely', 'exceedingly']),
+    ('quickly.r.01', 'with rapid movements', ['quickly', 'rapidly', 'fast']),
+    ('more.r.01', 'comparative of much; to a greater degree or extent', ['more']),
+    ('high.a.01', 'greater than normal in degree or intensity or amount', ['high']),
+    ('black.a.01', 'being of the achromatic color of maximum darkness', ['black', 'bleak']),
+    ('dark.s.01', 'devoid of or deficient in light or brightness', ['dark', 'black']),
+    ('night.n.01', 'the time after sunset and before sunrise while it is dark outside', ['night', 'nighttime', 'dark']),
+    ('intensifier.n.01', 'a modifier that has little meaning except to intensify the meaning it modifies', ['intensifier', 'intensive']),
+    ('run.v.01', 'move fast by using one\'s feet', ['run']),
+    ('increase.v.01', 'become bigger or greater in amount or degree', ['increase']),
+    ('race.v.01', 'to move fast', ['race', 'run', 'rush', 'hasten', 'speed']),
+    ('pitch_black.s.01', 'extremely dark', ['pitch-black', 'pitch_black', 'coal-black', 'jet-black']),
+]
+
+
+class Synset(object):
+    def __init__(self, name, definition, lemma_names):
+        self._name = name
+        self._definition = definition
+        self._lemma_names = lemma_names
+
+    def name(self):
+        return self._name
+
+    def pos(self):
+        return self._name.split('.')[1]
+
+    def definition(self):
+        return self._definition
+
+    def lemma_names(self):
+        return list(self._lemma_names)
+
+
+class WordNet(object):
+    """Stand-in for the NLTK WordNet reader, over `SYNSETS` and a data file
+    at `path`. `synsets` strips a final 's', as a rough `morphy`."""
+
+    def __init__(self, path, synsets=SYNSETS):
+        self.path = path
+        self._synsets = [Synset(*synset) for synset in synsets]
+        self.lookups = 0
+
+    def all_synsets(self, pos=None):
+        return [synset for synset in self._synsets if pos is None or synset.pos() == pos]
+
+    def all_lemma_names(self):
+        return [lemma.lower() for synset in self._synsets for lemma in synset.lemma_names()]
+
+    def synsets(self, word, pos=None):
+        self.lookups += 1
+        forms = {word.lower(), word.lower()[:-1] if word.endswith('s') else word.lower()}
+        return [
+            synset for synset in self.all_synsets(pos)
+            if forms & set(lemma.lower() for lemma in synset.lemma_names())
+        ]
+
+    def get_version(self):
+        return '3.0'
+
+    def fileids(self):
+        return ['data']
+
+    def abspath(self, fileid):
+        import nltk.data
+        return nltk.data.FileSystemPathPointer(self.path)
+
+
+@pytest.fixture
+def wordnet(tmp_path):
+    path = tmp_path / 'wordnet-data'
+    path.write_text('\n'.join(definition for name, definition, lemmas in SYNSETS))
+    return WordNet(str(path))
+
+
+class Corpus(object):
+    def __init__(self, sentences):
+        self.sentences = sentences
+
+    def tagged_sents(self, tagset=None):
+        return self.sentences
+
+
+@pytest.fixture
+def hw2(request, tmp_path, monkeypatch):
+    """HW2 script over the tagged sentences `SENTENCES` of the test module,
+    with its tables under `tmp_path`."""
+    import CS372_HW2_code_20170305 as hw2
+    accessors = [hw2.get_bigram_counts, hw2.get_vocabulary_columns, hw2.get_adjacency_index,
+        hw2.get_content_mask, hw2.get_ngram_index, hw2.load_intensifiers, hw2.load_definition_intensity]
+    store = TaggedStore(build_tagged_store(Corpus(request.module.SENTENCES))[0])
+    tables = IncrementalCounts.load(str(tmp_path / 'tagged_counts'), 'key', store.tagged_bigram_counts)
+    monkeypatch.setattr(hw2, 'CACHE_DIR', str(tmp_path))
+    monkeypatch.setattr(hw2, 'load_tagged_store', lambda: store)
+    monkeypatch.setattr(hw2, 'load_count_tables', lambda: tables)
+    monkeypatch.setattr(hw2, 'get_stopwords', lambda: ('the', 'a', 'it', 'was'))
+    monkeypatch.setattr(hw2, '_score_caches', dict())
+    for accessor in accessors:
+        accessor.cache_clear()
+    yield hw2
+    for accessor in accessors:
+        accessor.cache_clear()
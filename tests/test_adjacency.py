@@ -0,0 +1,56 @@
+import random
+
+import numpy as np
+import pytest
+
+from common.adjacency import AdjacencyIndex
+from common.counts import BigramCounts, Vocabulary
+
+
+def bigram_counts(size=3000, seed=0):
+    rng = random.Random(seed)
+    words = ['w%d' % index for index in range(40)]
+    # skewed, so counts spread over a wide range
+    tokens = [words[min(int(rng.expovariate(0.15)), 39)] for _ in range(size)]
+    vocabulary, ids = Vocabulary.from_tokens(tokens)
+    return BigramCounts.from_ids(vocabulary, ids)
+
+
+def naive_neighbors(matrix, index, min_count):
+    """(neighbor, count) of row `index`, by decreasing count then id."""
+    row = matrix[index]
+    return sorted(
+        ((neighbor, int(row[neighbor])) for neighbor in np.flatnonzero(row) if row[neighbor] >= min_count),
+        key=lambda item: (-item[1], item[0]))
+
+
+@pytest.mark.parametrize('reverse', [False, True])
+@pytest.mark.parametrize('min_count', [0, 1, 3, 20, 10 ** 6])
+def test_queries_match_naive_neighbors(reverse, min_count):
+    counts = bigram_counts()
+    index = AdjacencyIndex(counts)
+    dense = counts.forward.toarray()
+    if reverse:
+        dense = dense.T
+    ids = [5, 0, 5, len(dense) - 1]
+    lookup = index.left if reverse else index.right
+    sources, neighbors, found = lookup(ids, min_count)
+    expected = [(source, neighbor, count) for source in ids
+        for neighbor, count in naive_neighbors(dense, source, min_count)]
+    assert list(zip(sources.tolist(), neighbors.tolist(), found.tolist())) == expected
+
+
+def test_thresholds_per_query():
+    counts = bigram_counts()
+    index = AdjacencyIndex(counts)
+    dense = counts.forward.toarray()
+    sources, neighbors, found = index.right([1, 2], [2, 5])
+    expected = [(1, neighbor, count) for neighbor, count in naive_neighbors(dense, 1, 2)]
+    expected += [(2, neighbor, count) for neighbor, count in naive_neighbors(dense, 2, 5)]
+    assert list(zip(sources.tolist(), neighbors.tolist(), found.tolist())) == expected
+
+
+def test_empty_query():
+    index = AdjacencyIndex(bigram_counts())
+    sources, neighbors, found = index.right([])
+    assert len(sources) == len(neighbors) == len(found) == 0
@@ -0,0 +1,77 @@
+import random
+
+import numpy as np
+import pytest
+from nltk.metrics import BigramAssocMeasures
+
+from common.association import association_scores, contingency
+from common.counts import BigramCounts, Vocabulary
+
+# measure name -> the nltk measure it follows
+NLTK_MEASURES = {
+    'pmi': BigramAssocMeasures.pmi,
+    'llr': BigramAssocMeasures.likelihood_ratio,
+    't': BigramAssocMeasures.student_t,
+    'chi2': BigramAssocMeasures.chi_sq,
+    'dice': BigramAssocMeasures.dice,
+}
+
+
+def bigram_counts(size=3000, seed=0):
+    rng = random.Random(seed)
+    words = ['the', 'black', 'pitch', 'night', 'stark', 'naked', 'very']
+    tokens = [rng.choice(words) for _ in range(size)]
+    # a few strong collocations
+    for index in range(0, size - 1, 37):
+        tokens[index:index + 2] = ['pitch', 'black']
+    vocabulary, ids = Vocabulary.from_tokens(tokens)
+    return BigramCounts.from_ids(vocabulary, ids)
+
+
+def seen_pairs(counts):
+    matrix = counts.forward.tocoo()
+    return matrix.row.astype(np.int64), matrix.col.astype(np.int64)
+
+
+def test_contingency_cells():
+    counts = bigram_counts()
+    fronts, backs = seen_pairs(counts)
+    o11, o12, o21, o22 = contingency(counts, fronts, backs)
+    dense = counts.forward.toarray()
+    assert np.array_equal(o11, dense[fronts, backs])
+    assert np.array_equal(o11 + o12, dense.sum(axis=1)[fronts])
+    assert np.array_equal(o11 + o21, dense.sum(axis=0)[backs])
+    assert np.all(o11 + o12 + o21 + o22 == dense.sum())
+
+
+def test_unknown_ids_have_empty_marginals():
+    counts = bigram_counts()
+    o11, o12, o21, o22 = contingency(counts, [-1, 0], [0, -1])
+    assert o11.tolist() == [0, 0]
+    assert o12[0] == 0 and o21[1] == 0
+
+
+@pytest.mark.parametrize('name', sorted(NLTK_MEASURES))
+def test_measures_match_nltk(name):
+    counts = bigram_counts()
+    fronts, backs = seen_pairs(counts)
+    o11, o12, o21, o22 = contingency(counts, fronts, backs)
+    expected = [
+        NLTK_MEASURES[name](int(a), (int(a + b), int(a + c)), int(a + b + c + d))
+        for a, b, c, d in zip(o11, o12, o21, o22)
+    ]
+    scores = association_scores(counts, fronts, backs, measures=[name])[name]
+    assert np.allclose(scores, expected)
+
+
+def test_npmi_bounds():
+    counts = bigram_counts()
+    fronts, backs = seen_pairs(counts)
+    scores = association_scores(counts, np.append(fronts, -1), np.append(backs, 0), ['npmi'])['npmi']
+    assert np.all((scores >= -1) & (scores <= 1))
+    assert scores[-1] == -1
+
+
+def test_unknown_measure():
+    with pytest.raises(ValueError):
+        association_scores(bigram_counts(), [0], [0], measures=['pmi', 'nope'])
@@ -0,0 +1,75 @@
+import random
+from collections import Counter
+
+import numpy as np
+
+from common.counts import BigramCounts, Vocabulary, reduce_codes, split_tagged_key, tagged_key
+
+
+def corpus(size=2000, seed=0):
+    rng = random.Random(seed)
+    return [rng.choice(['the', 'black', 'pitch', 'night', 'a/b', 'Dark']) for _ in range(size)]
+
+
+def test_vocabulary_lookups():
+    vocabulary, ids = Vocabulary.from_tokens(['b', 'a', 'c', 'a'])
+    assert list(vocabulary.words) == ['a', 'b', 'c']
+    assert ids.tolist() == [1, 0, 2, 0]
+    assert vocabulary.index('c') == 2 and vocabulary.index('z') == -1
+    assert 'a' in vocabulary and 'z' not in vocabulary
+    assert vocabulary.indices(['c', 'z', 'a']).tolist() == [2, -1, 0]
+    assert Vocabulary(np.array([], dtype=np.str_)).indices(['a']).tolist() == [-1]
+
+
+def test_reduce_codes():
+    codes, counts = reduce_codes(np.array([5, 1, 5, 3, 1]), np.array([1, 2, 3, 4, 5]))
+    assert codes.tolist() == [1, 3, 5] and counts.tolist() == [7, 4, 4]
+    codes, counts = reduce_codes(np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64))
+    assert len(codes) == 0 and len(counts) == 0
+
+
+def test_tagged_key_round_trip():
+    assert tagged_key('black', 'ADJ') == 'black/ADJ'
+    assert split_tagged_key(tagged_key('a/b', 'X')) == ('a/b', 'X')
+
+
+def test_bigram_counts_match_naive_counters():
+    tokens = corpus()
+    vocabulary, ids = Vocabulary.from_tokens(tokens)
+    counts = BigramCounts.from_ids(vocabulary, ids)
+    unigrams, bigrams = Counter(tokens), Counter(zip(tokens[:-1], tokens[1:]))
+
+    freq_dist = counts.freq_dist()
+    assert all(freq_dist[word] == count for word, count in unigrams.items())
+    assert freq_dist['missing'] == 0 and freq_dist.N() == len(tokens)
+
+    forward, backward = counts.conditional_freq_dist(), counts.conditional_freq_dist(reverse=True)
+    for (first, second), count in bigrams.items():
+        assert forward[first][second] == count
+        assert backward[second][first] == count
+    assert sum(count for word, count in forward['the'].items()) == \
+        sum(count for (first, _), count in bigrams.items() if first == 'the')
+    assert len(forward['missing']) == 0
+
+
+def test_pair_counts_and_totals():
+    tokens = corpus(seed=1)
+    vocabulary, ids = Vocabulary.from_tokens(tokens)
+    counts = BigramCounts.from_ids(vocabulary, ids)
+    bigrams = Counter(zip(ids[:-1].tolist(), ids[1:].tolist()))
+    pairs = [(a, b) for a in range(len(vocabulary)) for b in range(len(vocabulary))]
+    fronts, backs = np.array(pairs).T
+    assert counts.pair_counts(fronts, backs).tolist() == [bigrams[pair] for pair in pairs]
+    following, preceding = counts.bigram_totals()
+    for index in range(len(vocabulary)):
+        assert following[index] == sum(c for (a, _), c in bigrams.items() if a == index)
+        assert preceding[index] == sum(c for (_, b), c in bigrams.items() if b == index)
+
+
+def test_arrays_round_trip():
+    vocabulary, ids = Vocabulary.from_tokens(corpus(seed=2))
+    counts = BigramCounts.from_ids(vocabulary, ids)
+    again = BigramCounts.from_arrays(vocabulary, counts.arrays('x_'), 'x_')
+    assert (again.forward != counts.forward).nnz == 0
+    assert (again.reverse != counts.reverse).nnz == 0
+    assert (again.unigrams == counts.unigrams).all()
@@ -0,0 +1,135 @@
+import asyncio, collections, json, threading, time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from common.crawler import Checkpoint, TokenBucket, crawl
+
+# key -> responses of the stub server, in order; the last one repeats.
+# A status with a number after it sends that Retry-After.
+RESPONSES = {
+    'pitch': [200],
+    'stark': [200],
+    'busy': [(429, '0.01'), (429, '0.01'), 200],
+    'patient': [(429, '3600'), 200],
+    'flaky': [503, 503, 200],
+    'down': [503],
+    'missing': [404],
+    'forbidden': [403],
+}
+FINISHED = {'pitch', 'stark', 'busy', 'patient', 'flaky'}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        key = self.path.lstrip('/')
+        with self.server.lock:
+            responses = RESPONSES[key]
+            response = responses[min(self.server.requests[key], len(responses) - 1)]
+            self.server.requests[key] += 1
+        status, retry_after = response if isinstance(response, tuple) else (response, None)
+        body = json.dumps({'word': key}).encode('utf8') if status == 200 else b''
+        self.send_response(status)
+        if retry_after is not None:
+            self.send_header('Retry-After', retry_after)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.requests = collections.Counter()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def fetcher(server):
+    url = 'http://%s:%d/' % server.server_address[:2]
+
+    def fetch(key):
+        with urllib.request.urlopen(url + key, timeout=10) as response:
+            return json.loads(response.read().decode('utf8'))['word']
+    return fetch
+
+
+def test_crawl_retries_fails_and_resumes(server, tmp_path):
+    path = str(tmp_path / 'checkpoint.jsonl')
+    keys = sorted(RESPONSES) + ['pitch']
+    start = time.monotonic()
+    results, stats = crawl(keys, fetcher(server), Checkpoint(path), concurrency=3,
+        rate=1000., burst=10., retries=2, backoff=0.01, max_backoff=0.05)
+    # 'patient' asks for an hour, and waits max_backoff instead
+    assert time.monotonic() - start < 5
+    assert results == dict((key, key) for key in FINISHED)
+    assert stats.done == len(FINISHED) and stats.resumed == 0
+    assert sorted(stats.failed) == ['down', 'forbidden', 'missing']
+    assert 'HTTPError' in stats.failed['missing'] and '404' in stats.failed['missing']
+    # busy 2, patient 1, flaky 2, down 2 (then given up); 4xx are not retried
+    assert stats.retries == 7
+    assert server.requests == collections.Counter({
+        'pitch': 1, 'stark': 1, 'busy': 3, 'patient': 2, 'flaky': 3, 'down': 3, 'missing': 1, 'forbidden': 1})
+    assert Checkpoint(path).load() == results
+    with open(path, encoding='utf8') as file:
+        assert sorted(json.loads(line)[0] for line in file) == sorted(FINISHED)
+
+    # a second run over the finished keys has nothing left to fetch
+    requests = collections.Counter(server.requests)
+    results, stats = crawl(sorted(FINISHED), fetcher(server), Checkpoint(path), rate=1000., burst=10.)
+    assert results == dict((key, key) for key in FINISHED)
+    assert (stats.done, stats.resumed, stats.retries, stats.failed) == (0, len(FINISHED), 0, {})
+    assert server.requests == requests
+    # and over every key, it fetches the failed ones only
+    results, stats = crawl(keys, fetcher(server), Checkpoint(path), rate=1000., burst=10.,
+        retries=0, backoff=0.01)
+    assert stats.resumed == len(FINISHED) and sorted(stats.failed) == ['down', 'forbidden', 'missing']
+    assert +(server.requests - requests) == collections.Counter({'down': 1, 'missing': 1, 'forbidden': 1})
+
+
+def test_429_waits_retry_after_once(server, tmp_path, monkeypatch):
+    monkeypatch.setitem(RESPONSES, 'slow', [(429, '0.4'), 200])
+    start = time.monotonic()
+    results, stats = crawl(['slow'], fetcher(server), Checkpoint(str(tmp_path / 'checkpoint.jsonl')),
+        rate=1000., burst=10., backoff=0.01, max_backoff=5.)
+    elapsed = time.monotonic() - start
+    assert results == {'slow': 'slow'} and stats.retries == 1
+    # the bucket holds the retry back, the worker does not sleep on top of it
+    assert 0.4 <= elapsed < 0.7
+
+
+def test_checkpoint_ignores_a_cut_line(tmp_path):
+    path = str(tmp_path / 'checkpoint.jsonl')
+    checkpoint = Checkpoint(path)
+    checkpoint.record('pitch', {'entries': 2})
+    checkpoint.close()
+    with open(path, 'a', encoding='utf8') as file:
+        file.write('["stark", {"entr')
+    assert Checkpoint(path).load() == {'pitch': {'entries': 2}}
+    checkpoint.remove()
+    assert Checkpoint(path).load() == {}
+
+
+def test_token_bucket_rate():
+    now = [0.]
+    bucket = TokenBucket(rate=2., capacity=2., clock=lambda: now[0])
+
+    async def take(count):
+        for _ in range(count):
+            await bucket.acquire()
+    asyncio.run(take(2))
+    assert bucket.tokens == 0
+    now[0] += 1.
+    asyncio.run(take(2))
+    bucket.defer(3.)
+    assert bucket.tokens == -6.
@@ -0,0 +1,55 @@
+import pytest
+
+from common.definition_intensity import DefinitionIntensity, build_definition_intensity, lemma_intensities
+
+FORMS = ['degree', 'extent', 'dark', 'high', 'greater']
+
+
+def naive_intensity(wordnet, word, forms=FORMS):
+    """Largest `1 + intensifier tokens` over the glosses of `word`, or 1."""
+    counts = [1 + len([token for token in synset.definition().split() if token in forms])
+        for synset in wordnet.synsets(word)]
+    return max(counts) if counts else 1
+
+
+@pytest.mark.parametrize('processes', [1, 2, 3])
+def test_build_matches_naive(wordnet, processes):
+    arrays, meta = build_definition_intensity(wordnet, FORMS, str.split, processes)
+    words = sorted(set(wordnet.all_lemma_names()))
+    assert arrays['words'].tolist() == words
+    assert arrays['values'].tolist() == [naive_intensity(wordnet, word) for word in words]
+    assert meta == {'synsets': len(wordnet.all_synsets()), 'words': len(words)}
+    values = dict(zip(words, arrays['values'].tolist()))
+    # 'to a high degree or extent' and 'to a greater degree or extent'
+    assert values['very'] == values['more'] == 4 and values['dark'] == 2
+
+
+def test_lemma_intensities(wordnet):
+    synset_counts = dict((synset.name(), index + 1) for index, synset in enumerate(wordnet.all_synsets()))
+    # 'run' has two synsets, 'nothing' none
+    assert lemma_intensities(['run', 'race', 'nothing'], wordnet, synset_counts) == [
+        max(synset_counts['run.v.01'], synset_counts['race.v.01']), synset_counts['race.v.01'], 1]
+
+
+def test_table_is_persisted(wordnet, tmp_path):
+    table = DefinitionIntensity.load(wordnet, FORMS, str.split, str(tmp_path), processes=1)
+    assert len(table) == len(set(wordnet.all_lemma_names()))
+    all_synsets = wordnet.all_synsets
+    wordnet.all_synsets = lambda pos=None: pytest.fail("built again")
+    loaded = DefinitionIntensity.load(wordnet, reversed(FORMS), str.split, str(tmp_path))
+    assert loaded.table == table.table
+    # other intensifiers build again
+    wordnet.all_synsets = all_synsets
+    table = DefinitionIntensity.load(wordnet, ['dark'], str.split, str(tmp_path), processes=1)
+    assert table['very'] == 1 and table['night'] == 2
+
+
+def test_words_outside_the_table(wordnet, tmp_path):
+    table = DefinitionIntensity.load(wordnet, FORMS, str.split, str(tmp_path), processes=1)
+    expected = naive_intensity(wordnet, 'nights')
+    lookups = wordnet.lookups
+    # an inflected form, looked up once and remembered
+    assert 'nights' not in table.table
+    assert table['nights'] == expected == 2
+    assert table['nights'] == 2 and table['unknown'] == 1
+    assert wordnet.lookups == lookups + 2
@@ -0,0 +1,73 @@
+import random
+
+import numpy as np
+import pytest
+
+from common.counts import BigramCounts, Vocabulary
+from common.distributional import ppmi_vectors, top_k_similar
+
+
+def counts(size=2000, seed=0):
+    rng = random.Random(seed)
+    words = ['pitch', 'black', 'dark', 'night', 'stark', 'naked', 'very', 'the', '.']
+    tokens = [rng.choice(words) for _ in range(size)]
+    vocabulary, ids = Vocabulary.from_tokens(tokens)
+    return BigramCounts.from_ids(vocabulary, ids)
+
+
+def naive_ppmi(counts, alpha):
+    """Dense PPMI of the right and left contexts, row by row."""
+    contexts = np.hstack([counts.forward.toarray(), counts.reverse.toarray()]).astype(float)
+    smoothed = contexts.sum(axis=0) ** alpha
+    vectors = np.zeros_like(contexts)
+    for word, row in enumerate(contexts):
+        for context, count in enumerate(row):
+            if count:
+                pmi = np.log((count / row.sum()) / (smoothed[context] / smoothed.sum()))
+                vectors[word, context] = max(pmi, 0)
+        norm = np.sqrt((vectors[word] ** 2).sum())
+        if norm:
+            vectors[word] /= norm
+    return vectors
+
+
+@pytest.mark.parametrize('alpha', [1., 0.75])
+def test_ppmi_vectors(alpha):
+    bigrams = counts()
+    vectors = ppmi_vectors(bigrams, alpha)
+    assert vectors.shape == (len(bigrams.vocabulary), 2 * len(bigrams.vocabulary))
+    assert np.allclose(vectors.toarray(), naive_ppmi(bigrams, alpha))
+    assert (vectors.data > 0).all()
+
+
+@pytest.mark.parametrize('batch_size', [1, 3, 1024])
+def test_top_k_similar_matches_brute_force(batch_size):
+    bigrams = counts(seed=1)
+    vectors = ppmi_vectors(bigrams)
+    dense = vectors.toarray()
+    size = len(bigrams.vocabulary)
+    queries = np.arange(size)
+    candidates = np.arange(0, size, 2)
+    ids, similarities = top_k_similar(vectors, queries, candidates, 3, batch_size)
+    assert ids.shape == similarities.shape == (size, 3)
+    for query, row, found in zip(queries, ids, similarities):
+        expected = sorted((dense[query].dot(dense[candidate]) for candidate in candidates
+            if candidate != query), reverse=True)[:3]
+        assert np.allclose(found, expected + [0] * (3 - len(expected)))
+        assert query not in row
+        for candidate, similarity in zip(row, found):
+            if similarity > 0:
+                assert np.isclose(dense[query].dot(dense[candidate]), similarity)
+            else:
+                assert candidate == -1
+
+
+def test_top_k_similar_pads_missing_candidates():
+    vocabulary, ids = Vocabulary.from_tokens(['x', 'y', 'x', 'y', 'p', 'q', 'p', 'q'])
+    vectors = ppmi_vectors(BigramCounts.from_ids(vocabulary, ids))
+    x, q = vocabulary.indices(['x', 'q'])
+    # 'x' and 'q' share no context, and 'x' is not its own paraphrase
+    ids, similarities = top_k_similar(vectors, [x], [x, q], 5)
+    assert ids.tolist() == [[-1, -1]] and similarities.tolist() == [[0, 0]]
+    ids, similarities = top_k_similar(vectors, [x], [], 5)
+    assert ids.shape == (1, 0)
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from common.gloss_index import GlossIndex
+
+KEYWORDS = ['extent', 'intensifier', 'intensity', 'quantifier', 'degree', 'comparative']
+
+
+def baseline_match(wordnet, keywords, hold_count, pos=None):
+    """Names of the synsets whose definition holds `hold_count` keywords,
+    counted as the HW1 baseline did."""
+    names = []
+    for synset in wordnet.all_synsets(pos):
+        held = sum(1 for keyword in keywords if keyword in synset.definition())
+        if held >= hold_count:
+            names.append(synset.name())
+    return sorted(names)
+
+
+@pytest.mark.parametrize('pos', ['r', 'as', None])
+@pytest.mark.parametrize('hold_count', [1, 2, 3])
+def test_match_holds_keywords_as_the_baseline(wordnet, tmp_path, pos, hold_count):
+    index = GlossIndex.load(wordnet, str(tmp_path))
+    found = sorted(index.name(synset_id) for synset_id in index.match(KEYWORDS, hold_count, pos))
+    expected = []
+    for tag in (pos or [None]):
+        expected += baseline_match(wordnet, KEYWORDS, hold_count, tag)
+    assert found == sorted(expected)
+
+
+def test_substrings_and_exact_tokens(wordnet, tmp_path):
+    index = GlossIndex.load(wordnet, str(tmp_path))
+    # 'intensif' is inside 'intensifiers' and 'intensify'
+    names = [index.name(synset_id) for synset_id in index.postings_of('intensif')]
+    assert names == ['intensifier.n.01', 'very.r.01']
+    assert len(index.postings_of('intensif', exact=True)) == 0
+    exact = [index.name(synset_id) for synset_id in index.postings_of('degree', pos='r', exact=True)]
+    assert exact == ['very.r.01', 'highly.r.01', 'extremely.r.01', 'more.r.01']
+    assert len(index.match([])) == 0
+
+
+def test_synsets_are_grouped_by_pos(wordnet, tmp_path):
+    index = GlossIndex.load(wordnet, str(tmp_path))
+    synsets = dict((synset.name(), synset) for synset in wordnet.all_synsets())
+    assert len(index) == len(synsets)
+    for synset_id in range(len(index)):
+        synset = synsets[index.name(synset_id)]
+        assert index.pos(synset_id) == synset.pos()
+        assert index.lemma_names(synset_id) == synset.lemma_names()
+    positions = ['nvasr'.index(index.pos(synset_id)) for synset_id in range(len(index))]
+    assert positions == sorted(positions)
+
+
+def test_index_is_persisted(wordnet, tmp_path):
+    built = GlossIndex.load(wordnet, str(tmp_path))
+    wordnet.all_synsets = lambda pos=None: pytest.fail("built again")
+    loaded = GlossIndex.load(wordnet, str(tmp_path))
+    assert np.array_equal(loaded.match(KEYWORDS, 2), built.match(KEYWORDS, 2))
@@ -0,0 +1,148 @@
+import os, random, subprocess, sys
+from collections import defaultdict
+
+import nltk.corpus
+import pytest
+
+import CS372_HW1_code_20170305 as hw1
+from common.counts import BigramCounts, Vocabulary
+
+WORDS = ['very', 'highly', 'extremely', 'really', 'black', 'dark', 'night', 'run', 'race',
+    'rush', 'speed', 'hasten', 'fast', 'increase', 'quickly', 'the', 'was', 'It', '.']
+
+
+def text(size=3000, seed=0):
+    rng = random.Random(seed)
+    return [rng.choice(WORDS) for _ in range(size)]
+
+
+@pytest.fixture
+def miner(wordnet, tmp_path, monkeypatch):
+    """Miner over the bigrams of `text`, with the `wordnet` fixture."""
+    monkeypatch.setattr(nltk.corpus, 'wordnet', wordnet)
+    vocabulary, ids = Vocabulary.from_tokens(text())
+    miner = hw1.IntensityPairMiner(cache_dir=str(tmp_path))
+    miner._stopwords = ['the', 'was', 'it']
+    return miner.use(BigramCounts.from_ids(vocabulary, ids), 'key', 'text')
+
+
+def baseline_evaluate(tokens, adverbs, pairs, diversity=28):
+    """`evaluate` of the first version, which scored each synonym in turn."""
+    opposite = defaultdict(set)
+    for front, back in zip(tokens, tokens[1:]):
+        opposite[back].add(front)
+    evaluated = []
+    for pos, adverb, (word, _), synonym in pairs:
+        scored_synonym = []
+        for syn in synonym:
+            word_letters = list(word)
+            for letter in syn:
+                if letter not in "aeiou" and letter in word_letters:
+                    word_letters.remove(letter)
+            common_length = len(word) - len(word_letters)
+            score = 1 - (common_length / len(syn))
+            collocation_freq = len([front for front in opposite[syn] if front in adverbs])
+            if collocation_freq != 0:
+                score *= 1 / (1 + collocation_freq)
+            score *= len(synonym) / diversity
+            scored_synonym.append((score, syn))
+        score, best_scored_word = sorted(scored_synonym)[::-1][0]
+        evaluated.append((score, pos, adverb + " " + word, best_scored_word))
+    return sorted(evaluated)[::-1]
+
+
+def random_pairs(count, seed):
+    """Pairs with synonyms of the corpus, unseen ones, and repeated ones."""
+    rng = random.Random(seed)
+    words = WORDS + ['pitch', 'stark', 'hurry']
+    return [
+        (rng.choice('va'), rng.choice(['very', 'highly']), (rng.choice(words), rng.randrange(1, 9)),
+            [rng.choice(words) for _ in range(rng.randrange(1, 7))])
+        for _ in range(count)
+    ]
+
+
+@pytest.mark.parametrize('diversity', [28, 5])
+def test_evaluate_matches_per_synonym_scoring(miner, diversity):
+    adverbs = ['very', 'highly', 'really']
+    for seed in range(5):
+        pairs = random_pairs(40, seed)
+        expected = baseline_evaluate(text(), adverbs, pairs, diversity)
+        assert miner.evaluate(adverbs, pairs, diversity) == expected
+        # with the scores of `score_synonyms` passed in, as `sweep` does
+        _, words, synonyms, _ = hw1.flatten_pairs(pairs)
+        scores = miner.score_synonyms(adverbs, words, synonyms)
+        assert miner.evaluate(adverbs, pairs, diversity, scores) == expected
+    assert miner.evaluate(adverbs, []) == []
+    assert len(miner.score_synonyms(adverbs, [], [])) == 0
+
+
+def run_pipeline(miner, hold_count, min_frequency, min_length, min_synonyms, diversity):
+    adverbs = sorted(miner.get_adverbs(hold_count, min_frequency, min_length))
+    pairs = miner.get_synsets(miner.get_pairs(adverbs), min_synonyms)
+    return miner.evaluate(adverbs, pairs, diversity)
+
+
+def test_sweep_matches_each_run(miner):
+    grid = {'hold_count': [1, 2], 'min_length': [4, 7], 'min_synonyms': [1, 4], 'diversity': [0.5, 28.]}
+    results = miner.sweep(grid)
+    assert len(results) == 16
+    assert any(evaluated for _, evaluated in results)
+    for parameters, evaluated in results:
+        assert parameters['min_frequency'] == hw1.PARAMETERS['min_frequency']
+        assert evaluated == run_pipeline(miner, **parameters)
+    with pytest.raises(KeyError):
+        miner.sweep({'hold_count': [1], 'nope': [1]})
+
+
+def test_sweep_assignment():
+    assert hw1.sweep_assignment('hold_count=1,2') == ('hold_count', [1, 2])
+    assert hw1.sweep_assignment('diversity=0.5,1.5,28') == ('diversity', [0.5, 1.5, 28.])
+    for assignment in ['hold_count=1.5', 'nope=1', 'min_length=']:
+        with pytest.raises(hw1.argparse.ArgumentTypeError):
+            hw1.sweep_assignment(assignment)
+
+
+def test_resources_are_loaded_on_first_use(wordnet, tmp_path, monkeypatch):
+    monkeypatch.setattr(nltk.corpus, 'wordnet', wordnet)
+    vocabulary, ids = Vocabulary.from_tokens(text())
+    counts = BigramCounts.from_ids(vocabulary, ids)
+    builds = []
+
+    def build_corpus_statistics(self):
+        builds.append(self)
+        arrays = counts.arrays()
+        arrays['vocabulary'] = counts.vocabulary.words
+        return arrays, {'tokens': len(ids)}
+    monkeypatch.setattr(hw1.IntensityPairMiner, 'corpus_statistics_key', lambda self: 'key')
+    monkeypatch.setattr(hw1.IntensityPairMiner, 'build_corpus_statistics', build_corpus_statistics)
+
+    miner = hw1.IntensityPairMiner(cache_dir=str(tmp_path))
+    miner._stopwords = ['the', 'was', 'it']
+    assert (miner._counts, miner._flags, miner._gloss_index, miner.key) == (None, None, None, None)
+    assert miner.freqDist['night'] == counts.unigrams[vocabulary.index('night')]
+    assert builds == [miner] and miner.key == 'key'
+    assert miner.counts is miner.counts and len(builds) == 1
+    assert (miner._flags, miner._gloss_index) == (None, None)
+    lookups = wordnet.lookups
+    flags = miner.flags
+    assert wordnet.lookups > lookups
+
+    # a second miner reads the snapshots instead
+    other = hw1.IntensityPairMiner(cache_dir=str(tmp_path))
+    other._stopwords = ['the', 'was', 'it']
+    lookups = wordnet.lookups
+    assert other.vocabulary.words.tolist() == vocabulary.words.tolist()
+    assert (other.flags == flags).all()
+    assert len(builds) == 1 and wordnet.lookups == lookups
+    # `build` counts and looks up everything again
+    other.build()
+    assert len(builds) == 2 and wordnet.lookups > lookups
+
+
+def test_import_is_light():
+    code = ("import sys; sys.path.insert(0, %r); import CS372_HW1_code_20170305; "
+        "print(sorted(name for name in ('nltk', 'numpy', 'scipy') if name in sys.modules))"
+        % os.path.dirname(os.path.abspath(hw1.__file__)))
+    output = subprocess.check_output([sys.executable, '-c', code], universal_newlines=True)
+    assert output.strip() == '[]'
@@ -0,0 +1,150 @@
+from collections import Counter, defaultdict
+
+import numpy as np
+import pytest
+
+from common.intensifiers import IntensifierIndex
+from common.score_cache import ScoreCache
+
+# Tagged corpus of the `hw2` fixture, see conftest.py.
+SENTENCES = [
+    [('It', 'PRON'), ('was', 'VERB'), ('a', 'DET'), ('pitch', 'ADJ'), ('dark', 'ADJ'), ('night', 'NOUN'), ('.', '.')],
+    [('The', 'DET'), ('pitch', 'ADJ'), ('dark', 'ADJ'), ('night', 'NOUN'), ('fell', 'VERB'), ('.', '.')],
+    [('A', 'DET'), ('terribly', 'ADV'), ('cold', 'ADJ'), ('night', 'NOUN'), ('.', '.')],
+] * 5 + [
+    [('A', 'DET'), ('stark', 'ADJ'), ('naked', 'ADJ'), ('man', 'NOUN'), ('ran', 'VERB'), ('.', '.')],
+]
+
+
+PITCH_DARK_NIGHT = (('pitch', 'ADJ'), ('dark', 'ADJ'), ('night', 'NOUN'))
+TERRIBLY_COLD_NIGHT = (('terribly', 'ADV'), ('cold', 'ADJ'), ('night', 'NOUN'))
+
+
+def check_trigrams(hw2):
+    assert sorted(hw2.get_collocations(n=3)) == [PITCH_DARK_NIGHT, TERRIBLY_COLD_NIGHT]
+    assert hw2.get_collocations2([('terribly', 'ADV')], n=3) == [TERRIBLY_COLD_NIGHT]
+    grams = [PITCH_DARK_NIGHT, (('abyss', 'NOUN'), ('black', 'ADJ'), ('night', 'NOUN'))]
+    assert hw2.rank_ngrams(grams) == [(10, ('pitch', 'dark', 'night')), (0, ('abyss', 'black', 'night'))]
+
+
+def test_trigrams(hw2):
+    check_trigrams(hw2)
+
+
+def test_trigrams_after_ingesting_new_words(hw2):
+    check_trigrams(hw2)
+    # 'abyss' sorts before every word of the base corpus, so the ids of the
+    # count tables shift, but not those of the n-gram index
+    changes = hw2.ingest_documents([[[('abyss', 'NOUN'), ('black', 'ADJ')]]])
+    assert changes.new_words == 2
+    check_trigrams(hw2)
+
+
+@pytest.mark.parametrize('token', [('black', 'NN'), ('black', ''), ('black', 'adj')])
+def test_ingest_rejects_other_tagsets(hw2, token):
+    tables = hw2.load_count_tables()
+    counts, documents = hw2.get_bigram_counts(), tables.documents
+    with pytest.raises(ValueError, match='universal'):
+        hw2.ingest_documents([[[('abyss', 'NOUN'), token]]])
+    assert hw2.get_bigram_counts() is counts and tables.documents == documents
+    check_trigrams(hw2)
+
+
+def test_main_reports_untagged_files(hw2, tmp_path, capsys):
+    path = tmp_path / 'document.txt'
+    path.write_text('the/DET abyss/NN foo/ black/ADJ\n')
+    with pytest.raises(SystemExit):
+        hw2.main(['--ingest', str(path)])
+    assert 'abyss/NN, foo/' in capsys.readouterr().err
+    assert hw2.load_count_tables().documents == 0
+
+
+def test_intensifier_lexicon_is_persisted(hw2, wordnet, monkeypatch):
+    monkeypatch.setattr(hw2, 'wn', wordnet)
+    built = []
+    get_intensifiers = hw2.get_intensifiers
+    monkeypatch.setattr(hw2, 'get_intensifiers', lambda: built.append(1) or get_intensifiers())
+    intensifiers = hw2.load_intensifiers()
+    assert sorted(intensifiers) == sorted(get_intensifiers())
+    assert ('very', 'ADV') in intensifiers and ('high', 'ADJ') in intensifiers
+    # no keyword in the gloss
+    assert 'quickly' not in intensifiers and 'intensifier' not in intensifiers
+    assert hw2.load_intensifiers() is intensifiers and len(built) == 1
+
+    # read back from the snapshot by another run
+    hw2.load_intensifiers.cache_clear()
+    assert sorted(hw2.load_intensifiers()) == sorted(intensifiers) and len(built) == 1
+    # built again with other stopwords
+    hw2.load_intensifiers.cache_clear()
+    monkeypatch.setattr(hw2, 'get_stopwords', lambda: ('the', 'very'))
+    assert ('very', 'ADV') not in hw2.load_intensifiers() and len(built) == 2
+
+
+def baseline_restrictivity(pairs):
+    """`add_restrictivity_score` of the first version, over distributions of
+    the lowercased bigrams of `SENTENCES` without punctuations."""
+    tokens = [(word.lower(), tag) for sentence in SENTENCES for word, tag in sentence]
+    freqDist = Counter((front, back) for front, back in zip(tokens, tokens[1:])
+        if not (front[1] == '.' or back[1] == '.'))
+    conditionalFreqDist, oppositeConditionalFreqDist = defaultdict(Counter), defaultdict(Counter)
+    for (front, back), count in freqDist.items():
+        conditionalFreqDist[front][back] += count
+        oppositeConditionalFreqDist[back][front] += count
+    # the first version had the largest count of brown corpus written out
+    _max = max(freqDist.values())
+    scores = []
+    for front, back in pairs:
+        score = freqDist[(front, back)] / _max
+        upright, reversed_ = conditionalFreqDist[front], oppositeConditionalFreqDist[back]
+        score *= (upright[back] / sum(upright.values()) if upright else 0) \
+            * (reversed_[front] / sum(reversed_.values()) if reversed_ else 0)
+        scores.append(score)
+    return scores
+
+
+def test_restrictivity_matches_conditional_distributions(hw2):
+    words = sorted(set((word.lower(), tag) for sentence in SENTENCES for word, tag in sentence))
+    # every pair of words, seen or not, and words outside the corpus
+    pairs = [(front, back) for front in words + [('abyss', 'NOUN')] for back in words + [('pitch', 'NOUN')]]
+    expected = baseline_restrictivity(pairs)
+    assert np.allclose(hw2.restrictivity_scores(pairs), expected)
+    fronts, backs = hw2.collocation_ids(pairs)
+    assert np.allclose(hw2.restrictivity_id_scores(fronts, backs), expected)
+    assert sum(score > 0 for score in expected) > 5
+    assert hw2.add_restrictivity_score(PITCH_DARK_NIGHT[1:]) == (pytest.approx(
+        baseline_restrictivity([PITCH_DARK_NIGHT[1:]])[0]), PITCH_DARK_NIGHT[1:])
+
+
+def test_print_tags_samples_the_store(hw2, capsys):
+    hw2.print_tags()
+    output = capsys.readouterr().out
+    assert ': {., ADJ, ADV, DET, NOUN, PRON, VERB}' in output
+    assert "3. Adverb (ADV): ['terribly']" in output
+
+
+class DefinitionIntensity(dict):
+    """Gloss intensity of a few words, 1 for the others."""
+
+    def __missing__(self, word):
+        return 1
+
+
+@pytest.mark.parametrize('measure', [None, 'pmi'])
+@pytest.mark.parametrize('processes', [2, 3])
+def test_parallel_evaluate_matches_serial(hw2, monkeypatch, measure, processes):
+    monkeypatch.setattr(hw2, 'load_intensifiers', lambda: IntensifierIndex(['terribly', 'stark'], ['ADV', 'ADJ']))
+    monkeypatch.setattr(hw2, 'load_definition_intensity', lambda: DefinitionIntensity(night=3, dark=2))
+    words = sorted(set((word.lower(), tag) for sentence in SENTENCES for word, tag in sentence))
+    pairs = [(front, back) for front in words for back in words]
+    serial = hw2.evaluate(pairs, measure)
+    assert len(serial) == len(pairs) and serial[0][0] > 0
+    for top in [None, 1, 5]:
+        expected = serial[:top] if top else serial
+        assert hw2.evaluate(pairs, measure, processes, top, batch_size=7) == expected
+        # a cold, then a warm cache
+        cache = ScoreCache()
+        assert hw2.evaluate(pairs, measure, processes, top, batch_size=7, cache=cache) == expected
+        assert len(cache) == len(pairs)
+        assert hw2.evaluate(pairs, measure, processes, top, batch_size=7, cache=cache) == expected
+    assert hw2.score_pairs(pairs, measure, processes, batch_size=7) == \
+        [score for score, pair in hw2.score_collocations(pairs, measure)]
@@ -0,0 +1,80 @@
+import random
+
+import numpy as np
+import pytest
+
+from common.incremental import IncrementalCounts, count_documents
+
+
+def documents(count, size, seed):
+    """Tagged documents over `size` words, punctuations included."""
+    rng = random.Random(seed)
+    return [
+        [[('W%d' % rng.randrange(size), rng.choice(['NOUN', 'ADJ', 'VERB', '.']))
+            for _ in range(rng.randrange(1, 9))] for _ in range(rng.randrange(1, 5))]
+        for _ in range(count)
+    ]
+
+
+def assert_same(counts, expected):
+    assert counts.vocabulary.words.tolist() == expected.vocabulary.words.tolist()
+    assert np.array_equal(counts.unigrams, expected.unigrams)
+    assert (counts.forward != expected.forward).nnz == 0
+    assert (counts.reverse != expected.reverse).nnz == 0
+    following, preceding = counts.bigram_totals()
+    expected.totals = None
+    assert np.array_equal(following, expected.bigram_totals()[0])
+    assert np.array_equal(preceding, expected.bigram_totals()[1])
+
+
+def test_count_documents():
+    counts = count_documents([
+        [[('Pitch', 'ADJ'), ('black', 'ADJ')], [('night', 'NOUN'), ('.', '.')]],
+        [[('pitch', 'ADJ'), ('black', 'ADJ'), ('.', '.'), ('night', 'NOUN')]],
+    ])
+    assert counts.vocabulary.words.tolist() == ['./.', 'black/ADJ', 'night/NOUN', 'pitch/ADJ']
+    assert counts.unigrams.tolist() == [2, 2, 2, 2]
+    # sentences of a document are joined, documents and punctuations are not
+    pairs = counts.forward.tocoo()
+    found = dict(((counts.vocabulary[row], counts.vocabulary[column]), count)
+        for row, column, count in zip(pairs.row, pairs.col, pairs.data))
+    assert found == {('pitch/ADJ', 'black/ADJ'): 2, ('black/ADJ', 'night/NOUN'): 1}
+
+
+def test_updates_match_a_full_recount(tmp_path):
+    path = str(tmp_path / 'counts')
+    base = documents(30, 5, 0)
+    tables = IncrementalCounts.load(path, 'key', lambda: count_documents(base))
+    everything = list(base)
+    for step in range(6):
+        # even steps bring new words, odd steps none
+        added = documents(step % 3, 8 if step % 2 == 0 else 5, step + 1)
+        before = count_documents(everything)
+        changes = tables.add_documents(added)
+        everything += added
+        expected = count_documents(everything)
+        assert_same(tables.counts, expected)
+        assert changes.new_words == len(expected.vocabulary) - len(before.vocabulary)
+        assert changes.bigrams == expected.forward.sum() - before.forward.sum()
+        assert changes.top == (before.forward.data.max(), expected.forward.data.max())
+        assert tables.top == expected.forward.data.max()
+        tables.save()
+        # reloaded from disk, without the base corpus
+        tables = IncrementalCounts.load(path, 'key', lambda: pytest.fail("counted again"))
+        assert_same(tables.counts, expected)
+        assert tables.documents == len(everything) - len(base)
+
+
+def test_changes():
+    base = [[[('pitch', 'ADJ'), ('black', 'ADJ'), ('night', 'NOUN')]]]
+    counts = count_documents(base)
+    following, preceding = counts.bigram_totals()
+    tables = IncrementalCounts('unused', 'key', counts, following, preceding, 1)
+    changes = tables.add_documents([[[('pitch', 'ADJ'), ('black', 'ADJ'), ('cat', 'NOUN')]]])
+    assert changes.pairs == {('pitch/ADJ', 'black/ADJ'), ('black/ADJ', 'cat/NOUN')}
+    assert changes.following == {'pitch/ADJ', 'black/ADJ'}
+    assert changes.preceding == {'black/ADJ', 'cat/NOUN'}
+    assert (changes.new_words, changes.bigrams, changes.top) == (1, 2, (1, 2))
+    assert changes.affects('pitch/ADJ', 'night/NOUN')
+    assert changes.affects('night/NOUN', 'cat/NOUN')
+    assert not changes.affects('night/NOUN', 'pitch/ADJ')
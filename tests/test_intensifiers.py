@@ -0,0 +1,32 @@
+import numpy as np
+
+from common.counts import Vocabulary
+from common.intensifiers import IntensifierIndex
+
+WORDS = ['stark', 'pitch', 'dead', 'pitch', 'very', 'dead']
+TAGS = ['ADJ', 'ADV', 'ADV', 'ADV', 'ADV', 'ADJ']
+
+
+def test_lookups():
+    index = IntensifierIndex(np.array(WORDS), TAGS)
+    # duplicates are dropped, entries sorted
+    assert list(index) == [('dead', 'ADJ'), ('dead', 'ADV'), ('pitch', 'ADV'), ('stark', 'ADJ'), ('very', 'ADV')]
+    assert len(index) == 5
+    assert index.words.tolist() == ['dead', 'pitch', 'stark', 'very']
+    for word, tag in zip(WORDS, TAGS):
+        assert word in index and (word, tag) in index
+        assert index.has_form(word) and index.has_form(word, tag)
+    assert ('pitch', 'ADJ') not in index and not index.has_form('pitch', 'ADJ')
+    assert 'black' not in index and not index.has_form('black')
+    assert index.tags_of('dead') == {'ADJ', 'ADV'} and index.tags_of('black') == set()
+
+
+def test_vocabulary_masks():
+    index = IntensifierIndex(WORDS, TAGS)
+    vocabulary = Vocabulary(np.array(['black', 'dead', 'night', 'pitch', 'very']))
+    assert index.mask(vocabulary).tolist() == [False, True, False, True, True]
+    assert index.mask(['very', 'quite']).tolist() == [True, False]
+    ids = np.array([[0, 1], [-1, 4]])
+    members = index.contains_ids(ids, vocabulary)
+    assert members.tolist() == [[False, True], [False, True]]
+    assert members.tolist() == [[id >= 0 and index.has_form(vocabulary[id]) for id in row] for row in ids.tolist()]
@@ -0,0 +1,68 @@
+import random
+from collections import Counter
+
+import pytest
+
+from common.profiler import DistinctSample, TagProfile, profile_sentences, read_tagged_files
+
+TAGS = ['NOUN', 'VERB', 'ADJ', '.']
+
+
+def sentences(count=500, seed=0):
+    """Sentences of 1-9 tokens, over 300 nouns and a few words of other tags."""
+    rng = random.Random(seed)
+    vocabulary = {'NOUN': 300, 'VERB': 20, 'ADJ': 5, '.': 1}
+    result = []
+    for _ in range(count):
+        tags = [rng.choice(TAGS) for _ in range(rng.randrange(1, 10))]
+        result.append([('%s%d' % (tag.lower(), rng.randrange(vocabulary[tag])), tag) for tag in tags])
+    return result
+
+
+@pytest.mark.parametrize('batch_size', [1, 50, 1 << 16])
+def test_counts_match_a_naive_pass(batch_size):
+    corpus = sentences()
+    profile = profile_sentences(corpus, sketch_size=64, batch_size=batch_size)
+    tagged_words = [token for sentence in corpus for token in sentence]
+    assert profile.tokens == Counter(tag for word, tag in tagged_words)
+    # transitions stay inside sentences
+    assert profile.transitions == Counter(
+        (first[1], second[1]) for sentence in corpus for first, second in zip(sentence, sentence[1:]))
+    assert profile.tags() == sorted(set(TAGS))
+    for tag in TAGS:
+        types = set(word for word, word_tag in tagged_words if word_tag == tag)
+        samples = profile.samples(tag, 10)
+        assert len(samples) == min(10, len(types)) == len(set(samples))
+        assert set(samples) <= types
+        if len(types) < 64:
+            assert profile.types(tag) == len(types)
+    assert profile.types('X') == 0 and profile.samples('X') == []
+
+
+def test_sample_size_is_bounded():
+    sample = DistinctSample(size=32, seed=1)
+    words = ['w%d' % index for index in range(5000)]
+    for start in range(0, len(words), 700):
+        # words seen again do not count twice
+        sample.offer(words[start:start + 700] + words[:10])
+        assert len(sample.hashes) <= 32 and len(sample.labels) == len(sample.hashes)
+    assert len(sample.sample(100)) == 32 and set(sample.sample(100)) <= set(words)
+    assert abs(sample.estimate() - len(words)) < 0.5 * len(words)
+    # the sketch of one batch is the sketch of many
+    whole = DistinctSample(size=32, seed=1)
+    whole.offer(words)
+    assert whole.sample(32) == sample.sample(32)
+    # other seeds draw other words
+    other = DistinctSample(size=32, seed=2)
+    other.offer(words)
+    assert other.sample(32) != sample.sample(32)
+
+
+def test_read_tagged_files(tmp_path):
+    path = tmp_path / 'corpus.txt'
+    path.write_text('The/DET pitch/NOUN a/b/X\n\nalone  night/NOUN\n')
+    assert list(read_tagged_files([str(path)])) == [
+        [('The', 'DET'), ('pitch', 'NOUN'), ('a/b', 'X')], [('night', 'NOUN')]]
+    profile = TagProfile()
+    profile.update(read_tagged_files([str(path)]))
+    assert profile.tokens == Counter({'NOUN': 2, 'DET': 1, 'X': 1})
@@ -0,0 +1,145 @@
+import http.client, json, threading
+
+import numpy as np
+import pytest
+
+from common.intensifiers import IntensifierIndex
+
+# Tagged corpus of the `hw2` fixture, see conftest.py.
+SENTENCES = [
+    [('It', 'PRON'), ('was', 'VERB'), ('pitch', 'ADJ'), ('black', 'ADJ'), ('.', '.')],
+    [('The', 'DET'), ('pitch', 'NOUN'), ('was', 'VERB'), ('black', 'ADJ'), ('.', '.')],
+    [('A', 'DET'), ('very', 'ADV'), ('black', 'ADJ'), ('night', 'NOUN'), ('.', '.')],
+    [('A', 'DET'), ('black', 'ADJ'), ('cat', 'NOUN'), ('and', 'CONJ'), ('a', 'DET'), ('black', 'ADJ'), ('night', 'NOUN')],
+] * 3 + [
+    [('Stark', 'ADJ'), ('black', 'ADJ'), ('night', 'NOUN'), ('.', '.')],
+    [('The', 'DET'), ('pitch', 'NOUN'), ('.', '.')],
+]
+
+
+class DefinitionIntensity(dict):
+    """Gloss intensity of a few words, 1 for the others."""
+
+    def __missing__(self, word):
+        return 1
+
+
+@pytest.fixture
+def service(hw2, monkeypatch):
+    monkeypatch.setattr(hw2, 'load_intensifiers', lambda: IntensifierIndex(['very', 'stark'], ['ADV', 'ADJ']))
+    monkeypatch.setattr(hw2, 'load_definition_intensity', lambda: DefinitionIntensity(night=3))
+    import query_server
+    return query_server.CollocationService()
+
+
+def test_resolve(service):
+    black = service.vocabulary.index('black/ADJ')
+    assert service.resolve('black') == black
+    assert service.resolve('Black', 'adj') == black
+    assert service.resolve('BLACK/adj') == black
+    # the most frequent tag of 'pitch'
+    assert service.resolve('pitch') == service.vocabulary.index('pitch/NOUN')
+    assert service.resolve('pitch', 'Adj') == service.vocabulary.index('pitch/ADJ')
+    with pytest.raises(KeyError):
+        service.resolve('black', 'NOUN')
+    with pytest.raises(KeyError):
+        service.resolve('white')
+
+
+def test_neighbors(service):
+    result = service.neighbors('black', side='right')
+    assert result['neighbors'][0] == {'word': ['night', 'NOUN'], 'count': 7}
+    result = service.neighbors('night/NOUN', side='left', top=1)
+    assert result['neighbors'] == [{'word': ['black', 'ADJ'], 'count': 7}]
+    with pytest.raises(ValueError):
+        service.neighbors('black', side='up')
+
+
+def test_collocates_scores_match_evaluate(service, hw2):
+    result = service.collocates('black', side='right', content=False)
+    pairs = [(('black', 'ADJ'), tuple(collocate['word'])) for collocate in result['collocates']]
+    expected = dict((pair, score) for score, pair in hw2.score_collocations(pairs))
+    for collocate in result['collocates']:
+        assert collocate['score'] == expected[('black', collocate['word'][0])]
+    scores = [collocate['score'] for collocate in result['collocates']]
+    assert scores == sorted(scores, reverse=True)
+    # intensifiers and glosses count, as in `evaluate`
+    left = service.collocates('black', side='left', measure=None)
+    assert [collocate['word'][0] for collocate in left['collocates']][:1] == ['very']
+    with pytest.raises(ValueError):
+        service.collocates('black', side='middle')
+    with pytest.raises(ValueError):
+        service.collocates('black', measure='nope')
+
+
+def test_collocates_with_a_measure(service):
+    result = service.collocates('black', measure='pmi', min_count=2)
+    assert all(collocate['count'] >= 2 for collocate in result['collocates'])
+    assert {tuple(collocate['word']) for collocate in result['collocates']} == {('night', 'NOUN'), ('cat', 'NOUN')}
+
+
+def test_score(service, hw2):
+    result = service.score([['very', 'black'], [['black', 'adj'], 'night/noun']])['scores']
+    assert [entry['pair'] for entry in result] == [[['very', 'ADV'], ['black', 'ADJ']], [['black', 'ADJ'], ['night', 'NOUN']]]
+    assert result[0]['intensifiers'] == [True, False] and result[1]['count'] == 7
+    expected = hw2.score_collocations([(('very', 'ADV'), ('black', 'ADJ')), (('black', 'ADJ'), ('night', 'NOUN'))])
+    assert [entry['score'] for entry in result] == [score for score, pair in expected]
+    assert np.allclose([entry['restrictivity'] for entry in result],
+        hw2.restrictivity_scores([(('very', 'ADV'), ('black', 'ADJ')), (('black', 'ADJ'), ('night', 'NOUN'))]))
+
+
+def test_query_errors_stay_in_their_result(service):
+    results = service.query({'queries': [
+        {'op': 'neighbors', 'word': 'white'},
+        {'op': 'neighbors', 'word': 'black', 'side': 'up'},
+        {'op': 'nope'},
+        {'op': 'neighbors', 'word': 'black', 'top': 1},
+    ]})['results']
+    assert [sorted(result) for result in results[:3]] == [['error']] * 3
+    assert results[3]['neighbors'] == [{'word': ['night', 'NOUN'], 'count': 7}]
+
+
+def test_malformed_batches(service):
+    results = service.query({'queries': [1, 'neighbors', None, ['op'], {'op': 'neighbors', 'word': 'black', 'top': 1}]})
+    assert [sorted(result) for result in results['results'][:4]] == [['error']] * 4
+    assert results['results'][4]['neighbors'] == [{'word': ['night', 'NOUN'], 'count': 7}]
+    for queries in [5, 'neighbors', {'op': 'neighbors'}, None]:
+        assert sorted(service.query({'queries': queries})) == ['error']
+
+
+def test_http(service):
+    import query_server
+    server = query_server.make_server(service, port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        connection = http.client.HTTPConnection(*server.server_address[:2], timeout=10)
+
+        def request(method, path, body=None):
+            connection.request(method, path, body)
+            response = connection.getresponse()
+            return response.status, json.loads(response.read().decode('utf8'))
+
+        status, body = request('GET', '/health')
+        assert status == 200 and body['words'] == len(service.vocabulary)
+        # one kept-alive connection answers every request
+        status, body = request('POST', '/query', json.dumps(
+            {'op': 'neighbors', 'word': 'black', 'tag': 'adj', 'top': 1}))
+        assert status == 200 and body['neighbors'] == [{'word': ['night', 'NOUN'], 'count': 7}]
+        status, body = request('POST', '/query', json.dumps({'queries': [
+            {'op': 'score', 'pairs': [['black', 'night']]}, {'op': 'collocates', 'word': 'black', 'side': 'up'}]}))
+        assert status == 200 and body['results'][0]['scores'][0]['count'] == 7
+        assert 'error' in body['results'][1]
+        assert request('POST', '/query', 'not json')[0] == 400
+        assert request('POST', '/query', '[]')[0] == 400
+        # a bad batch fails as a whole, a bad query in a batch on its own
+        status, body = request('POST', '/query', json.dumps({'queries': 5}))
+        assert status == 400 and 'queries' in body['error']
+        status, body = request('POST', '/query', json.dumps({'queries': [1, {'op': 'neighbors', 'word': 'black'}]}))
+        assert status == 200 and 'error' in body['results'][0] and 'neighbors' in body['results'][1]
+        assert request('POST', '/elsewhere', '{}')[0] == 404
+        assert request('GET', '/elsewhere')[0] == 404
+        connection.close()
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,50 @@
+from common.score_cache import ScoreCache
+
+
+class Scorer(object):
+    """Scores keys by their length, remembering every batch it was asked for."""
+
+    def __init__(self):
+        self.batches = []
+
+    def __call__(self, missing):
+        self.batches.append(list(missing))
+        return [len(key) for key in missing]
+
+
+def test_misses_are_scored_once_in_one_batch():
+    cache, scorer = ScoreCache(), Scorer()
+    assert cache.get_many(['aa', 'b', 'aa', 'ccc'], scorer) == [2, 1, 2, 3]
+    assert scorer.batches == [['aa', 'b', 'ccc']]
+    assert cache.get_many(['b', 'dddd', 'ccc'], scorer) == [1, 4, 3]
+    assert scorer.batches[-1] == ['dddd']
+    assert len(cache) == 4 and 'dddd' in cache
+
+
+def test_all_hits_do_not_score():
+    cache, scorer = ScoreCache(), Scorer()
+    cache.get_many(['a', 'b'], scorer)
+    assert cache.get_many(['b', 'a', 'a'], scorer) == [1, 1, 1]
+    assert len(scorer.batches) == 1
+    assert cache.get_many([], scorer) == []
+
+
+def test_discard_and_clear():
+    cache, scorer = ScoreCache(), Scorer()
+    cache.get_many(['a', 'bb', 'ccc'], scorer)
+    assert cache.discard(['a', 'zz', 'ccc']) == 2
+    assert 'a' not in cache and 'bb' in cache
+    cache.get_many(['a', 'bb'], scorer)
+    assert scorer.batches[-1] == ['a']
+    cache.clear()
+    assert len(cache) == 0
+    cache.get_many(['bb'], scorer)
+    assert scorer.batches[-1] == ['bb']
+
+
+def test_stats():
+    cache, scorer = ScoreCache(), Scorer()
+    assert cache.stats() == {'hits': 0, 'misses': 0, 'size': 0, 'hit_rate': 0.}
+    cache.get_many(['a', 'b', 'a'], scorer)
+    cache.get_many(['a', 'c'], scorer)
+    assert cache.stats() == {'hits': 2, 'misses': 3, 'size': 3, 'hit_rate': 0.4}
@@ -0,0 +1,51 @@
+import random
+
+import numpy as np
+import pytest
+
+from common.sharding import CountTable, count_sharded, split_shards
+
+
+def shard_tokens(fileids):
+    """Reader: tokens of synthetic files, '.' tokens not kept."""
+    tokens = []
+    for fileid in fileids:
+        rng = random.Random(fileid)
+        tokens.extend(rng.choice(['a', 'b', 'c', '.', 'd/x']) for _ in range(rng.randint(0, 200)))
+    return tokens, np.array([token != '.' for token in tokens], dtype=bool)
+
+
+def same(a, b):
+    assert (a.words == b.words).all()
+    assert (a.unigrams == b.unigrams).all()
+    assert (a.codes == b.codes).all() and (a.counts == b.counts).all()
+
+
+def test_split_shards_is_contiguous():
+    fileids = list(range(10))
+    shards = split_shards(fileids, 4)
+    assert sum(shards, []) == fileids and len(shards) == 4
+    assert split_shards(fileids[:2], 4) == [[0], [1]]
+
+
+def test_merge_adds_the_boundary_bigram():
+    left = CountTable.from_tokens(['a', 'b'])
+    right = CountTable.from_tokens(['b', 'c'])
+    same(left.merge(right), CountTable.from_tokens(['a', 'b', 'b', 'c']))
+    kept = np.array([True, False])
+    same(CountTable.from_tokens(['a', '.'], kept).merge(right),
+        CountTable.from_tokens(['a', '.', 'b', 'c'], np.array([True, False, True, True])))
+
+
+def test_merge_with_empty_tables():
+    table = CountTable.from_tokens(['a', 'b'])
+    empty = CountTable.from_tokens([])
+    same(table.merge(empty), table)
+    same(empty.merge(table), table)
+
+
+@pytest.mark.parametrize('processes, shards', [(1, None), (2, 3), (3, 16)])
+def test_sharded_counts_equal_one_pass(processes, shards):
+    fileids = list(range(25))
+    expected = CountTable.from_tokens(*shard_tokens(fileids))
+    same(count_sharded(shard_tokens, fileids, processes, shards), expected)
@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from common.snapshot import cached_snapshot, fingerprint, load_snapshot, save_snapshot
+
+
+def test_fingerprint_is_stable_and_order_sensitive():
+    assert fingerprint('a', {'x': 1, 'y': 2}) == fingerprint('a', {'y': 2, 'x': 1})
+    assert fingerprint('a', 'b') != fingerprint('b', 'a')
+
+
+def test_round_trip_is_memory_mapped(tmp_path):
+    path = str(tmp_path / 'snap')
+    words = np.array(['a', 'bb', 'ccc'])
+    counts = np.arange(3, dtype=np.int64)
+    save_snapshot(path, 'k', {'words': words, 'counts': counts}, {'tokens': 3})
+    snapshot = load_snapshot(path, 'k')
+    assert snapshot.meta == {'tokens': 3}
+    assert isinstance(snapshot['counts'], np.memmap)
+    assert (snapshot['words'] == words).all() and (snapshot['counts'] == counts).all()
+    assert sorted(snapshot.keys()) == ['counts', 'words']
+
+
+def test_stale_key_or_missing_snapshot_is_none(tmp_path):
+    path = str(tmp_path / 'snap')
+    assert load_snapshot(path, 'k') is None
+    save_snapshot(path, 'k', {'a': np.zeros(1)})
+    assert load_snapshot(path, 'other') is None
+
+
+def test_object_arrays_are_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        save_snapshot(str(tmp_path / 'snap'), 'k', {'a': np.array([None, 1], dtype=object)})
+
+
+def test_cached_snapshot_builds_once_per_key(tmp_path):
+    path = str(tmp_path / 'snap')
+    calls = []
+    def build():
+        calls.append(1)
+        return {'a': np.arange(len(calls))}, {}
+    assert len(cached_snapshot(path, 'k', build)['a']) == 1
+    assert len(cached_snapshot(path, 'k', build)['a']) == 1
+    assert len(cached_snapshot(path, 'k2', build)['a']) == 2
+    assert len(cached_snapshot(path, 'k2', build, rebuild=True)['a']) == 3
+    assert len(calls) == 3
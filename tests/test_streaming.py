@@ -0,0 +1,78 @@
+import random
+from collections import Counter
+
+import numpy as np
+import pytest
+
+from common.counts import Vocabulary, BigramCounts
+from common.streaming import SketchCounter, StreamCounter, count_stream, stream_tokens, TOKEN_PATTERN
+
+
+def text(size=3000, seed=0):
+    rng = random.Random(seed)
+    words = ['pitch', 'black', 'dead-center', "don't", 'stark', ',', '.']
+    return ' '.join(rng.choice(words) for _ in range(size))
+
+
+def naive(tokens):
+    vocabulary, ids = Vocabulary.from_tokens(tokens)
+    return BigramCounts.from_ids(vocabulary, ids)
+
+
+def same(a, b):
+    assert (a.vocabulary.words == b.vocabulary.words).all()
+    assert (np.asarray(a.unigrams) == b.unigrams).all()
+    assert (a.forward != b.forward).nnz == 0
+
+
+@pytest.mark.parametrize('chunk_size', [1, 7, 64, 1 << 20])
+def test_chunking_keeps_every_token(tmp_path, chunk_size):
+    path = tmp_path / 'a.txt'
+    path.write_text(text())
+    streamed = [token for tokens in stream_tokens([str(path)], chunk_size) for token in tokens]
+    assert streamed == TOKEN_PATTERN.findall(text())
+
+
+@pytest.mark.parametrize('chunk_size', [3, 50, 1 << 20])
+def test_exact_counts_match_one_pass(tmp_path, chunk_size):
+    path = tmp_path / 'a.txt'
+    path.write_text(text(seed=1))
+    same(count_stream([str(path)], chunk_size=chunk_size), naive(TOKEN_PATTERN.findall(text(seed=1))))
+
+
+def test_first_chunk_of_one_token():
+    # a chunk of one token has no bigram; it used to fail on the empty codes
+    counter = StreamCounter()
+    for tokens in [['pitch'], ['black', 'night'], ['pitch']]:
+        counter.update(tokens)
+    same(counter.counts(), naive(['pitch', 'black', 'night', 'pitch']))
+    counter = StreamCounter()
+    counter.update(['alone'])
+    same(counter.counts(), naive(['alone']))
+
+
+def test_merges_stay_apart():
+    # the merged codes do not count as pending, or every update merges again
+    counter = StreamCounter(merge_every=8)
+    merges = []
+    merge = counter._merge
+    counter._merge = lambda: merges.append(1) or merge()
+    tokens = TOKEN_PATTERN.findall(text(seed=3))
+    for start in range(0, 400, 4):
+        counter.update(tokens[start:start + 4])
+    assert len(merges) <= 400 // 8
+    same(counter.counts(), naive(tokens[:400]))
+
+
+def test_sketch_never_undercounts_heavy_hitters():
+    tokens = TOKEN_PATTERN.findall(text(seed=2))
+    counter = SketchCounter(bits=12, heavy_hitters=50)
+    for start in range(0, len(tokens), 100):
+        counter.update(tokens[start:start + 100])
+    counts = counter.counts()
+    unigrams, bigrams = Counter(tokens), Counter(zip(tokens[:-1], tokens[1:]))
+    for word, count in unigrams.items():
+        assert counts.freq_dist()[word] >= count
+    table = counts.conditional_freq_dist()
+    for (first, second), count in bigrams.items():
+        assert table[first][second] >= count
@@ -0,0 +1,89 @@
+import random
+from collections import Counter
+
+import numpy as np
+import pytest
+
+from common.suffix_array import BOUNDARY, MAX_N, NgramIndex, SuffixArray
+
+
+def token_ids(size=3000, seed=0):
+    """Ids over a small vocabulary, so n-grams repeat, with boundaries
+    at both ends, in runs, and scattered."""
+    rng = random.Random(seed)
+    ids = [rng.choice([0, 1, 2, 3, 4, BOUNDARY]) if rng.random() < 0.9 else rng.randrange(50)
+        for _ in range(size)]
+    ids[:1] = [BOUNDARY]
+    ids[-1:] = [BOUNDARY]
+    ids[100:103] = [BOUNDARY] * 3
+    return np.array(ids)
+
+
+def naive_ngrams(ids, n):
+    """Counter of the n-grams of a sliding window, none across a boundary."""
+    ids = ids.tolist()
+    return Counter(
+        tuple(ids[start:start + n]) for start in range(len(ids) - n + 1)
+        if BOUNDARY not in ids[start:start + n]
+    )
+
+
+@pytest.mark.parametrize('n', range(1, MAX_N + 1))
+@pytest.mark.parametrize('min_count', [1, 2, 7])
+def test_ngrams_match_sliding_window(n, min_count):
+    ids = token_ids()
+    ngrams, counts = SuffixArray.build(ids).ngrams(n, min_count)
+    expected = dict((gram, count) for gram, count in naive_ngrams(ids, n).items() if count >= min_count)
+    found = dict(zip(map(tuple, ngrams.tolist()), counts.tolist()))
+    assert found == expected
+    # sorted, and each n-gram once
+    assert list(map(tuple, ngrams.tolist())) == sorted(expected)
+
+
+def test_ngrams_at_sequence_ends():
+    # no boundary at either end: the padding stops the last n-grams
+    ids = np.array([1, 2, 1, 2, 1, 2])
+    for n in range(1, MAX_N + 1):
+        ngrams, counts = SuffixArray.build(ids).ngrams(n)
+        assert dict(zip(map(tuple, ngrams.tolist()), counts.tolist())) == naive_ngrams(ids, n)
+
+
+def test_small_sequences():
+    for ids in ([], [BOUNDARY], [BOUNDARY, BOUNDARY], [3]):
+        ngrams, counts = SuffixArray.build(np.array(ids, dtype=np.int32)).ngrams(1)
+        assert dict(zip(map(tuple, ngrams.tolist()), counts.tolist())) == naive_ngrams(np.array(ids), 1)
+    with pytest.raises(ValueError):
+        SuffixArray.build(np.array([1])).ngrams(MAX_N + 1)
+
+
+def test_count_and_extensions():
+    ids = token_ids()
+    index = NgramIndex.build(ids)
+    for n in range(1, MAX_N):
+        grams, longer = naive_ngrams(ids, n), naive_ngrams(ids, n + 1)
+        for gram in list(grams)[:30]:
+            assert index.count(gram) == grams[gram]
+            tokens, counts = index.right(gram, min_count=2)
+            expected = sorted((extended[-1], count) for extended, count in longer.items()
+                if extended[:-1] == gram and count >= 2)
+            assert list(zip(tokens.tolist(), counts.tolist())) == expected
+            tokens, counts = index.left(gram)
+            expected = sorted((extended[0], count) for extended, count in longer.items()
+                if extended[1:] == gram)
+            assert list(zip(tokens.tolist(), counts.tolist())) == expected
+    assert index.count([BOUNDARY]) == 0
+    assert index.count([0, BOUNDARY]) == 0
+    assert index.count([49, 48, 47, 46, 45]) == 0
+
+
+def test_load_round_trip(tmp_path):
+    ids = token_ids()
+    built = NgramIndex.build(ids)
+    loaded = NgramIndex.load(ids, 'source', str(tmp_path))
+    # the saved index is read back, without the sequence
+    reloaded = NgramIndex.load(None, 'source', str(tmp_path))
+    for index in (loaded, reloaded):
+        for n in (1, 3, MAX_N):
+            assert np.array_equal(index.ngrams(n)[0], built.ngrams(n)[0])
+            assert np.array_equal(index.ngrams(n)[1], built.ngrams(n)[1])
+        assert index.left([1, 2])[1].tolist() == built.left([1, 2])[1].tolist()
@@ -0,0 +1,51 @@
+import itertools
+
+import numpy as np
+import pytest
+
+import CS372_HW2_code_20170305 as hw2
+from common.tag_filter import UNIVERSAL_TAGS, TagPairFilter
+
+
+def baseline_keeps(word1, tag1, word2, tag2):
+    """Pos filters of `get_collocations` of the first version."""
+    return all([
+        not (tag1 == 'ADP' or tag2 == 'ADP'),
+        not (tag1 == 'PRT' or tag2 == 'PRT'),
+        not (tag1 == 'X' or tag2 == 'X'),
+        not (tag1 == 'CONJ' or tag2 == 'CONJ'),
+        not (tag1 == 'PRON' or tag2 == 'PRON'),
+        not (tag1 in ['DET', 'NOUN', 'NUM', 'VERB'] and tag2 == 'ADJ'),
+        not (tag1 in ['ADJ', 'DET', 'NOUN', 'NUM'] and tag2 == 'ADV'),
+        not (tag1 in ['ADJ', 'DET', 'NOUN', 'NUM', 'VERB'] and tag2 == 'DET'),
+        not (tag1 in ['DET', 'NOUN', 'VERB'] and tag2 == 'NOUN'),
+        not (tag1 == 'NUM' and word1 not in ['thousand', 'million']),
+        not (tag2 == 'NUM'),
+        not (tag1 in ['ADJ', 'DET', 'NOUN', 'NUM', 'VERB'] and tag2 == 'VERB'),
+    ])
+
+
+@pytest.mark.parametrize('word1', ['pitch', 'thousand', 'million'])
+@pytest.mark.parametrize('word2', ['night', 'thousand'])
+def test_rules_match_the_condition_list(word1, word2):
+    tag_filter = hw2.load_tag_filter(hw2.TAG_RULES)
+    pairs = list(itertools.product(UNIVERSAL_TAGS, repeat=2))
+    mask = tag_filter.mask(
+        tag_filter.tag_ids([tag1 for tag1, tag2 in pairs]), tag_filter.tag_ids([tag2 for tag1, tag2 in pairs]),
+        np.array([word1] * len(pairs)), np.array([word2] * len(pairs)))
+    assert mask.tolist() == [baseline_keeps(word1, tag1, word2, tag2) for tag1, tag2 in pairs]
+
+
+def test_rules():
+    tag_filter = TagPairFilter.from_rules([
+        {'first': '*', 'second': ['ADP']},
+        {'first': ['NUM'], 'second': 'NOUN', 'unless_second': ['days']},
+    ])
+    ids = tag_filter.tag_ids
+    mask = tag_filter.mask(ids(['ADJ', 'ADP', 'NUM', 'NUM', 'NUM']), ids(['ADP', 'NOUN', 'NOUN', 'NOUN', 'VERB']),
+        np.array(['a', 'b', 'two', 'two', 'two']), np.array(['c', 'd', 'years', 'days', 'ran']))
+    assert mask.tolist() == [False, True, False, True, True]
+    with pytest.raises(ValueError):
+        tag_filter.tag_ids(['NN'])
+    with pytest.raises(ValueError):
+        TagPairFilter.from_rules([{'first': ['NN'], 'second': '*'}])
@@ -0,0 +1,45 @@
+import numpy as np
+
+from common.counts import Vocabulary
+from common import word_flags
+from common.word_flags import ALPHA, POS_BITS, STOPWORD, build_word_flags, load_word_flags
+
+STOPWORDS = ['the', 'very', 'it']
+WORDS = ['black', 'blacks', 'dark', 'night', 'run', 'very', 'the', 'pitch-black', '42', 'moon', 'it']
+
+
+def naive_flags(wordnet, word, stopwords):
+    """Flags of `word`, from the checks the pipelines made per word."""
+    flag = (ALPHA if word.isalpha() else 0) | (STOPWORD if word in stopwords else 0)
+    if word.isalpha() and word not in stopwords:
+        for synset in wordnet.synsets(word):
+            flag |= POS_BITS[synset.pos()]
+    return flag
+
+
+def test_flags_match_per_word_checks(wordnet):
+    flags = build_word_flags(WORDS, wordnet, STOPWORDS)
+    assert flags.dtype == np.uint8
+    assert flags.tolist() == [naive_flags(wordnet, word, STOPWORDS) for word in WORDS]
+    flag = dict(zip(WORDS, flags.tolist()))
+    assert flag['black'] == flag['blacks'] == ALPHA | word_flags.ADJ | word_flags.ADJ_SAT
+    assert flag['dark'] == ALPHA | word_flags.ADJ_SAT | word_flags.NOUN
+    assert flag['moon'] == ALPHA
+    # stopwords and non-alphabetic words are not looked up
+    assert flag['very'] == ALPHA | STOPWORD and flag['pitch-black'] == 0 and flag['42'] == 0
+
+
+def test_flags_are_persisted(wordnet, tmp_path):
+    vocabulary = Vocabulary(np.array(sorted(WORDS)))
+    flags = load_word_flags(vocabulary, 'vocabulary', wordnet, STOPWORDS, str(tmp_path))
+    assert flags.tolist() == build_word_flags(vocabulary.words, wordnet, STOPWORDS).tolist()
+    lookups = wordnet.lookups
+    loaded = load_word_flags(vocabulary, 'vocabulary', wordnet, STOPWORDS, str(tmp_path))
+    assert np.array_equal(loaded, flags) and wordnet.lookups == lookups
+    # other stopwords, or another vocabulary, build again
+    rebuilt = load_word_flags(vocabulary, 'vocabulary', wordnet, ['the'], str(tmp_path))
+    assert wordnet.lookups > lookups
+    assert rebuilt[vocabulary.index('very')] & word_flags.ADV
+    lookups = wordnet.lookups
+    load_word_flags(vocabulary, 'other', wordnet, ['the'], str(tmp_path))
+    assert wordnet.lookups > lookups